@@ -1,3 +1,3 @@
 from .config import Config
-from .database import Base, get_db
+from .database import Base, get_db, get_async_db
 from . import models, schemas
\ No newline at end of file
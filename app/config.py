@@ -34,6 +34,79 @@ class Config:
     # Processing settings
     BATCH_SIZE: int = 1000
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    # Streaming: parsear por bloques de BATCH_SIZE con memoria acotada
+    STREAM_UPLOADS: bool = os.getenv("STREAM_UPLOADS", "false").lower() == "true"
+    MAX_STREAM_UPLOAD_SIZE: int = int(os.getenv("MAX_STREAM_UPLOAD_SIZE", "0"))  # 0 = sin límite
+
+    # Executors: threads para I/O bloqueante, procesos para parseo CPU-bound
+    IO_WORKERS: int = int(os.getenv("IO_WORKERS", "8"))
+    CPU_WORKERS: int = int(os.getenv("CPU_WORKERS", "0"))  # 0 = os.cpu_count()
+    PARALLEL_PARSE: bool = os.getenv("PARALLEL_PARSE", "false").lower() == "true"
+    PARSE_BLOCK_SIZE: int = int(os.getenv("PARSE_BLOCK_SIZE", str(4 * 1024 * 1024)))  # 4MB
+    # Parser de CSV: "pandas" (C parser, un hilo) o "pyarrow" (multihilo, con
+    # timestamps y strings categóricos en la misma pasada)
+    CSV_PARSER: str = os.getenv("CSV_PARSER", "pandas").lower()
+
+    # Diagnóstico por carga (tiempos por etapa, filas/s, memoria, round trips):
+    # siempre se loguea; INGEST_DIAGNOSTICS lo agrega también al resumen.
+    # DIAGNOSTICS_MEMORY: "rss" (muestreo), "tracemalloc" u "off"
+    INGEST_DIAGNOSTICS: bool = os.getenv("INGEST_DIAGNOSTICS", "false").lower() == "true"
+    DIAGNOSTICS_MEMORY: str = os.getenv("DIAGNOSTICS_MEMORY", "rss").lower()
+
+    # Cargas en segundo plano
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "2"))
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "20"))
+    INGEST_JOB_HISTORY: int = int(os.getenv("INGEST_JOB_HISTORY", "200"))
+    INGEST_SPOOL_DIR: str = os.getenv("INGEST_SPOOL_DIR", "")  # vacío = directorio temporal del sistema
+
+    # Pools de conexiones: el engine sync atiende las cargas; el async (asyncpg)
+    # queda reservado para las lecturas de /metrics
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    READ_POOL_SIZE: int = int(os.getenv("READ_POOL_SIZE", "5"))
+    READ_MAX_OVERFLOW: int = int(os.getenv("READ_MAX_OVERFLOW", "10"))
+    READ_POOL_TIMEOUT: int = int(os.getenv("READ_POOL_TIMEOUT", "30"))
+
+    # Admisión de cargas: conexiones del pool sync que pueden ocupar entre
+    # todas (el resto queda para lecturas como /rejects), cargas simultáneas
+    # por tabla y cola de espera acotada (al llenarse o vencer: 429 + Retry-After)
+    INGEST_MAX_CONNECTIONS: int = int(os.getenv("INGEST_MAX_CONNECTIONS", "10"))
+    INGEST_MAX_PER_TABLE: int = int(os.getenv("INGEST_MAX_PER_TABLE", "2"))
+    INGEST_ADMISSION_QUEUE: int = int(os.getenv("INGEST_ADMISSION_QUEUE", "16"))
+    INGEST_ADMISSION_TIMEOUT: float = float(os.getenv("INGEST_ADMISSION_TIMEOUT", "30"))
+    # FKs de hired_employees validadas en memoria antes de escribir:
+    # "reject" descarta la fila, "null" deja la FK en NULL
+    FK_POLICY: str = os.getenv("FK_POLICY", "reject")
+    FK_INDEX_TTL_SECONDS: int = int(os.getenv("FK_INDEX_TTL_SECONDS", "300"))
+
+    # Ids repetidos dentro de un archivo de hired_employees: se conserva la
+    # primera ("first") o la última ("last") aparición, o se rechazan todas ("reject")
+    DEDUP_KEEP: str = os.getenv("DEDUP_KEEP", "first")
+
+    # Año de las métricas cuando el request no indica year ni from/to
+    METRICS_DEFAULT_YEAR: int = int(os.getenv("METRICS_DEFAULT_YEAR", "2021"))
+    # Caché de respuestas de métricas: se invalida con cada carga y, como
+    # respaldo para cargas hechas por otros procesos, vence por TTL
+    METRICS_CACHE_SIZE: int = int(os.getenv("METRICS_CACHE_SIZE", "256"))
+    METRICS_CACHE_TTL_SECONDS: int = int(os.getenv("METRICS_CACHE_TTL_SECONDS", "60"))
+    # Filas por bloque del cursor de servidor en las salidas por streaming (NDJSON/CSV/Arrow)
+    METRICS_STREAM_BATCH_SIZE: int = int(os.getenv("METRICS_STREAM_BATCH_SIZE", "1000"))
+
+    # Ledger de archivos cargados: re-envíos idénticos devuelven el resumen
+    # guardado y las cargas interrumpidas se retoman desde el último lote
+    UPLOAD_LEDGER: bool = os.getenv("UPLOAD_LEDGER", "true").lower() == "true"
+    # Una carga "in_progress" sin commits en este tiempo se considera abandonada
+    UPLOAD_LEDGER_LEASE_SECONDS: int = int(os.getenv("UPLOAD_LEDGER_LEASE_SECONDS", "300"))
+    # Modo de carga: "orm" (add_all por lote), "copy" (COPY FROM STDIN),
+    # "staging" (tabla temporal + validación en SQL) o "parallel"
+    # (particiones por rango de id escritas en varias conexiones)
+    LOAD_MODE: str = os.getenv("LOAD_MODE", "orm")
+    # Modo parallel: particiones/conexiones simultáneas (<= pool_size + max_overflow - 1)
+    # y two-phase commit (requiere max_prepared_transactions > 0 en Postgres;
+    # sin two-phase load_mode=parallel se rechaza con 400)
+    PARALLEL_WRITE_WORKERS: int = int(os.getenv("PARALLEL_WRITE_WORKERS", "4"))
+    PARALLEL_TWO_PHASE: bool = os.getenv("PARALLEL_TWO_PHASE", "true").lower() == "true"
     
     def __init__(self):
         """Validar configuración crítica al inicializar"""
@@ -51,11 +124,16 @@ class Config:
         """Construir URL de conexión a la base de datos"""
         try:
             encoded_password = quote_plus(self.DB_PASSWORD)
-            return f"postgresql://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+            return f"postgresql+psycopg2://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         except Exception as e:
             logger.error(f"Error building DATABASE_URL: {str(e)}")
             raise
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """URL de conexión para el engine async (asyncpg)"""
+        return self.DATABASE_URL.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+
 @lru_cache()
 def get_config() -> Config:
     """
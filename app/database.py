@@ -2,6 +2,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from fastapi import HTTPException
 import logging
 
@@ -13,15 +14,33 @@ config = get_config()
 # Crear engine con pooling
 engine = create_engine(
     config.DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine async (asyncpg) para consultas que no deben bloquear el event loop.
+# Su pool es independiente del de las cargas: las métricas no compiten por
+# conexiones con los uploads
+async_engine = create_async_engine(
+    config.ASYNC_DATABASE_URL,
+    pool_size=config.READ_POOL_SIZE,
+    max_overflow=config.READ_MAX_OVERFLOW,
+    pool_timeout=config.READ_POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # ✅ 🔥 FIX: get_db() sin `@contextmanager`
 def get_db():
     db = SessionLocal()
@@ -34,10 +53,40 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependencia FastAPI con una AsyncSession sobre asyncpg"""
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(text("SELECT 1"))  # Verificar conexión
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Database connection error: {str(e)}")
+            raise HTTPException(status_code=503, detail="Database connection error")
+
+def upgrade_upload_ledger(connection) -> None:
+    """Agregar load_options a la clave de un upload_ledger creado antes de esa columna"""
+    exists = connection.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'upload_ledger' AND column_name = 'load_options'"
+    )).first()
+    if exists:
+        return
+    connection.execute(text("ALTER TABLE upload_ledger ADD COLUMN load_options VARCHAR NOT NULL DEFAULT ''"))
+    connection.execute(text("ALTER TABLE upload_ledger DROP CONSTRAINT IF EXISTS uq_upload_ledger_content"))
+    connection.execute(text(
+        "ALTER TABLE upload_ledger ADD CONSTRAINT uq_upload_ledger_content "
+        "UNIQUE (table_name, content_hash, update_existing, load_options)"
+    ))
+    logger.info("upload_ledger migrado: load_options agregado a la clave")
+
 def init_db() -> None:
     """Inicializar base de datos creando tablas"""
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all solo crea tablas que faltan: las bases creadas antes de
+        # un cambio de esquema se migran aquí, de forma explícita e idempotente
+        with engine.begin() as connection:
+            upgrade_upload_ledger(connection)
         logger.info("Database initialized successfully")
     except SQLAlchemyError as e:
         logger.error(f"Error initializing database: {str(e)}")
@@ -1,7 +1,10 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
-from app.routes import employees, departments, jobs, metrics
+from app.database import init_db, reset_db, async_engine
+from app.routes import employees, departments, jobs, dataset, metrics, rejects, ingest_jobs
+from app.services.ingest_jobs import ingest_job_manager
+from app.services.metrics_cache import metrics_cache
+from app.utils.executors import shutdown_executors
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,6 +43,21 @@ app.include_router(
     prefix="/api/v1",
     tags=["jobs"]
 )
+app.include_router(
+    dataset.router,
+    prefix="/api/v1",
+    tags=["dataset"]
+)
+app.include_router(
+    rejects.router,
+    prefix="/api/v1",
+    tags=["rejects"]
+)
+app.include_router(
+    ingest_jobs.router,
+    prefix="/api/v1",
+    tags=["ingest-jobs"]
+)
 app.include_router(
     metrics.router,
     prefix="/api/v1/metrics",
@@ -56,6 +74,13 @@ async def startup_event():
         logger.error(f"Startup error: {str(e)}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detener los pools de trabajo y cerrar conexiones async"""
+    ingest_job_manager.shutdown()
+    shutdown_executors()
+    await async_engine.dispose()
+
 @app.get("/api/health")
 async def health_check():
     """Endpoint para health check"""
@@ -66,6 +91,7 @@ async def reset_database():
     """Endpoint para reset manual de DB"""
     try:
         reset_db()
+        metrics_cache.invalidate()
         return {"message": "Database reset successfully"}
     except Exception as e:
         logger.error(f"Reset error: {str(e)}")
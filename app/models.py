@@ -1,5 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy import (
+    Column, Integer, BigInteger, SmallInteger, String, Boolean, Text, DateTime, ForeignKey, Index,
+    UniqueConstraint, event, text
+)
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from .database import Base
 
@@ -63,4 +67,147 @@ class Job(Base):
         "HiredEmployee", 
         back_populates="job",
         cascade="all, delete-orphan"
-    )
\ No newline at end of file
+    )
+
+class IngestReject(Base):
+    """Modelo para filas rechazadas durante la carga por staging"""
+    __tablename__ = "ingest_rejects"
+
+    id = Column(Integer, primary_key=True)
+    load_id = Column(String, nullable=False, index=True)
+    table_name = Column(String, nullable=False, index=True)
+    row_number = Column(Integer, nullable=False)
+    record_id = Column(String, nullable=True)
+    reason = Column(String, nullable=False, index=True)
+    raw_data = Column(JSONB, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class UploadLedgerEntry(Base):
+    """Modelo para el registro de archivos cargados (idempotencia y reanudación)"""
+    __tablename__ = "upload_ledger"
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    update_existing = Column(Boolean, nullable=False, default=False)
+    # Políticas efectivas de la carga (keep, fk_policy, load_mode): otro juego
+    # de políticas es otra carga, no un reenvío ni una reanudación
+    load_options = Column(String, nullable=False, default="", server_default="")
+    file_format = Column(String, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=True)
+    committed_offset = Column(BigInteger, nullable=False, default=0)
+    status = Column(String, nullable=False, index=True)
+    summary = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint(
+            'table_name', 'content_hash', 'update_existing', 'load_options', name='uq_upload_ledger_content'
+        ),
+    )
+
+class HiringAggregate(Base):
+    """
+    Contrataciones por (department_id, job_id, year, quarter), mantenida por
+    triggers sobre hired_employees en la misma transacción de cada escritura.
+
+    Cada sentencia agrega filas delta (+/- contrataciones) en lugar de
+    actualizar un contador, así las cargas concurrentes (o las particiones
+    del modo parallel) no se bloquean entre sí por las mismas filas; una
+    clave puede tener varias filas hasta que se compacta, y las consultas
+    siempre suman por clave.
+    """
+    __tablename__ = "hiring_aggregates"
+
+    id = Column(BigInteger, primary_key=True)
+    department_id = Column(Integer, nullable=True)
+    job_id = Column(Integer, nullable=True)
+    year = Column(SmallInteger, nullable=False)
+    quarter = Column(SmallInteger, nullable=False)
+    hired = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_hiring_aggregates_key', 'year', 'department_id', 'job_id', 'quarter'),
+    )
+
+# Triggers por sentencia con tablas de transición: una fila delta por clave
+# afectada, sin importar cuántas filas escriba la sentencia (ORM, COPY, upsert)
+HIRING_AGGREGATES_FUNCTION = """
+CREATE OR REPLACE FUNCTION hiring_aggregates_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM hiring_aggregates;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO hiring_aggregates (department_id, job_id, year, quarter, hired)
+        SELECT department_id, job_id,
+               EXTRACT(YEAR FROM datetime)::smallint, EXTRACT(QUARTER FROM datetime)::smallint,
+               COUNT(*)
+        FROM new_rows
+        WHERE datetime IS NOT NULL
+        GROUP BY 1, 2, 3, 4;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO hiring_aggregates (department_id, job_id, year, quarter, hired)
+        SELECT department_id, job_id,
+               EXTRACT(YEAR FROM datetime)::smallint, EXTRACT(QUARTER FROM datetime)::smallint,
+               -COUNT(*)
+        FROM old_rows
+        WHERE datetime IS NOT NULL
+        GROUP BY 1, 2, 3, 4;
+    ELSE
+        -- UPDATE: se suma la fila nueva y se resta la vieja; las que no
+        -- cambiaron de clave se cancelan y no generan delta
+        INSERT INTO hiring_aggregates (department_id, job_id, year, quarter, hired)
+        SELECT department_id, job_id,
+               EXTRACT(YEAR FROM datetime)::smallint, EXTRACT(QUARTER FROM datetime)::smallint,
+               SUM(delta)
+        FROM (
+            SELECT department_id, job_id, datetime, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT department_id, job_id, datetime, -1 AS delta FROM old_rows
+        ) AS changes
+        WHERE datetime IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+HIRING_AGGREGATES_TRIGGERS = {
+    "hiring_aggregates_insert": "AFTER INSERT ON hired_employees REFERENCING NEW TABLE AS new_rows",
+    "hiring_aggregates_update": "AFTER UPDATE ON hired_employees REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "hiring_aggregates_delete": "AFTER DELETE ON hired_employees REFERENCING OLD TABLE AS old_rows",
+    "hiring_aggregates_truncate": "AFTER TRUNCATE ON hired_employees",
+}
+
+HIRING_AGGREGATES_BACKFILL = """
+    INSERT INTO hiring_aggregates (department_id, job_id, year, quarter, hired)
+    SELECT department_id, job_id,
+           EXTRACT(YEAR FROM datetime)::smallint, EXTRACT(QUARTER FROM datetime)::smallint,
+           COUNT(*)
+    FROM hired_employees
+    WHERE datetime IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+@event.listens_for(Base.metadata, "after_create")
+def install_hiring_aggregates(target, connection, tables=(), **kw) -> None:
+    """
+    (Re)instalar los triggers en cada create_all (idempotente) y, si la
+    tabla de agregados se acaba de crear, poblarla con los datos existentes.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text(HIRING_AGGREGATES_FUNCTION))
+    for name, timing in HIRING_AGGREGATES_TRIGGERS.items():
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name} ON hired_employees"))
+        connection.execute(text(
+            f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION hiring_aggregates_apply()"
+        ))
+    if any(table.name == HiringAggregate.__tablename__ for table in tables):
+        connection.execute(text(HIRING_AGGREGATES_BACKFILL))
@@ -2,10 +2,16 @@ from fastapi import APIRouter
 from .employees import router as employees_router
 from .departments import router as departments_router
 from .jobs import router as jobs_router
+from .dataset import router as dataset_router
 from .metrics import router as metrics_router
+from .rejects import router as rejects_router
+from .ingest_jobs import router as ingest_jobs_router
 
 router = APIRouter()
 router.include_router(employees_router, prefix="/employees", tags=["employees"])
 router.include_router(departments_router, prefix="/departments", tags=["departments"])
 router.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
+router.include_router(dataset_router, tags=["dataset"])
+router.include_router(rejects_router, tags=["rejects"])
+router.include_router(ingest_jobs_router, tags=["ingest-jobs"])
 router.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
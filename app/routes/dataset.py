@@ -0,0 +1,54 @@
+from fastapi import APIRouter, UploadFile, File, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..services.dataset_service import DatasetService, DATASET_TABLES
+from ..services.admission import ingest_scheduler
+from ..utils.executors import run_io
+
+router = APIRouter(tags=["dataset"])
+
+@router.post("/upload/dataset")
+async def upload_dataset(
+    departments: Optional[UploadFile] = File(None),
+    jobs: Optional[UploadFile] = File(None),
+    hired_employees: Optional[UploadFile] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    update_existing: bool = False,
+    load_mode: Optional[str] = None,
+    stream: Optional[bool] = None,
+    fk_policy: Optional[str] = None,
+    keep: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Cargar el dataset completo (departments, jobs y hired_employees) de forma atómica
+    
+    Args:
+        departments: Archivo de departamentos (CSV, Parquet o Arrow IPC)
+        jobs: Archivo de puestos de trabajo
+        hired_employees: Archivo de empleados
+        archive: Alternativa a los tres archivos: un zip con departments.*, jobs.* y hired_employees.*
+        update_existing: Si actualizar empleados existentes
+        load_mode: "orm", "copy" o "staging" (por defecto Config.LOAD_MODE)
+        stream: Parsear los empleados por bloques (por defecto Config.STREAM_UPLOADS)
+        fk_policy: "reject" o "null" para FKs desconocidas (por defecto Config.FK_POLICY)
+        keep: "first", "last" o "reject" para ids repetidos en cada archivo (por defecto Config.DEDUP_KEEP)
+        db: Sesión de base de datos
+        
+    Returns:
+        dict: Resumen por tabla; si alguna tabla falla no se confirma ninguna
+    """
+    dataset_service = DatasetService()
+    # Control de admisión: espera en cola acotada o 429 con Retry-After. Además
+    # del lugar "dataset" ocupa uno en cada tabla que escribe, con los mismos
+    # límites por tabla que /upload/*
+    async with ingest_scheduler.admit(("dataset", *DATASET_TABLES)):
+        if archive is not None:
+            # Descomprimir es I/O y CPU: en el pool, para no bloquear el event loop
+            files = await run_io(dataset_service.extract_archive, archive, bool(stream))
+        else:
+            files = {"departments": departments, "jobs": jobs, "hired_employees": hired_employees}
+        return await dataset_service.process_upload(
+            files, db, update_existing, load_mode, stream, fk_policy, keep
+        )
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Depends
 from sqlalchemy.orm import Session
+from typing import Optional
 import logging
 from ..database import get_db
 from ..services.employee_service import EmployeeService
+from ..services.ingest_jobs import ingest_job_manager
+from ..services.admission import ingest_scheduler
+from ..config import get_config
+from .ingest_jobs import job_accepted_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["employees"])
@@ -11,18 +16,54 @@ router = APIRouter(tags=["employees"])
 async def upload_hired_employees(
     file: UploadFile = File(...),
     update_existing: bool = False,
+    load_mode: Optional[str] = None,
+    stream: Optional[bool] = None,
+    background: bool = False,
+    parallel_parse: Optional[bool] = None,
+    force: bool = False,
+    fk_policy: Optional[str] = None,
+    keep: Optional[str] = None,
+    diagnostics: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
     Cargar empleados desde CSV
     
     Args:
-        file: Archivo CSV con datos de empleados
+        file: Archivo CSV, Parquet o Arrow IPC con datos de empleados
         update_existing: Si actualizar registros existentes
+        load_mode: "orm", "copy", "staging" o "parallel" (por defecto Config.LOAD_MODE).
+            "parallel" confirma con two-phase commit y sin él se rechaza
+            (Config.PARALLEL_TWO_PHASE y max_prepared_transactions > 0)
+        stream: Parsear por bloques con memoria acotada (por defecto Config.STREAM_UPLOADS)
+        background: Encolar la carga y devolver un job_id (202) inmediatamente
+        parallel_parse: Parsear bloques en el pool de procesos (por defecto Config.PARALLEL_PARSE)
+        force: Reprocesar desde el inicio aunque el mismo archivo ya se haya cargado
+        fk_policy: "reject" o "null" para FKs desconocidas (por defecto Config.FK_POLICY)
+        keep: "first", "last" o "reject" para ids repetidos en el archivo (por defecto Config.DEDUP_KEEP)
+        diagnostics: Agregar tiempos por etapa, memoria y round trips al resumen (por defecto Config.INGEST_DIAGNOSTICS)
         db: Sesión de base de datos
         
     Returns:
         dict: Resumen del proceso
     """
     employee_service = EmployeeService()
-    return await employee_service.process_upload(file, update_existing, db)
\ No newline at end of file
+    weight = ingest_scheduler.weight(load_mode or get_config().LOAD_MODE)
+    if background:
+        job = await ingest_job_manager.submit(
+            "hired_employees",
+            file,
+            lambda upload, session, job: employee_service.process_upload(
+                upload, update_existing, session, load_mode, stream,
+                progress=job, parallel_parse=parallel_parse, force=force,
+                fk_policy=fk_policy, keep=keep, diagnostics=diagnostics
+            ),
+            weight
+        )
+        return job_accepted_response(job)
+    # Control de admisión: espera en cola acotada o 429 con Retry-After
+    async with ingest_scheduler.admit("hired_employees", weight):
+        return await employee_service.process_upload(
+            file, update_existing, db, load_mode, stream, parallel_parse=parallel_parse, force=force,
+            fk_policy=fk_policy, keep=keep, diagnostics=diagnostics
+        )
\ No newline at end of file
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from ..config import get_config
+from ..services.ingest_jobs import ingest_job_manager, IngestJob
+from ..services.admission import ingest_scheduler
+
+router = APIRouter(tags=["ingest-jobs"])
+
+def job_accepted_response(job: IngestJob) -> JSONResponse:
+    """Respuesta 202 para una carga encolada en segundo plano"""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "Upload accepted for background processing",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"{get_config().API_V1_STR}/ingest-jobs/{job.id}"
+        }
+    )
+
+@router.get("/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Consultar estado y progreso de una carga en segundo plano
+
+    Args:
+        job_id: ID devuelto por el endpoint de upload con background=true
+
+    Returns:
+        dict: Estado, progreso (filas parseadas/escritas, filas/seg, errores)
+              y el resumen final cuando la carga termina
+    """
+    job = ingest_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return job.to_dict()
+
+@router.get("/ingest-admission")
+async def get_ingest_admission():
+    """
+    Estado del control de admisión de cargas
+
+    Returns:
+        dict: Conexiones de escritura en uso, cargas activas por tabla y cola de espera
+    """
+    return ingest_scheduler.stats()
@@ -1,24 +1,50 @@
 from fastapi import APIRouter, UploadFile, File, Depends
 from sqlalchemy.orm import Session
+from typing import Optional
 from ..database import get_db
 from ..services.job_service import JobService
+from ..services.ingest_jobs import ingest_job_manager
+from ..services.admission import ingest_scheduler
+from .ingest_jobs import job_accepted_response
 
 router = APIRouter(tags=["jobs"])
 
 @router.post("/upload/jobs")
 async def upload_jobs(
     file: UploadFile = File(...),
+    load_mode: Optional[str] = None,
+    background: bool = False,
+    force: bool = False,
+    keep: Optional[str] = None,
+    diagnostics: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
     Cargar trabajos desde CSV
     
     Args:
-        file: Archivo CSV con datos de trabajos
+        file: Archivo CSV, Parquet o Arrow IPC con datos de trabajos
+        load_mode: "orm" o "staging" para validar en SQL (por defecto Config.LOAD_MODE si es
+            uno de ellos, si no orm); copy y parallel no aplican a las dimensiones (400)
+        background: Encolar la carga y devolver un job_id (202) inmediatamente
+        force: Reprocesar aunque el mismo archivo ya se haya cargado
+        keep: "first", "last" o "reject" para ids repetidos en el archivo (sin keep, un id repetido es un error)
+        diagnostics: Agregar tiempos por etapa, memoria y round trips al resumen (por defecto Config.INGEST_DIAGNOSTICS)
         db: Sesión de base de datos
         
     Returns:
         dict: Resumen del proceso
     """
     job_service = JobService()
-    return await job_service.process_upload(file, db)
\ No newline at end of file
+    # Modo inválido: 400 antes de encolar, también con background
+    load_mode = job_service.resolve_load_mode(load_mode)
+    if background:
+        job = await ingest_job_manager.submit(
+            "jobs",
+            file,
+            lambda upload, session, job: job_service.process_upload(upload, session, load_mode, progress=job, force=force, keep=keep, diagnostics=diagnostics)
+        )
+        return job_accepted_response(job)
+    # Control de admisión: espera en cola acotada o 429 con Retry-After
+    async with ingest_scheduler.admit("jobs"):
+        return await job_service.process_upload(file, db, load_mode, force=force, keep=keep, diagnostics=diagnostics)
\ No newline at end of file
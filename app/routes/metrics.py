@@ -1,18 +1,142 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from ..database import get_async_db
 from ..services.metrics_service import MetricsService
+from ..services.metrics_cache import metrics_cache
+from ..utils.validators import validate_date_range, validate_cube
+from ..utils.streaming import Columns, negotiate_stream_format, encode_stream
+from ..config import get_config
 
 router = APIRouter(tags=["metrics"])
 
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contiene el ETag (comparación débil, como pide RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+async def cached_metrics(
+    request: Request,
+    key: Hashable,
+    compute: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Response:
+    """
+    Responder desde la caché de métricas (sin SQL ni serialización) o
+    calcular y guardar la respuesta. Con If-None-Match igual al ETag vigente
+    se responde 304 sin cuerpo.
+    """
+    entry = metrics_cache.get(key)
+    if entry is None:
+        version = metrics_cache.version
+        body = JSONResponse(jsonable_encoder(await compute())).body
+        entry = metrics_cache.put(key, version, body)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+async def streamed_metrics(
+    request: Request,
+    db: AsyncSession,
+    query: str,
+    params: Dict[str, Any],
+    columns: Columns
+) -> Optional[Response]:
+    """
+    Si Accept pide NDJSON, CSV o Arrow, responder por streaming desde un
+    cursor de servidor: la memoria no depende del tamaño del resultado.
+    Estas salidas no pasan por la caché. None si corresponde la respuesta JSON.
+    """
+    negotiated = negotiate_stream_format(request.headers.get("accept"))
+    if negotiated is None:
+        return None
+    output, media_type = negotiated
+    batches = await MetricsService().open_stream(db, query, params, get_config().METRICS_STREAM_BATCH_SIZE)
+    return StreamingResponse(
+        encode_stream(output, columns, batches),
+        media_type=media_type,
+        headers={"Vary": "Accept"}
+    )
+
 @router.get("/quarterly-hiring")
-async def get_quarterly_hiring(db: Session = Depends(get_db)):
+async def get_quarterly_hiring(
+    request: Request,
+    year: Optional[int] = Query(None, description="Año completo (por defecto Config.METRICS_DEFAULT_YEAR)"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inicio del período, inclusive"),
+    end: Optional[datetime] = Query(None, alias="to", description="Fin del período, exclusive"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Obtener métricas trimestrales de contratación"""
+    start, end = validate_date_range(year, start, end)
     metrics_service = MetricsService()
-    return await metrics_service.get_quarterly_hiring(db)
+    query, params = metrics_service.build_query(metrics_service.QUARTERLY_HIRING_QUERY, start, end)
+    streamed = await streamed_metrics(request, db, query, params, metrics_service.QUARTERLY_HIRING_COLUMNS)
+    if streamed is not None:
+        return streamed
+    return await cached_metrics(
+        request,
+        ("quarterly-hiring", start, end),
+        lambda: metrics_service.get_quarterly_hiring(db, start, end)
+    )
 
 @router.get("/departments-above-mean")
-async def get_departments_above_mean(db: Session = Depends(get_db)):
+async def get_departments_above_mean(
+    request: Request,
+    year: Optional[int] = Query(None, description="Año completo (por defecto Config.METRICS_DEFAULT_YEAR)"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inicio del período, inclusive"),
+    end: Optional[datetime] = Query(None, alias="to", description="Fin del período, exclusive"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Obtener departamentos sobre la media de contratación"""
+    start, end = validate_date_range(year, start, end)
+    metrics_service = MetricsService()
+    query, params = metrics_service.build_query(metrics_service.DEPARTMENTS_ABOVE_MEAN_QUERY, start, end)
+    streamed = await streamed_metrics(request, db, query, params, metrics_service.DEPARTMENTS_ABOVE_MEAN_COLUMNS)
+    if streamed is not None:
+        return streamed
+    return await cached_metrics(
+        request,
+        ("departments-above-mean", start, end),
+        lambda: metrics_service.get_departments_above_mean(db, start, end)
+    )
+
+@router.get("/hiring-cube")
+async def get_hiring_cube(
+    request: Request,
+    group_by: Optional[str] = Query(None, description="Dimensiones separadas por comas: department, job, year, quarter, month"),
+    subtotals: Optional[str] = Query(None, description="rollup o cube"),
+    year: Optional[int] = Query(None, description="Año completo"),
+    start: Optional[datetime] = Query(None, alias="from", description="Inicio del período, inclusive"),
+    end: Optional[datetime] = Query(None, alias="to", description="Fin del período, exclusive"),
+    department_id: Optional[List[int]] = Query(None, description="Filtrar por departamentos"),
+    job_id: Optional[List[int]] = Query(None, description="Filtrar por puestos"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Contrataciones agrupadas por las dimensiones pedidas, con subtotales
+    opcionales. Sin year ni from/to abarca todos los años.
+    """
+    dimensions, subtotals = validate_cube(group_by, subtotals)
+    if year is not None or start is not None or end is not None:
+        start, end = validate_date_range(year, start, end)
+    department_ids = sorted(set(department_id or [])) or None
+    job_ids = sorted(set(job_id or [])) or None
     metrics_service = MetricsService()
-    return await metrics_service.get_departments_above_mean(db)
\ No newline at end of file
+    query, params, columns, _ = metrics_service.build_cube_query(
+        dimensions, subtotals, start, end, department_ids, job_ids
+    )
+    streamed = await streamed_metrics(request, db, query, params, columns)
+    if streamed is not None:
+        return streamed
+    return await cached_metrics(
+        request,
+        ("hiring-cube", tuple(dimensions), subtotals, start, end,
+         tuple(department_ids or ()), tuple(job_ids or ())),
+        lambda: metrics_service.get_hiring_cube(db, dimensions, subtotals, start, end, department_ids, job_ids)
+    )
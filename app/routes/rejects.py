@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..models import IngestReject
+
+router = APIRouter(tags=["rejects"])
+
+@router.get("/rejects")
+async def get_rejects(
+    table_name: Optional[str] = None,
+    load_id: Optional[str] = None,
+    reason: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    Consultar filas rechazadas por las cargas en modo staging
+
+    Args:
+        table_name: Filtrar por tabla destino
+        load_id: Filtrar por carga (devuelto en el resumen del upload)
+        reason: Filtrar por motivo de rechazo
+        skip: Offset de paginación
+        limit: Máximo de filas a devolver
+        db: Sesión de base de datos
+
+    Returns:
+        dict: Filas rechazadas con su motivo
+    """
+    query = db.query(IngestReject)
+    if table_name:
+        query = query.filter(IngestReject.table_name == table_name)
+    if load_id:
+        query = query.filter(IngestReject.load_id == load_id)
+    if reason:
+        query = query.filter(IngestReject.reason == reason)
+    rejects = query.order_by(IngestReject.id).offset(skip).limit(limit).all()
+
+    return {
+        "headers": ["load_id", "table_name", "row_number", "record_id", "reason", "raw_data"],
+        "rows": [
+            {
+                "load_id": reject.load_id,
+                "table_name": reject.table_name,
+                "row_number": reject.row_number,
+                "record_id": reject.record_id,
+                "reason": reject.reason,
+                "raw_data": reject.raw_data
+            }
+            for reject in rejects
+        ]
+    }
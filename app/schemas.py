@@ -1,25 +1,28 @@
 from pydantic import BaseModel, validator, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime as DateTime
+from .utils.rules import EMPLOYEE_RULES
 
 class EmployeeBase(BaseModel):
     """Esquema base para empleados"""
     name: Optional[str] = None
-    datetime: Optional[datetime] = None
+    # El campo se llama como el tipo: se usa el alias para no sombrearlo
+    datetime: Optional[DateTime] = None
     department_id: Optional[int] = None
     job_id: Optional[int] = None
     
-    @validator('department_id', 'job_id')
-    def validate_ids(cls, v):
-        if v is not None and v <= 0:
-            raise ValueError("ID must be positive")
-        return v
+    # Mismas reglas que aplica la carga masiva (app/utils/rules.py)
+    @validator('department_id')
+    def validate_department_id(cls, v):
+        return EMPLOYEE_RULES.check_value('department_id', v)
+
+    @validator('job_id')
+    def validate_job_id(cls, v):
+        return EMPLOYEE_RULES.check_value('job_id', v)
     
     @validator('datetime')
     def validate_datetime(cls, v):
-        if v is not None and v > datetime.now():
-            raise ValueError("Datetime cannot be in the future")
-        return v
+        return EMPLOYEE_RULES.check_value('datetime', v)
 
 class EmployeeCreate(EmployeeBase):
     """Esquema para crear empleados"""
@@ -1,5 +1,7 @@
 from .base import BaseService
 from .employee_service import EmployeeService
+from .dimension_service import DimensionService
 from .department_service import DepartmentService
 from .job_service import JobService
+from .dataset_service import DatasetService
 from .metrics_service import MetricsService
\ No newline at end of file
@@ -0,0 +1,175 @@
+from fastapi import HTTPException
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple, Union
+import asyncio
+import logging
+import math
+import threading
+import time
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Una tabla, o varias que una misma carga escribe (se admiten juntas)
+Tables = Union[str, Tuple[str, ...]]
+
+def _table_keys(table: Tables) -> Tuple[str, ...]:
+    return (table,) if isinstance(table, str) else tuple(table)
+
+class IngestScheduler:
+    """
+    Control de admisión de cargas: limita las cargas simultáneas por tabla y
+    el total de conexiones del pool de escritura que pueden ocupar entre todas.
+
+    Cada carga pide un peso (conexiones que usará: 1, o 1 + PARALLEL_WRITE_WORKERS
+    en modo parallel). Si no hay lugar, espera en una cola FIFO acotada hasta
+    queue_timeout segundos; con la cola llena o vencida la espera se responde
+    429 con Retry-After estimado por la duración reciente de las cargas.
+    Las cargas en segundo plano esperan sin límite (ya están en su propia cola).
+    Una carga que escribe varias tablas pide todos sus lugares por tabla a la
+    vez (todo o nada), así no se saltea el límite ni retiene lugares a medias.
+    """
+
+    def __init__(self, max_connections: int, max_per_table: int, max_queued: int, queue_timeout: float):
+        self.max_connections = max(1, max_connections)
+        self.max_per_table = max(1, max_per_table)
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_use = 0
+        self.per_table: Dict[str, int] = {}
+        self.waiters: Deque[Tuple[Tables, int, Future]] = deque()
+        self.avg_seconds = 5.0
+        self._lock = threading.Lock()
+
+    def weight(self, load_mode: Optional[str] = None) -> int:
+        """Conexiones de escritura que ocupa una carga según su modo"""
+        if load_mode == "parallel":
+            return min(self.max_connections, 1 + get_config().PARALLEL_WRITE_WORKERS)
+        return 1
+
+    def _table_busy(self, table: Tables) -> bool:
+        return any(self.per_table.get(key, 0) >= self.max_per_table for key in _table_keys(table))
+
+    def _fits(self, table: Tables, weight: int) -> bool:
+        return self.in_use + weight <= self.max_connections and not self._table_busy(table)
+
+    def _grant(self, table: Tables, weight: int) -> None:
+        self.in_use += weight
+        for key in _table_keys(table):
+            self.per_table[key] = self.per_table.get(key, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Admitir en orden FIFO a los que esperan y ya entran (con el lock tomado)"""
+        for waiter in list(self.waiters):
+            table, weight, future = waiter
+            if future.cancelled():
+                self.waiters.remove(waiter)
+                continue
+            if self.in_use + weight > self.max_connections:
+                # No se adelanta a una carga más pesada que espera antes
+                break
+            if self._table_busy(table):
+                continue
+            self.waiters.remove(waiter)
+            if future.set_running_or_notify_cancel():
+                self._grant(table, weight)
+                future.set_result(time.monotonic())
+
+    def _request(self, table: Tables, weight: int, bounded: bool) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if not self.waiters and self._fits(table, weight):
+                self._grant(table, weight)
+                future.set_running_or_notify_cancel()
+                future.set_result(time.monotonic())
+                return future
+            if bounded and len(self.waiters) >= self.max_queued:
+                raise self._rejected(table)
+            self.waiters.append((table, weight, future))
+        return future
+
+    def _abandon(self, table: Tables, weight: int, future: Future) -> None:
+        """Salir de la cola; si justo se había admitido, liberar el lugar"""
+        with self._lock:
+            for waiter in list(self.waiters):
+                if waiter[2] is future:
+                    self.waiters.remove(waiter)
+            granted = future.done() and not future.cancelled()
+        if granted:
+            self.release(table, weight, future.result())
+
+    def release(self, table: Tables, weight: int, started: float) -> None:
+        with self._lock:
+            self.in_use -= weight
+            for key in _table_keys(table):
+                self.per_table[key] -= 1
+            # Media móvil de la duración de las cargas, para estimar Retry-After
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - started)
+            self._dispatch()
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que se libere un lugar para un nuevo pedido"""
+        return max(1, math.ceil(self.avg_seconds * (len(self.waiters) + 1) / self.max_connections))
+
+    def _rejected(self, table: Tables) -> HTTPException:
+        retry_after = self.retry_after()
+        logger.warning(f"Carga de {', '.join(_table_keys(table))} rechazada por admisión (Retry-After {retry_after}s)")
+        return HTTPException(
+            status_code=429,
+            detail="Too many concurrent uploads, try again later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    @asynccontextmanager
+    async def admit(self, table: Tables, weight: int = 1) -> AsyncIterator[None]:
+        """
+        Ocupar un lugar durante el bloque, esperando en la cola si hace falta.
+
+        Raises:
+            HTTPException: 429 con Retry-After si la cola está llena o la espera vence
+        """
+        future = self._request(table, weight, bounded=True)
+        if not future.done():
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._abandon(table, weight, future)
+                raise self._rejected(table)
+            except BaseException:
+                self._abandon(table, weight, future)
+                raise
+        started = future.result()
+        try:
+            yield
+        finally:
+            self.release(table, weight, started)
+
+    @contextmanager
+    def admit_blocking(self, table: Tables, weight: int = 1) -> Iterator[None]:
+        """Variante bloqueante y sin límite de espera, para los workers de carga en segundo plano"""
+        started = self._request(table, weight, bounded=False).result()
+        try:
+            yield
+        finally:
+            self.release(table, weight, started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_in_use": self.in_use,
+                "max_connections": self.max_connections,
+                "uploads_per_table": {table: count for table, count in self.per_table.items() if count},
+                "max_per_table": self.max_per_table,
+                "queued": len(self.waiters),
+                "max_queued": self.max_queued
+            }
+
+config = get_config()
+ingest_scheduler = IngestScheduler(
+    max_connections=config.INGEST_MAX_CONNECTIONS,
+    max_per_table=config.INGEST_MAX_PER_TABLE,
+    max_queued=config.INGEST_ADMISSION_QUEUE,
+    queue_timeout=config.INGEST_ADMISSION_TIMEOUT
+)
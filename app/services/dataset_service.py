@@ -0,0 +1,171 @@
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional, List
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from ..config import get_config
+from ..utils.validators import (
+    validate_file_size, validate_upload_format, validate_load_mode, validate_fk_policy,
+    validate_dedup_policy
+)
+from ..utils.readers import LimitedReader, UploadTooLargeError
+from ..utils.executors import run_io
+from .department_service import DepartmentService
+from .job_service import JobService
+from .employee_service import EmployeeService
+from .foreign_key_index import foreign_key_index
+from .hiring_aggregates import compact_hiring_aggregates
+from .metrics_cache import metrics_cache
+
+logger = logging.getLogger(__name__)
+
+# Tablas del dataset, en orden de carga (las dimensiones antes que la tabla de hechos)
+DATASET_TABLES = ("departments", "jobs", "hired_employees")
+# parallel escribe por conexiones propias: no puede compartir la transacción del dataset
+DATASET_LOAD_MODES = ("orm", "copy", "staging")
+
+class DatasetService:
+    """
+    Carga atómica del dataset completo (departments, jobs y hired_employees)
+    en un único request.
+
+    Los dos archivos de dimensiones se parsean en paralelo en el pool de I/O;
+    las escrituras van todas por una misma conexión y una única transacción:
+    los commits internos de cada servicio pasan a ser savepoints y el dataset
+    se confirma (o revierte) completo al final, así ninguna consulta ve una
+    carga parcial.
+    """
+
+    def __init__(self):
+        self.department_service = DepartmentService()
+        self.job_service = JobService()
+        self.employee_service = EmployeeService()
+
+    @staticmethod
+    def extract_archive(archive: UploadFile, stream: bool) -> Dict[str, UploadFile]:
+        """
+        Extraer de un zip los archivos del dataset, reconocidos por nombre
+        (departments.csv, jobs.parquet, hired_employees.csv, ...).
+        Cada miembro se copia a un archivo temporal respetando el límite de
+        tamaño de su tabla, sin descomprimir de más.
+        """
+        config = get_config()
+        try:
+            bundle = zipfile.ZipFile(archive.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Archive must be a valid zip file")
+
+        files: Dict[str, UploadFile] = {}
+        with bundle:
+            for member in bundle.infolist():
+                if member.is_dir():
+                    continue
+                name = os.path.basename(member.filename)
+                table = name.split(".", 1)[0].lower()
+                if table not in DATASET_TABLES:
+                    continue
+                if table in files:
+                    raise HTTPException(status_code=400, detail=f"Archive contains more than one {table} file")
+                max_size = config.MAX_UPLOAD_SIZE
+                if table == "hired_employees" and stream:
+                    max_size = config.MAX_STREAM_UPLOAD_SIZE
+                spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+                try:
+                    with bundle.open(member) as source:
+                        shutil.copyfileobj(LimitedReader(source, max_size), spooled)
+                except UploadTooLargeError as e:
+                    spooled.close()
+                    raise HTTPException(status_code=400, detail=f"{name}: {e}")
+                spooled.seek(0)
+                files[table] = UploadFile(file=spooled, filename=name)
+        return files
+
+    async def process_upload(
+        self,
+        files: Dict[str, Optional[UploadFile]],
+        db: Session,
+        update_existing: bool = False,
+        load_mode: Optional[str] = None,
+        stream: Optional[bool] = None,
+        fk_policy: Optional[str] = None,
+        keep: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Validar la petición, parsear las dimensiones en paralelo y cargar todo en una transacción"""
+        config = get_config()
+        missing = [table for table in DATASET_TABLES if files.get(table) is None]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing dataset files: {', '.join(missing)}")
+        mode = validate_load_mode(load_mode, allowed=DATASET_LOAD_MODES)
+        policy = validate_fk_policy(fk_policy)
+        keep = validate_dedup_policy(keep, default=config.DEDUP_KEEP)
+        formats = {table: await validate_upload_format(files[table]) for table in DATASET_TABLES}
+        for table in ("departments", "jobs"):
+            await validate_file_size(files[table])
+
+        started = time.perf_counter()
+        frames: List[Any] = [None, None]
+        if mode != "staging":
+            # Las dimensiones no dependen entre sí: se parsean a la vez
+            frames = await asyncio.gather(
+                run_io(self.department_service.read_frame, files["departments"], formats["departments"]),
+                run_io(self.job_service.read_frame, files["jobs"], formats["jobs"])
+            )
+        summary = await run_io(
+            self.load, files, formats, frames, db, mode, update_existing, stream, policy, keep
+        )
+        return {
+            "message": "Dataset loaded",
+            "summary": {**summary, "load_mode": mode, "elapsed_seconds": round(time.perf_counter() - started, 3)}
+        }
+
+    def load(
+        self,
+        files: Dict[str, UploadFile],
+        formats: Dict[str, str],
+        frames: List[Any],
+        db: Session,
+        mode: str,
+        update_existing: bool,
+        stream: Optional[bool],
+        fk_policy: str,
+        keep: str
+    ) -> Dict[str, Any]:
+        """Escribir dimensiones y luego hechos en una única transacción"""
+        # Sesión sobre la conexión (y transacción) del request: sus commits son savepoints
+        connection = db.connection()
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            summary = {
+                "departments": self.department_service.load_file(
+                    files["departments"], session, mode, file_format=formats["departments"],
+                    keep=keep, frame=frames[0]
+                )["summary"],
+                "jobs": self.job_service.load_file(
+                    files["jobs"], session, mode, file_format=formats["jobs"],
+                    keep=keep, frame=frames[1]
+                )["summary"],
+                "hired_employees": self.employee_service.load_file(
+                    files["hired_employees"], update_existing, session, mode, stream,
+                    file_format=formats["hired_employees"], fk_policy=fk_policy, keep=keep
+                )["summary"]
+            }
+            session.close()
+            db.commit()
+            logger.info(f"Dataset cargado en una transacción (modo {mode})")
+            compact_hiring_aggregates(db)
+            return summary
+        except Exception:
+            session.close()
+            db.rollback()
+            logger.error("Carga del dataset revertida")
+            raise
+        finally:
+            # El índice pudo cachear ids de la transacción: se recarga en el próximo uso
+            for table in ("departments", "jobs"):
+                foreign_key_index.invalidate(table)
+            metrics_cache.invalidate()
@@ -0,0 +1,259 @@
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import insert, text
+import pandas as pd
+import logging
+from typing import Dict, Any, Optional, Set, List
+from ..utils.validators import (
+    validate_file_size, validate_upload_format, validate_load_mode, validate_dedup_policy
+)
+from ..utils.readers import read_csv_chunks, read_columnar_chunks
+from ..utils.dedup import duplicate_mask, DuplicateStats
+from ..utils.diagnostics import IngestDiagnostics, stage
+from ..utils.executors import run_io
+from .staging_service import StagingLoader
+from .ingest_jobs import IngestJob
+from .upload_ledger import UploadLedger
+from .foreign_key_index import foreign_key_index
+from .metrics_cache import metrics_cache
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Modos de carga con efecto en las dimensiones (copy y parallel son de hired_employees)
+DIMENSION_LOAD_MODES = ("orm", "staging")
+
+# Nombre de cada formato de archivo en los mensajes de error
+FILE_FORMAT_LABELS = {"csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+
+class DimensionService:
+    """
+    Carga vectorizada para tablas dimensión (id, nombre): filtros de nulos y
+    duplicados con máscaras de DataFrame, consulta de existentes solo para los
+    ids del archivo y un único INSERT executemany.
+    """
+
+    def __init__(self, model, name_column: str):
+        self.model = model
+        self.table = model.__table__
+        self.name_column = name_column
+        self.columns = ["id", name_column]
+        self.staging_loader = StagingLoader(
+            self.table.name,
+            types={"id": "integer", name_column: "text"},
+            required=["id", name_column],
+            unique=[name_column]
+        )
+        self.ledger = UploadLedger(self.table.name, rows_key="total_procesados")
+
+    def staging_summary(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Adaptar las estadísticas del staging al resumen habitual"""
+        rejected = stats["rejected"]
+        duplicates = rejected.get("existing_id", 0) + rejected.get("duplicate_id", 0)
+        return {
+            "message": "Proceso completado",
+            "summary": {
+                "total_procesados": stats["total_rows"],
+                "insertados": stats["inserted"],
+                "duplicados": duplicates,
+                "errores": sum(rejected.values()) - duplicates,
+                "detalles_errores": stats["error_samples"],
+                "load_id": stats["load_id"]
+            }
+        }
+
+    def existing_ids(self, db: Session, ids: List[int]) -> Set[int]:
+        """IDs del archivo que ya existen en la tabla (WHERE id = ANY(:ids))"""
+        if not ids:
+            return set()
+        result = db.execute(
+            text(f"SELECT id FROM {self.table.name} WHERE id = ANY(:ids)"),
+            {"ids": ids}
+        )
+        return {row[0] for row in result}
+
+    @staticmethod
+    def resolve_load_mode(load_mode: Optional[str]) -> str:
+        """
+        Modo de carga de la dimensión. Un modo sin efecto aquí pedido en la
+        request es un 400; como default global (Config.LOAD_MODE) se usa orm.
+        """
+        default = get_config().LOAD_MODE.lower()
+        return validate_load_mode(
+            load_mode or (default if default in DIMENSION_LOAD_MODES else "orm"),
+            allowed=DIMENSION_LOAD_MODES
+        )
+
+    def read_frame(self, file: UploadFile, file_format: str = "csv") -> pd.DataFrame:
+        """Leer CSV sin headers (o Parquet/Arrow por nombre de columna)"""
+        try:
+            with stage("parse"):
+                dtype = {"id": "Int64", self.name_column: str}
+                if file_format == "csv":
+                    return next(read_csv_chunks(
+                        file.file,
+                        self.columns,
+                        dtype,
+                        parser=get_config().CSV_PARSER
+                    ))
+                return next(read_columnar_chunks(file.file, file_format, self.columns, dtype=dtype))
+        except HTTPException:
+            raise
+        except Exception as e:
+            label = FILE_FORMAT_LABELS.get(file_format, file_format)
+            logger.error(f"Error leyendo el archivo {label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Archivo {label} inválido")
+
+    async def process_upload(
+        self,
+        file: UploadFile,
+        db: Session,
+        load_mode: Optional[str] = None,
+        progress: Optional[IngestJob] = None,
+        force: bool = False,
+        keep: Optional[str] = None,
+        diagnostics: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Procesar archivo de la dimensión sin duplicar registros existentes"""
+        mode = self.resolve_load_mode(load_mode)
+        keep = validate_dedup_policy(keep)
+        await validate_file_size(file)
+        file_format = await validate_upload_format(file)
+        # Parseo y escritura en el pool de I/O para no bloquear el event loop
+        return await run_io(
+            self.ingest, file, db, mode, progress, file_format, force, keep, diagnostics
+        )
+
+    def ingest(
+        self,
+        file: UploadFile,
+        db: Session,
+        mode: str,
+        progress: Optional[IngestJob] = None,
+        file_format: str = "csv",
+        force: bool = False,
+        keep: Optional[str] = None,
+        diagnostics: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Pipeline síncrono de carga, registrado en el ledger de uploads"""
+        config = get_config()
+        include = config.INGEST_DIAGNOSTICS if diagnostics is None else diagnostics
+        try:
+            with IngestDiagnostics.track(self.table.name, db) as tracker:
+                if not config.UPLOAD_LEDGER:
+                    result = self.load_file(file, db, mode, progress, file_format, keep)
+                else:
+                    result = self.ledger.run(
+                        db, file, file_format, False, force,
+                        lambda entry: self.load_file(file, db, mode, progress, file_format, keep),
+                        options={"keep": keep, "load_mode": mode}
+                    )
+        finally:
+            # Aun fallida, la carga pudo confirmar lotes: las métricas cacheadas dejan de valer
+            metrics_cache.invalidate()
+        return tracker.report(result, "total_procesados", include)
+
+    def load_file(
+        self,
+        file: UploadFile,
+        db: Session,
+        mode: str,
+        progress: Optional[IngestJob] = None,
+        file_format: str = "csv",
+        keep: Optional[str] = None,
+        frame: Optional[pd.DataFrame] = None
+    ) -> Dict[str, Any]:
+        """
+        Lectura, filtrado vectorizado y escritura. Sin keep, un id repetido en
+        el archivo hace fallar la carga; con keep se resuelve según la política.
+        frame: archivo ya parseado con read_frame (se omite la lectura)
+        """
+        if mode == "staging" and file_format != "csv":
+            raise HTTPException(status_code=400, detail="Staging mode only supports CSV uploads")
+
+        try:
+            if mode == "staging":
+                with stage("write"):
+                    staged = self.staging_loader.load(file.file, db, keep=keep)
+                foreign_key_index.invalidate(self.table.name)
+                if progress:
+                    progress.add_parsed(staged["total_rows"])
+                    progress.add_written(staged["inserted"])
+                    progress.set_errors(sum(staged["rejected"].values()))
+                return self.staging_summary(staged)
+
+            df = frame if frame is not None else self.read_frame(file, file_format)
+
+            total_records = len(df)
+            logger.info(f"Procesando {total_records} registros de {self.table.name}")
+            if progress:
+                progress.add_parsed(total_records)
+
+            with stage("validate"):
+                # Registros incompletos
+                incomplete = df["id"].isna() | df[self.name_column].isna()
+                error_details = [
+                    f"Datos incompletos en registro: {record}"
+                    for record in df[incomplete].head(5).to_dict("records")
+                ]
+
+                valid = df[~incomplete]
+
+                # Ids repetidos dentro del archivo
+                in_file = DuplicateStats(keep) if keep else None
+                if keep:
+                    drop = duplicate_mask(valid["id"], keep)
+                    in_file.add(valid.loc[drop, "id"])
+                    valid = valid[~drop]
+                ids = valid["id"].astype("int64")
+                names = valid[self.name_column].str.strip()
+
+                # Duplicados contra la base: solo se consultan los ids del archivo
+                existing = self.existing_ids(db, ids.unique().tolist())
+                is_duplicate = ids.isin(existing)
+
+            with stage("transform"):
+                records = [
+                    {"id": row_id, self.name_column: name}
+                    for row_id, name in zip(ids[~is_duplicate].tolist(), names[~is_duplicate].tolist())
+                ]
+
+            # Un único INSERT executemany; commit solo si hay registros nuevos
+            with stage("write"):
+                if records:
+                    try:
+                        db.execute(insert(self.table), records)
+                        db.commit()
+                        foreign_key_index.invalidate(self.table.name)
+                    except IntegrityError as e:
+                        db.rollback()
+                        logger.error(f"Error de integridad en la base de datos: {e}")
+                        raise HTTPException(status_code=400, detail="Error de integridad en los datos")
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"Error en commit final: {e}")
+                        raise HTTPException(status_code=500, detail="Error guardando los datos")
+
+            errors = int(incomplete.sum())
+            if progress:
+                progress.add_written(len(records))
+                progress.set_errors(errors)
+
+            return {
+                "message": "Proceso completado",
+                "summary": {
+                    "total_procesados": total_records,
+                    "insertados": len(records),
+                    "duplicados": int(is_duplicate.sum()),
+                    "errores": errors,
+                    "detalles_errores": error_details,
+                    **({"duplicados_archivo": in_file.to_dict()} if in_file else {})
+                }
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error en el proceso: {e}")
+            raise HTTPException(status_code=500, detail=f"Error procesando archivo: {str(e)}")
@@ -1,33 +1,237 @@
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.orm import Session
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict, Any, Set
+import io
+from typing import Dict, Any, Optional, List, Tuple, Iterator, BinaryIO
+from ..config import get_config
 from ..models import HiredEmployee
-from ..utils.validators import validate_file_size, validate_csv_format
+from ..utils.readers import (
+    LimitedReader, UploadTooLargeError, read_csv_chunks, iter_line_blocks,
+    read_columnar_chunks, read_key_columns, file_size
+)
+from ..utils.dedup import duplicate_mask, DuplicateStats
+from ..utils.rules import EMPLOYEE_RULES, RuleViolations, ErrorLog
+from ..utils.diagnostics import (
+    IngestDiagnostics, TimedReader, current_diagnostics, stage, count_round_trip
+)
+from ..utils.executors import run_io, get_cpu_executor, cpu_workers, map_ordered
+from ..utils.validators import (
+    validate_upload_format, validate_load_mode, validate_fk_policy,
+    validate_dedup_policy
+)
+from .staging_service import StagingLoader
+from .partitioned_writer import PartitionedWriter, PartitionLoadError, PartitionCommitError
+from .upload_ledger import UploadLedger, LedgerEntry
+from .foreign_key_index import foreign_key_index
+from .ingest_jobs import IngestJob
+from .hiring_aggregates import compact_hiring_aggregates
+from .metrics_cache import metrics_cache
 
 logger = logging.getLogger(__name__)
 
+EMPLOYEE_COLUMNS = ["id", "name", "datetime", "department_id", "job_id"]
+EMPLOYEE_FOREIGN_KEYS = {"department_id": "departments", "job_id": "jobs"}
+EMPLOYEE_DTYPE = {
+    'id': 'Int64',
+    'name': str,
+    'department_id': 'Int64',
+    'job_id': 'Int64'
+}
+# Formato de timestamps del CSV; el parser pyarrow lo convierte al leer
+EMPLOYEE_TIMESTAMPS = {'datetime': '%Y-%m-%dT%H:%M:%SZ'}
+
+def parse_employee_block(block: bytes) -> Tuple[int, pd.DataFrame, int]:
+    """
+    Parsear y transformar un bloque de bytes del CSV.
+    Función de módulo para poder ejecutarse en el pool de procesos; usa
+    siempre pandas, el paralelismo lo dan los procesos.
+    """
+    df = next(read_csv_chunks(io.BytesIO(block), EMPLOYEE_COLUMNS, EMPLOYEE_DTYPE))
+    valid_records, invalid_rows = EmployeeService.prepare_chunk(df)
+    return len(df), valid_records, invalid_rows
+
 class EmployeeService:
+    COPY_SQL = """
+        COPY hired_employees (id, name, datetime, department_id, job_id)
+        FROM STDIN WITH (FORMAT csv)
+    """
+
     def __init__(self):
         self.BATCH_SIZE = 1000
-        self.columns = ["id", "name", "datetime", "department_id", "job_id"]
+        self.columns = EMPLOYEE_COLUMNS
+        self.dtype = EMPLOYEE_DTYPE
+        self.staging_loader = StagingLoader(
+            "hired_employees",
+            types={
+                "id": "integer",
+                "name": "text",
+                "datetime": "timestamp",
+                "department_id": "integer",
+                "job_id": "integer"
+            },
+            required=["id"],
+            foreign_keys=EMPLOYEE_FOREIGN_KEYS,
+            rules=EMPLOYEE_RULES
+        )
+        self.partitioned_writer = PartitionedWriter(
+            HiredEmployee.__table__, self.columns, self.BATCH_SIZE
+        )
+        self.ledger = UploadLedger("hired_employees", rows_key="total_rows")
+
+    def staging_summary(self, stats: Dict[str, Any], keep: str = "first") -> Dict[str, Any]:
+        """Adaptar las estadísticas del staging al resumen habitual"""
+        rejected = stats["rejected"]
+        invalid = rejected.get("null_id", 0) + rejected.get("invalid_id", 0)
+        null_counts = stats["null_counts"]
+        return {
+            "message": (
+                f"Processed {stats['total_rows']} rows: "
+                f"{stats['inserted'] + stats['updated']} successful, "
+                f"{sum(rejected.values())} rejected"
+            ),
+            "summary": {
+                "total_rows": stats["total_rows"],
+                "processed_successfully": stats["inserted"] + stats["updated"],
+                "inserted": stats["inserted"],
+                "updated": stats["updated"],
+                "rows_with_null_values": {
+                    'null_names': null_counts["name"],
+                    'null_datetimes': null_counts["datetime"],
+                    'null_departments': null_counts["department_id"],
+                    'null_jobs': null_counts["job_id"]
+                },
+                "invalid_records": invalid,
+                "duplicates": {"policy": keep, "count": rejected.get("duplicate_id", 0)},
+                "load_mode": "staging",
+                "load_id": stats["load_id"],
+                "rejected": rejected,
+                "errors": stats["error_samples"]
+            }
+        }
+
+    def copy_batch(
+        self,
+        batch_df: pd.DataFrame,
+        db: Session,
+        errors: list,
+        update_existing: bool,
+        counts: Optional[Dict[str, int]] = None
+    ) -> int:
+        """
+        Cargar un lote con COPY FROM STDIN sobre la conexión psycopg2 de la sesión.
+        Si el lote falla (ids existentes), se recurre a process_batch para
+        conservar el mismo detalle de errores. Devuelve las filas escritas.
+        """
+        if update_existing:
+            # COPY no soporta upserts
+            return self.process_batch(batch_df, db, errors, update_existing, counts)
+
+        if batch_df.empty:
+            return 0
+
+        buffer = io.StringIO()
+        batch_df[self.columns].to_csv(
+            buffer,
+            index=False,
+            header=False,
+            date_format='%Y-%m-%d %H:%M:%S'
+        )
+        buffer.seek(0)
+
+        try:
+            raw_connection = db.connection().connection
+            with raw_connection.cursor() as cursor:
+                cursor.copy_expert(self.COPY_SQL, buffer)
+            count_round_trip()
+            db.commit()
+            if counts is not None:
+                counts["inserted"] += len(batch_df)
+            logger.info(f"Copiados {len(batch_df)} empleados")
+            return len(batch_df)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error en COPY del batch, reintentando con ORM: {e}")
+            return self.process_batch(batch_df, db, errors, update_existing, counts)
+
+    def upsert_employees(self, employees: List[HiredEmployee], db: Session) -> Dict[int, bool]:
+        """
+        INSERT ... ON CONFLICT (id) DO UPDATE para un lote completo.
+
+        Returns:
+            dict: id -> True si se insertó, False si se actualizó
+        """
+        # Los ids llegan deduplicados; si se repitieran, gana la última aparición
+        rows = {
+            emp.id: {col: getattr(emp, col) for col in self.columns}
+            for emp in employees
+        }
+        stmt = pg_insert(HiredEmployee.__table__).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={col: stmt.excluded[col] for col in self.columns if col != "id"}
+        ).returning(
+            HiredEmployee.__table__.c.id,
+            literal_column("xmax = 0").label("inserted")
+        )
+        return {row.id: row.inserted for row in db.execute(stmt)}
+
+    def write_bisecting(
+        self,
+        employees: List[HiredEmployee],
+        db: Session,
+        errors: list,
+        update_existing: bool,
+        counts: Dict[str, int]
+    ) -> int:
+        """
+        Escribir un grupo dentro de un savepoint; si falla, partirlo en dos y
+        reintentar cada mitad. Encontrar K filas inválidas en N cuesta
+        O(K log N) round trips en lugar de N commits individuales.
+        Devuelve las filas escritas.
+        """
+        if not employees:
+            return 0
+        try:
+            with db.begin_nested():
+                if update_existing:
+                    outcome = self.upsert_employees(employees, db)
+                else:
+                    db.add_all(employees)
+                    db.flush()
+        except Exception as e:
+            if len(employees) == 1:
+                errors.append(f"Error with ID {employees[0].id}: {str(e)}")
+                return 0
+            half = len(employees) // 2
+            return (
+                self.write_bisecting(employees[:half], db, errors, update_existing, counts)
+                + self.write_bisecting(employees[half:], db, errors, update_existing, counts)
+            )
+
+        if update_existing:
+            self.tally_upserts(outcome, counts)
+        else:
+            counts["inserted"] += len(employees)
+        return len(employees)
 
-    async def process_batch(
+    def process_batch(
         self, 
         batch_df: pd.DataFrame, 
         db: Session, 
-        processed_ids: Set[int], 
         errors: list,
-        update_existing: bool
-    ) -> Set[int]:
-        batch_processed_ids = set()
+        update_existing: bool,
+        counts: Optional[Dict[str, int]] = None
+    ) -> int:
+        if counts is None:
+            counts = {"inserted": 0, "updated": 0}
+        written = 0
         employees = []
         
         for _, row in batch_df.iterrows():
-            if int(row['id']) in processed_ids:
-                continue
-                
             try:
                 employee = HiredEmployee(
                     id=int(row['id']),
@@ -44,122 +248,515 @@ class EmployeeService:
         if employees:
             try:
                 if update_existing:
-                    for emp in employees:
-                        db.merge(emp)
-                        db.commit()
-                        batch_processed_ids.add(emp.id)
+                    outcome = self.upsert_employees(employees, db)
+                    db.commit()
+                    self.tally_upserts(outcome, counts)
                 else:
                     db.add_all(employees)
                     db.commit()
-                    batch_processed_ids.update({emp.id for emp in employees})
+                    counts["inserted"] += len(employees)
+                written = len(employees)
                 logger.info(f"Procesados {len(employees)} empleados")
             except Exception as e:
                 db.rollback()
                 logger.error(f"Error en batch: {e}")
-                
-                # Intentar uno por uno
-                for emp in employees:
-                    try:
-                        if update_existing:
-                            db.merge(emp)
-                        else:
-                            db.add(emp)
-                        db.commit()
-                        batch_processed_ids.add(emp.id)
-                    except Exception as e:
-                        db.rollback()
-                        errors.append(f"Error with ID {emp.id}: {str(e)}")
-
-        return batch_processed_ids
+
+                # Aislar las filas con error por bisección, con savepoints y un único commit
+                half = len(employees) // 2
+                written = (
+                    self.write_bisecting(employees[:half], db, errors, update_existing, counts)
+                    + self.write_bisecting(employees[half:], db, errors, update_existing, counts)
+                )
+                db.commit()
+
+        return written
+
+    @staticmethod
+    def require_two_phase(db: Session) -> None:
+        """
+        load_mode=parallel exige two-phase commit. Sin él un fallo en la
+        barrera deja particiones (rangos de id) confirmadas, y el ledger,
+        que retoma por posición en el archivo, volvería a escribirlas desde
+        la fila 0 al reintentar.
+        """
+        if not get_config().PARALLEL_TWO_PHASE or not PartitionedWriter.two_phase_available(db.get_bind().engine):
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "load_mode=parallel requires two-phase commit "
+                    "(PARALLEL_TWO_PHASE=true and max_prepared_transactions > 0)"
+                )
+            )
+
+    def write_partitioned(
+        self,
+        valid_df: pd.DataFrame,
+        db: Session,
+        update_existing: bool,
+        counts: Dict[str, int],
+        progress: Optional[IngestJob] = None
+    ) -> int:
+        """
+        Escribir todo el archivo validado en particiones por rango de id, cada
+        una en su propia conexión del pool, con semántica todo-o-nada.
+        Los ids llegan ya deduplicados.
+
+        Returns:
+            int: cantidad de particiones usadas
+        """
+        config = get_config()
+        outcome = self.partitioned_writer.write(
+            valid_df,
+            db.get_bind().engine,
+            config.PARALLEL_WRITE_WORKERS,
+            update_existing=update_existing,
+            two_phase=config.PARALLEL_TWO_PHASE,
+            progress=progress.add_written if progress else None
+        )
+        counts["inserted"] += outcome["inserted"]
+        counts["updated"] += outcome["updated"]
+        return outcome["partitions"]
+
+    @staticmethod
+    def prepare_chunk(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        """
+        Limpiar y convertir un bloque leído del CSV.
+
+        Returns:
+            tuple: (registros con ID válido ya convertidos, cantidad de inválidos)
+        """
+        # Limpiar strings
+        df['name'] = df['name'].str.strip()
+
+        # Validar IDs
+        valid_mask = df['id'].notna()
+        valid_records = df[valid_mask].copy()
+
+        # Convertir datos
+        valid_records['id'] = valid_records['id'].astype(int)
+        valid_records['datetime'] = EmployeeService.convert_datetimes(valid_records['datetime'])
+        return valid_records, int((~valid_mask).sum())
+
+    @staticmethod
+    def convert_datetimes(values: pd.Series) -> pd.Series:
+        """Timestamps UTC sin zona (Parquet/Arrow ya los traen tipados); inválido -> NaT"""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            if values.dt.tz is not None:
+                return values.dt.tz_convert('UTC').dt.tz_localize(None)
+            return values
+        return pd.to_datetime(values, format=EMPLOYEE_TIMESTAMPS['datetime'], errors='coerce')
+
+    def rule_checked_ids(self, source: BinaryIO, file_format: str) -> pd.Series:
+        """
+        Pre-pasada para deduplicar cuando el archivo se procesa por bloques:
+        el id de cada fila por posición, con NA en las filas que no llegan a
+        la deduplicación (id nulo o alguna regla violada). Así los duplicados
+        se resuelven después de las reglas en todos los modos, igual que en
+        la carga de un solo bloque y en staging.
+        """
+        parts = []
+        keys = ["id", *EMPLOYEE_RULES.rules]
+        for df in read_key_columns(source, file_format, self.columns, keys, self.dtype):
+            df['datetime'] = self.convert_datetimes(df['datetime'])
+            broken = np.zeros(len(df), dtype=bool)
+            for mask in EMPLOYEE_RULES.evaluate(df).values():
+                broken |= mask
+            parts.append(df['id'].astype("Int64").mask(broken))
+        if not parts:
+            return pd.Series([], dtype="Int64")
+        return pd.concat(parts, ignore_index=True)
+
+    def iter_prepared_chunks(
+        self,
+        source: BinaryIO,
+        stream: bool,
+        parallel_parse: bool,
+        file_format: str = "csv"
+    ) -> Iterator[Tuple[int, pd.DataFrame, int]]:
+        """
+        Producir (filas leídas, registros válidos, inválidos) por bloque.
+
+        Parquet y Arrow IPC se leen con pyarrow por record batches, sin pasar
+        por texto. Con parallel_parse el archivo se parte en bloques de PARSE_BLOCK_SIZE
+        bytes que se parsean y transforman en el pool de procesos, varios a la
+        vez, y se entregan en orden al escritor.
+        """
+        if file_format != "csv":
+            batch_size = self.BATCH_SIZE if stream else None
+            for df in read_columnar_chunks(source, file_format, self.columns, batch_size, self.dtype):
+                with stage("transform"):
+                    valid_records, invalid_rows = self.prepare_chunk(df)
+                yield len(df), valid_records, invalid_rows
+            return
+
+        if parallel_parse:
+            blocks = iter_line_blocks(source, get_config().PARSE_BLOCK_SIZE)
+            yield from map_ordered(
+                get_cpu_executor(),
+                parse_employee_block,
+                blocks,
+                max_inflight=cpu_workers() * 2
+            )
+            return
+
+        chunksize = self.BATCH_SIZE if stream else None
+        chunks = read_csv_chunks(
+            source, self.columns, self.dtype, chunksize,
+            parser=get_config().CSV_PARSER, timestamps=EMPLOYEE_TIMESTAMPS
+        )
+        for df in chunks:
+            # Índice relativo al bloque, igual que en los demás lectores
+            df.index = pd.RangeIndex(len(df))
+            with stage("transform"):
+                valid_records, invalid_rows = self.prepare_chunk(df)
+            yield len(df), valid_records, invalid_rows
+
+    @staticmethod
+    def open_source(file: UploadFile, file_format: str, max_size: int) -> BinaryIO:
+        """CSV con control de tamaño durante la lectura; Parquet/Arrow tal cual"""
+        return LimitedReader(file.file, max_size) if file_format == "csv" else file.file
+
+    def check_foreign_keys(
+        self,
+        records: pd.DataFrame,
+        db: Session,
+        policy: str,
+        unknown_counts: Dict[str, int],
+        errors: list
+    ) -> pd.DataFrame:
+        """
+        Validar department_id/job_id del bloque completo contra el índice en
+        memoria de las dimensiones. Las FKs desconocidas no llegan a la base:
+        con policy "reject" se descarta la fila y con "null" se deja la FK en NULL.
+        """
+        for column, table_name in EMPLOYEE_FOREIGN_KEYS.items():
+            if records.empty:
+                break
+            unknown = foreign_key_index.unknown(db, table_name, records[column])
+            count = int(unknown.sum())
+            if not count:
+                continue
+            unknown_counts[column] += count
+            if policy == "null":
+                records.loc[unknown, column] = pd.NA
+            else:
+                errors.extend(
+                    f"Error with ID {row_id}: unknown {column} {value}"
+                    for row_id, value in zip(records.loc[unknown, 'id'].tolist(), records.loc[unknown, column].tolist())
+                )
+                records = records[~unknown]
+        return records
+
+    def tally_upserts(self, outcome: Dict[int, bool], counts: Dict[str, int]) -> None:
+        """Acumular insertados/actualizados de un upsert"""
+        inserted = sum(1 for was_inserted in outcome.values() if was_inserted)
+        counts["inserted"] += inserted
+        counts["updated"] += len(outcome) - inserted
 
     async def process_upload(
         self, 
         file: UploadFile, 
         update_existing: bool,
-        db: Session
+        db: Session,
+        load_mode: Optional[str] = None,
+        stream: Optional[bool] = None,
+        progress: Optional[IngestJob] = None,
+        parallel_parse: Optional[bool] = None,
+        force: bool = False,
+        fk_policy: Optional[str] = None,
+        keep: Optional[str] = None,
+        diagnostics: Optional[bool] = None
     ) -> Dict[str, Any]:
+        """
+        Validar la petición y ejecutar la carga en el pool de I/O, para que el
+        parseo con pandas y las escrituras no bloqueen el event loop.
+        """
+        mode = validate_load_mode(load_mode)
+        policy = validate_fk_policy(fk_policy)
+        keep = validate_dedup_policy(keep, default=get_config().DEDUP_KEEP)
+        file_format = await validate_upload_format(file)
+        return await run_io(
+            self.ingest, file, update_existing, db, mode, stream, progress, parallel_parse,
+            file_format, force, policy, keep, diagnostics
+        )
+
+    def ingest(
+        self,
+        file: UploadFile,
+        update_existing: bool,
+        db: Session,
+        mode: str,
+        stream: Optional[bool] = None,
+        progress: Optional[IngestJob] = None,
+        parallel_parse: Optional[bool] = None,
+        file_format: str = "csv",
+        force: bool = False,
+        fk_policy: Optional[str] = None,
+        keep: Optional[str] = None,
+        diagnostics: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Pipeline síncrono de carga, registrado en el ledger de uploads
+        (salvo Config.UPLOAD_LEDGER=false). force ignora una carga previa
+        idéntica y reprocesa el archivo desde el inicio. Las métricas de
+        recursos se loguean siempre y se agregan al resumen con diagnostics.
+        hiring_aggregates se mantiene por triggers en la misma transacción y
+        se compacta al terminar.
+        """
+        config = get_config()
+        include = config.INGEST_DIAGNOSTICS if diagnostics is None else diagnostics
+        if mode == "parallel":
+            self.require_two_phase(db)
         try:
-            await validate_file_size(file)
-            await validate_csv_format(file)
+            with IngestDiagnostics.track("hired_employees", db) as tracker:
+                if not config.UPLOAD_LEDGER:
+                    result = self.load_file(
+                        file, update_existing, db, mode, stream, progress, parallel_parse, file_format,
+                        fk_policy=fk_policy, keep=keep
+                    )
+                else:
+                    result = self.ledger.run(
+                        db, file, file_format, update_existing, force,
+                        lambda entry: self.load_file(
+                            file, update_existing, db, mode, stream, progress, parallel_parse, file_format,
+                            entry, fk_policy, keep
+                        ),
+                        options={
+                            "keep": keep or config.DEDUP_KEEP,
+                            "fk_policy": fk_policy or config.FK_POLICY,
+                            "load_mode": mode
+                        }
+                    )
+            # Los triggers ya actualizaron los agregados en la transacción de la carga;
+            # acá solo se funden sus deltas
+            compact_hiring_aggregates(db)
+        finally:
+            # Aun fallida, la carga pudo confirmar lotes: las métricas cacheadas dejan de valer
+            metrics_cache.invalidate()
+        return tracker.report(result, "total_rows", include)
 
-            processed_ids = set()
-            errors = []
-            
-            # Leer CSV
-            df = pd.read_csv(
-                file.file, 
-                header=None,  # Sin headers
-                names=self.columns,
-                na_values=['', 'NULL', 'null', 'NaN', 'nan'],
-                keep_default_na=True,
-                dtype={
-                    'id': 'Int64',
-                    'name': str,
-                    'department_id': 'Int64',
-                    'job_id': 'Int64'
-                }
-            )
-            
-            # Limpiar strings
-            df['name'] = df['name'].str.strip()
-            
-            # Validar IDs
-            valid_mask = df['id'].notna()
-            invalid_records = df[~valid_mask]
-            valid_records = df[valid_mask].copy()
-            
-            if len(valid_records) == 0:
+    def load_file(
+        self,
+        file: UploadFile,
+        update_existing: bool,
+        db: Session,
+        mode: str,
+        stream: Optional[bool] = None,
+        progress: Optional[IngestJob] = None,
+        parallel_parse: Optional[bool] = None,
+        file_format: str = "csv",
+        ledger_entry: Optional[LedgerEntry] = None,
+        fk_policy: Optional[str] = None,
+        keep: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Lectura, limpieza y escritura por lotes"""
+        config = get_config()
+        fk_policy = fk_policy or config.FK_POLICY
+        keep = keep or config.DEDUP_KEEP
+        resume_from = ledger_entry.resume_from if ledger_entry else 0
+        stream = config.STREAM_UPLOADS if stream is None else stream
+        parallel_parse = config.PARALLEL_PARSE if parallel_parse is None else parallel_parse
+        write_batch = self.copy_batch if mode == "copy" else self.process_batch
+        # En streaming el límite se controla mientras se lee (0 = sin límite)
+        chunked = stream or parallel_parse
+        max_size = config.MAX_STREAM_UPLOAD_SIZE if chunked else config.MAX_UPLOAD_SIZE
+
+        try:
+            if file_format != "csv":
+                if mode == "staging":
+                    raise HTTPException(status_code=400, detail="Staging mode only supports CSV uploads")
+                # Parquet/Arrow necesitan acceso aleatorio: se valida el tamaño sin leer
+                if max_size and file_size(file.file) > max_size:
+                    raise UploadTooLargeError(max_size)
+                parallel_parse = False
+
+            if mode == "staging":
+                with stage("write"):
+                    stats = self.staging_loader.load(LimitedReader(file.file, max_size), db, update_existing, keep)
+                if progress:
+                    progress.add_parsed(stats["total_rows"])
+                    progress.add_written(stats["inserted"] + stats["updated"])
+                    progress.set_errors(sum(stats["rejected"].values()))
+                return self.staging_summary(stats, keep)
+
+            processed_count = 0
+            errors = ErrorLog()
+            counts = {"inserted": 0, "updated": 0}
+            total_rows = 0
+            invalid_count = 0
+            valid_count = 0
+            null_stats = {
+                'null_names': 0,
+                'null_datetimes': 0,
+                'null_departments': 0,
+                'null_jobs': 0
+            }
+
+            pending = []
+            unknown_fks = {column: 0 for column in EMPLOYEE_FOREIGN_KEYS}
+            dup_stats = DuplicateStats(keep)
+            violations = RuleViolations(EMPLOYEE_RULES)
+
+            # Ids repetidos en el archivo: si se lee por bloques, una pre-pasada
+            # que lee solo el id y las columnas de las reglas resuelve los
+            # duplicados entre bloques (siempre después de las reglas)
+            drop = None
+            if stream or parallel_parse:
+                with stage("parse"):
+                    ids = self.rule_checked_ids(self.open_source(file, file_format, max_size), file_format)
+                drop = duplicate_mask(ids, keep)
+                file.file.seek(0)
+
+            # Leer CSV (completo, por bloques de BATCH_SIZE o en paralelo por bloques de bytes)
+            source = self.open_source(file, file_format, max_size)
+            diagnostics = current_diagnostics()
+            if diagnostics and file_format == "csv":
+                source = TimedReader(source, diagnostics)
+            chunks = self.iter_prepared_chunks(source, stream, parallel_parse, file_format)
+            if diagnostics:
+                chunks = diagnostics.iterate(chunks, "parse")
+            for rows_read, valid_records, invalid_rows in chunks:
+                chunk_start = total_rows
+                total_rows += rows_read
+                if progress:
+                    progress.add_parsed(rows_read)
+                invalid_count += invalid_rows
+                valid_count += len(valid_records)
+
+                with stage("validate"):
+                    # Estadísticas de nulos
+                    null_stats['null_names'] += int(valid_records['name'].isna().sum())
+                    null_stats['null_datetimes'] += int(valid_records['datetime'].isna().sum())
+                    null_stats['null_departments'] += int(valid_records['department_id'].isna().sum())
+                    null_stats['null_jobs'] += int(valid_records['job_id'].isna().sum())
+
+                    # Reglas de negocio (las mismas de los esquemas), vectorizadas por bloque
+                    broken = violations.add(
+                        EMPLOYEE_RULES.evaluate(valid_records),
+                        chunk_start + valid_records.index.to_numpy()
+                    )
+                    if broken.any():
+                        valid_records = valid_records[~broken]
+
+                    # Deduplicación vectorizada según la política keep
+                    if drop is None:
+                        chunk_drop = duplicate_mask(valid_records['id'], keep)
+                    else:
+                        chunk_drop = drop[chunk_start + valid_records.index.to_numpy()]
+                    if chunk_drop.any():
+                        dup_stats.add(valid_records.loc[chunk_drop, 'id'])
+                        valid_records = valid_records[~chunk_drop]
+
+                    # Reanudación: las filas ya confirmadas por un intento anterior no se reescriben
+                    if resume_from > chunk_start:
+                        done = valid_records.index < resume_from - chunk_start
+                        processed_count += int(done.sum())
+                        valid_records = valid_records[~done]
+
+                    # FKs desconocidas: rechazo o NULL según la política, sin llegar a la base
+                    valid_records = self.check_foreign_keys(valid_records, db, fk_policy, unknown_fks, errors)
+
+                # Modo parallel: se acumula todo lo validado y se escribe al final
+                if mode == "parallel":
+                    pending.append(valid_records)
+                    continue
+
+                # Procesar por lotes
+                for i in range(0, len(valid_records), self.BATCH_SIZE):
+                    batch_df = valid_records.iloc[i:i + self.BATCH_SIZE]
+                    if ledger_entry:
+                        # Se persiste con el commit del lote (before_commit del ledger)
+                        ledger_entry.pending_offset = chunk_start + int(batch_df.index[-1]) + 1
+                    with stage("write"):
+                        written = write_batch(
+                            batch_df, 
+                            db, 
+                            errors,
+                            update_existing,
+                            counts
+                        )
+                    processed_count += written
+                    if progress:
+                        progress.add_written(written)
+                        progress.set_errors(errors.total)
+
+                if ledger_entry:
+                    ledger_entry.pending_offset = max(ledger_entry.pending_offset, total_rows)
+
+            if valid_count == 0:
                 return {
                     "message": "No valid records to process",
                     "summary": {
-                        "total_rows": len(df),
+                        "total_rows": total_rows,
                         "valid_records": 0,
-                        "invalid_records": len(invalid_records),
+                        "invalid_records": invalid_count,
                         "reason": "No records with valid ID found"
                     }
                 }
-            
-            # Convertir datos
-            valid_records['id'] = valid_records['id'].astype(int)
-            valid_records['datetime'] = pd.to_datetime(
-                valid_records['datetime'],
-                format='%Y-%m-%dT%H:%M:%SZ',
-                errors='coerce'
-            )
 
-            logger.info(f"Procesando {len(valid_records)} registros válidos")
-            
-            # Procesar por lotes
-            for i in range(0, len(valid_records), self.BATCH_SIZE):
-                batch_df = valid_records.iloc[i:i + self.BATCH_SIZE]
-                batch_processed = await self.process_batch(
-                    batch_df, 
-                    db, 
-                    processed_ids, 
-                    errors,
-                    update_existing
-                )
-                processed_ids.update(batch_processed)
-            
-            # Estadísticas de nulos
-            null_stats = {
-                'null_names': len(valid_records[valid_records['name'].isna()]),
-                'null_datetimes': len(valid_records[valid_records['datetime'].isna()]),
-                'null_departments': len(valid_records[valid_records['department_id'].isna()]),
-                'null_jobs': len(valid_records[valid_records['job_id'].isna()])
-            }
+            partitions = None
+            if pending:
+                valid_df = pd.concat(pending)
+                with stage("write"):
+                    partitions = self.write_partitioned(valid_df, db, update_existing, counts, progress)
+                processed_count += len(valid_df)
+
+            logger.info(
+                f"Procesados {valid_count} registros válidos "
+                f"(modo {mode}, streaming={stream}, parallel_parse={parallel_parse})"
+            )
 
             return {
-                "message": f"Processed {len(df)} rows: {len(processed_ids)} successful, {len(invalid_records)} invalid",
+                "message": f"Processed {total_rows} rows: {processed_count} successful, {invalid_count} invalid",
                 "summary": {
-                    "total_rows": len(df),
-                    "processed_successfully": len(processed_ids),
+                    "total_rows": total_rows,
+                    "processed_successfully": processed_count,
+                    "inserted": counts["inserted"],
+                    "updated": counts["updated"],
                     "rows_with_null_values": null_stats,
-                    "invalid_records": len(invalid_records),
-                    "errors": errors[:5] if errors else []
+                    "invalid_records": invalid_count,
+                    "unknown_foreign_keys": unknown_fks,
+                    "fk_policy": fk_policy,
+                    "duplicates": dup_stats.to_dict(),
+                    "rule_violations": violations.to_dict(),
+                    "streamed": stream,
+                    "parallel_parse": parallel_parse,
+                    "file_format": file_format,
+                    "load_mode": mode,
+                    **({"partitions": partitions} if partitions is not None else {}),
+                    "error_count": errors.total,
+                    "errors": list(errors)
                 }
             }
             
+        except HTTPException:
+            db.rollback()
+            raise
+        except UploadTooLargeError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        except PartitionLoadError as e:
+            logger.error(f"Carga particionada revertida: {e}")
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": str(e),
+                    "partition": e.partition,
+                    "tip": "No rows were written; use load_mode=orm to report row-level errors"
+                }
+            )
+        except PartitionCommitError as e:
+            logger.error(f"Carga particionada con transacciones preparadas pendientes: {e}")
+            db.rollback()
+            raise HTTPException(
+                status_code=503,
+                detail={
+                    "error": str(e),
+                    "pending_transactions": list(e.pending.values()),
+                    "tip": "Run COMMIT PREPARED for the pending transactions to finish the load"
+                }
+            )
         except Exception as e:
             logger.error(f"Error en el proceso: {e}")
             db.rollback()
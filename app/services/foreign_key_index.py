@@ -0,0 +1,66 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Dict, Tuple, List
+import numpy as np
+import pandas as pd
+import logging
+import threading
+import time
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+class ForeignKeyIndex:
+    """
+    Índice en memoria de los ids válidos de las tablas dimensión, para validar
+    las FKs de bloques completos con isin antes de escribir.
+
+    Se refresca cuando DepartmentService/JobService cargan datos y, como
+    respaldo entre procesos, cuando vence su TTL. Antes de dar un id por
+    desconocido se confirma contra la base, así un índice desactualizado
+    nunca rechaza un id que sí existe.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._ids: Dict[str, Tuple[np.ndarray, float]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session, table_name: str) -> np.ndarray:
+        """Recargar los ids de la tabla (un SELECT id)"""
+        rows = db.execute(text(f"SELECT id FROM {table_name} ORDER BY id")).scalars().all()
+        ids = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            self._ids[table_name] = (ids, time.monotonic())
+        logger.info(f"Índice de FKs de {table_name} actualizado: {len(ids)} ids")
+        return ids
+
+    def invalidate(self, table_name: str) -> None:
+        with self._lock:
+            self._ids.pop(table_name, None)
+
+    def ids(self, db: Session, table_name: str) -> np.ndarray:
+        with self._lock:
+            cached = self._ids.get(table_name)
+        if cached is None or time.monotonic() - cached[1] > self.ttl_seconds:
+            return self.refresh(db, table_name)
+        return cached[0]
+
+    def unknown(self, db: Session, table_name: str, values: pd.Series) -> pd.Series:
+        """
+        Máscara de filas cuyo valor (no nulo) no existe en la tabla.
+        Si el índice no encuentra algún id, se confirma contra la base antes
+        de rechazarlo y, si existía, se refresca el índice.
+        """
+        unknown = values.notna() & ~values.isin(self.ids(db, table_name))
+        if unknown.any():
+            candidates: List[int] = values[unknown].astype("int64").unique().tolist()
+            found = db.execute(
+                text(f"SELECT count(*) FROM {table_name} WHERE id = ANY(:ids)"),
+                {"ids": candidates}
+            ).scalar()
+            if found:
+                unknown = values.notna() & ~values.isin(self.refresh(db, table_name))
+        return unknown
+
+foreign_key_index = ForeignKeyIndex(ttl_seconds=get_config().FK_INDEX_TTL_SECONDS)
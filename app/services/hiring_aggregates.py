@@ -0,0 +1,45 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Funde en una sola fila las claves con más de una fila delta (y borra las
+# que suman cero). Solo toca esas claves; los deltas que otra transacción
+# agregue mientras tanto no están en el snapshot y quedan para la próxima
+COMPACT_QUERY = """
+    WITH targets AS (
+        SELECT unnest(array_agg(id)) AS id
+        FROM hiring_aggregates
+        GROUP BY department_id, job_id, year, quarter
+        HAVING COUNT(*) > 1 OR SUM(hired) = 0
+    ),
+    removed AS (
+        DELETE FROM hiring_aggregates a
+        USING targets t
+        WHERE a.id = t.id
+        RETURNING a.department_id, a.job_id, a.year, a.quarter, a.hired
+    )
+    INSERT INTO hiring_aggregates (department_id, job_id, year, quarter, hired)
+    SELECT department_id, job_id, year, quarter, SUM(hired)
+    FROM removed
+    GROUP BY department_id, job_id, year, quarter
+    HAVING SUM(hired) <> 0
+"""
+
+def compact_hiring_aggregates(db: Session) -> int:
+    """
+    Compactar los deltas de hiring_aggregates y confirmar.
+    Un error no afecta a la carga ya confirmada: solo se loguea.
+
+    Returns:
+        int: filas delta eliminadas
+    """
+    try:
+        removed = db.execute(text(COMPACT_QUERY)).rowcount
+        db.commit()
+        return removed
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"No se pudo compactar hiring_aggregates: {e}")
+        return 0
@@ -0,0 +1,204 @@
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from ..config import get_config
+from ..database import SessionLocal
+from ..utils.executors import run_io
+from .admission import ingest_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Runner: recibe el archivo spooleado, una sesión propia y el job para reportar progreso
+IngestRunner = Callable[[UploadFile, Session, "IngestJob"], Awaitable[Dict[str, Any]]]
+
+class IngestJob:
+    """Estado y progreso de una carga ejecutada en segundo plano"""
+
+    def __init__(self, table_name: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.table_name = table_name
+        self.filename = filename
+        self.status = "queued"
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Any] = None
+        self._started = None
+        self._elapsed = 0.0
+
+    def add_parsed(self, rows: int) -> None:
+        self.rows_parsed += rows
+
+    def add_written(self, rows: int) -> None:
+        self.rows_written += rows
+
+    def set_errors(self, errors: int) -> None:
+        self.errors = errors
+
+    def start(self) -> None:
+        self.status = "running"
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+
+    def finish(self, result: Dict[str, Any]) -> None:
+        self.status = "completed"
+        self.result = result
+        self.finished_at = datetime.utcnow()
+        self._elapsed = time.perf_counter() - self._started
+
+    def fail(self, error: Any) -> None:
+        self.status = "failed"
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        if self._started is not None:
+            self._elapsed = time.perf_counter() - self._started
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self._started is None:
+            return 0.0
+        if self.finished_at is not None:
+            return self._elapsed
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed_seconds
+        return {
+            "job_id": self.id,
+            "table": self.table_name,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": {
+                "rows_parsed": self.rows_parsed,
+                "rows_written": self.rows_written,
+                "rows_per_second": round(self.rows_written / elapsed, 2) if elapsed > 0 else 0.0,
+                "elapsed_seconds": round(elapsed, 3),
+                "errors": self.errors
+            },
+            "result": self.result,
+            "error": self.error
+        }
+
+class IngestJobManager:
+    """
+    Cola de cargas en segundo plano con un pool acotado de workers.
+    El archivo se spoolea a disco y la carga se ejecuta con su propia sesión.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queued: int,
+        max_history: int,
+        spool_dir: Optional[str] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.spool_dir = spool_dir or None
+        self.session_factory = session_factory
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    def _prune(self) -> None:
+        """Descartar los jobs terminados más antiguos por encima de max_history"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("completed", "failed")]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_history)]:
+            del self.jobs[job_id]
+
+    def _spool(self, table_name: str, file: UploadFile) -> str:
+        """Copiar el upload a un archivo temporal propio del job"""
+        with tempfile.NamedTemporaryFile(
+            dir=self.spool_dir, prefix=f"{table_name}_", suffix=".upload", delete=False
+        ) as spool:
+            shutil.copyfileobj(file.file, spool)
+            return spool.name
+
+    async def submit(self, table_name: str, file: UploadFile, runner: IngestRunner, weight: int = 1) -> IngestJob:
+        """
+        Spoolear el archivo y encolar la carga; devuelve el job en cuanto el
+        archivo está en disco. La copia corre en el pool de I/O para no
+        bloquear el event loop con archivos grandes.
+        weight: conexiones de escritura que ocupa la carga (control de admisión)
+        """
+        with self.lock:
+            if self._pending() >= self.max_queued:
+                raise HTTPException(status_code=503, detail="Ingest queue is full, try again later")
+            job = IngestJob(table_name, file.filename)
+            self.jobs[job.id] = job
+            self._prune()
+
+        try:
+            path = await run_io(self._spool, table_name, file)
+        except Exception as e:
+            job.fail(f"Error spooling upload: {e}")
+            raise HTTPException(status_code=500, detail=f"Error spooling upload: {e}")
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+            self.executor.submit(self._run, job, path, runner, weight)
+        logger.info(f"Job {job.id} encolado para {table_name} ({file.filename})")
+        return job
+
+    def _run(self, job: IngestJob, path: str, runner: IngestRunner, weight: int = 1) -> None:
+        db = self.session_factory()
+        try:
+            # El job sigue "queued" hasta que el control de admisión le da lugar
+            with ingest_scheduler.admit_blocking(job.table_name, weight):
+                job.start()
+                with open(path, "rb") as spooled:
+                    upload = UploadFile(file=spooled, filename=job.filename)
+                    result = asyncio.run(runner(upload, db, job))
+            job.finish(result)
+            logger.info(f"Job {job.id} completado en {job.elapsed_seconds:.2f}s")
+        except HTTPException as e:
+            job.fail(e.detail)
+            logger.error(f"Job {job.id} falló: {e.detail}")
+        except Exception as e:
+            job.fail(str(e))
+            logger.error(f"Job {job.id} falló: {e}")
+        finally:
+            db.close()
+            os.unlink(path)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self.jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Detener los workers; el pool se vuelve a crear con el próximo submit"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+config = get_config()
+ingest_job_manager = IngestJobManager(
+    max_workers=config.INGEST_WORKERS,
+    max_queued=config.INGEST_QUEUE_SIZE,
+    max_history=config.INGEST_JOB_HISTORY,
+    spool_dir=config.INGEST_SPOOL_DIR
+)
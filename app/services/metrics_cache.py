@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+import hashlib
+import logging
+import threading
+import time
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+class CachedMetrics:
+    """Respuesta de métricas ya serializada, con el ETag de su contenido"""
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.stored_at = time.monotonic()
+
+class MetricsCache:
+    """
+    Caché LRU acotada de respuestas de métricas, por endpoint y parámetros.
+
+    Los datos solo cambian cuando una carga confirma: cada carga incrementa
+    version y las entradas de versiones anteriores dejan de servirse. Una
+    entrada se guarda con la versión leída antes de calcularla, así un
+    resultado calculado mientras confirmaba una carga nunca queda como
+    vigente. Como respaldo entre procesos (las cargas de otro worker no
+    incrementan esta versión) las entradas vencen a los ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, CachedMetrics]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> int:
+        """Registrar que cambiaron los datos; devuelve la nueva versión"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+
+    def get(self, key: Hashable) -> Optional[CachedMetrics]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != self.version or time.monotonic() - entry.stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedMetrics:
+        """Guardar una respuesta calculada con los datos de version"""
+        entry = CachedMetrics(version, body)
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            if version != self.version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+config = get_config()
+metrics_cache = MetricsCache(
+    max_entries=config.METRICS_CACHE_SIZE,
+    ttl_seconds=config.METRICS_CACHE_TTL_SECONDS
+)
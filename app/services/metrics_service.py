@@ -1,45 +1,72 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from datetime import datetime, time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+def _quarter_start(bound: Optional[datetime]) -> bool:
+    """El límite cae en el inicio de un trimestre (o no hay límite)"""
+    return bound is None or (bound.month % 3 == 1 and bound.day == 1 and bound.time() == time.min)
+
 class MetricsService:
-    # SQL Queries como constantes de clase
+    # SQL Queries como constantes de clase. {source} es la fuente de las
+    # contrataciones por departamento, puesto y trimestre del período:
+    # hiring_aggregates si el período está alineado a trimestres (costo según
+    # la cantidad de grupos) o hired_employees filtrado por un rango
+    # semiabierto sobre datetime, que usa los índices de esa columna
+    AGGREGATED_SOURCE = """
+        SELECT a.department_id, a.job_id, a.year, a.quarter, a.hired
+        FROM hiring_aggregates a
+        WHERE {where}
+    """
+
+    HIRES_SOURCE = """
+        SELECT
+            e.department_id,
+            e.job_id,
+            EXTRACT(YEAR FROM e.datetime)::smallint as year,
+            EXTRACT(QUARTER FROM e.datetime)::smallint as quarter,
+            EXTRACT(MONTH FROM e.datetime)::smallint as month,
+            1 as hired
+        FROM hired_employees e
+        WHERE {where}
+    """
+
     QUARTERLY_HIRING_QUERY = """
-        SELECT 
+        SELECT
             d.department,
             j.job,
-            COUNT(CASE WHEN EXTRACT(QUARTER FROM datetime) = 1 THEN 1 END) as Q1,
-            COUNT(CASE WHEN EXTRACT(QUARTER FROM datetime) = 2 THEN 1 END) as Q2,
-            COUNT(CASE WHEN EXTRACT(QUARTER FROM datetime) = 3 THEN 1 END) as Q3,
-            COUNT(CASE WHEN EXTRACT(QUARTER FROM datetime) = 4 THEN 1 END) as Q4
-        FROM hired_employees e
-        JOIN departments d ON e.department_id = d.id
-        JOIN jobs j ON e.job_id = j.id
-        WHERE EXTRACT(YEAR FROM datetime) = 2021
+            COALESCE(SUM(h.hired) FILTER (WHERE h.quarter = 1), 0) as Q1,
+            COALESCE(SUM(h.hired) FILTER (WHERE h.quarter = 2), 0) as Q2,
+            COALESCE(SUM(h.hired) FILTER (WHERE h.quarter = 3), 0) as Q3,
+            COALESCE(SUM(h.hired) FILTER (WHERE h.quarter = 4), 0) as Q4
+        FROM ({source}) h
+        JOIN departments d ON h.department_id = d.id
+        JOIN jobs j ON h.job_id = j.id
         GROUP BY d.department, j.job
+        HAVING SUM(h.hired) > 0
         ORDER BY d.department, j.job;
     """
-    
+
     DEPARTMENTS_ABOVE_MEAN_QUERY = """
         WITH hired_by_department AS (
-            SELECT 
+            SELECT
                 d.id,
                 d.department,
-                COUNT(*) as hired
-            FROM hired_employees e
-            JOIN departments d ON e.department_id = d.id
-            WHERE EXTRACT(YEAR FROM datetime) = 2021
+                SUM(h.hired) as hired
+            FROM ({source}) h
+            JOIN departments d ON h.department_id = d.id
             GROUP BY d.id, d.department
+            HAVING SUM(h.hired) > 0
         ),
         avg_hired AS (
             SELECT AVG(hired) as mean_hired
             FROM hired_by_department
         )
-        SELECT 
+        SELECT
             id,
             department,
             hired
@@ -47,14 +74,158 @@ class MetricsService:
         WHERE hired > (SELECT mean_hired FROM avg_hired)
         ORDER BY hired DESC;
     """
-    
-    async def get_quarterly_hiring(self, db: Session) -> Dict[str, Any]:
-        """Obtener métricas trimestrales de contratación"""
+
+    # Columnas (nombre, tipo) de cada consulta, para las salidas por streaming
+    QUARTERLY_HIRING_COLUMNS = (
+        ("department", "string"), ("job", "string"),
+        ("Q1", "int64"), ("Q2", "int64"), ("Q3", "int64"), ("Q4", "int64")
+    )
+    DEPARTMENTS_ABOVE_MEAN_COLUMNS = (("id", "int64"), ("department", "string"), ("hired", "int64"))
+
+    # Dimensiones del cubo: columnas de salida (nombre, expresión, tipo). Las
+    # de department y job agrupan id y nombre juntos
+    CUBE_DIMENSIONS = {
+        "department": (("department_id", "h.department_id", "int64"), ("department", "d.department", "string")),
+        "job": (("job_id", "h.job_id", "int64"), ("job", "j.job", "string")),
+        "year": (("year", "h.year", "int64"),),
+        "quarter": (("quarter", "h.quarter", "int64"),),
+        "month": (("month", "h.month", "int64"),)
+    }
+
+    def build_source(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        monthly: bool = False,
+        department_ids: Optional[List[int]] = None,
+        job_ids: Optional[List[int]] = None
+    ) -> Tuple[str, Dict[str, Any], bool]:
+        """
+        Fuente de contrataciones del período [start, end), filtrada por
+        departamentos y puestos. hiring_aggregates solo tiene grano de
+        trimestre: con monthly o un límite que no cae en inicio de trimestre
+        se lee hired_employees.
+
+        Returns:
+            tuple: (SQL, parámetros, si usa hiring_aggregates)
+        """
+        aggregated = not monthly and _quarter_start(start) and _quarter_start(end)
+        alias = "a" if aggregated else "e"
+        conditions, params = [], {}
+        if aggregated:
+            # El año va solo primero para que use el índice (year, ...)
+            if start is not None:
+                conditions += ["a.year >= :start_year", "(a.year, a.quarter) >= (:start_year, :start_quarter)"]
+                params.update(start_year=start.year, start_quarter=(start.month - 1) // 3 + 1)
+            if end is not None:
+                conditions += ["a.year <= :end_year", "(a.year, a.quarter) < (:end_year, :end_quarter)"]
+                params.update(end_year=end.year, end_quarter=(end.month - 1) // 3 + 1)
+        else:
+            conditions.append("e.datetime IS NOT NULL")
+            if start is not None:
+                conditions.append("e.datetime >= :start")
+                params["start"] = start
+            if end is not None:
+                conditions.append("e.datetime < :end")
+                params["end"] = end
+        if department_ids:
+            conditions.append(f"{alias}.department_id = ANY(:department_ids)")
+            params["department_ids"] = department_ids
+        if job_ids:
+            conditions.append(f"{alias}.job_id = ANY(:job_ids)")
+            params["job_ids"] = job_ids
+        source = self.AGGREGATED_SOURCE if aggregated else self.HIRES_SOURCE
+        return source.format(where=" AND ".join(conditions) or "TRUE"), params, aggregated
+
+    def build_query(
+        self,
+        query: str,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Completar query con la fuente adecuada al período [start, end).
+
+        Returns:
+            tuple: (SQL, parámetros)
+        """
+        source, params, _ = self.build_source(start, end)
+        return query.format(source=source), params
+
+    def build_cube_query(
+        self,
+        dimensions: List[str],
+        subtotals: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        department_ids: Optional[List[int]] = None,
+        job_ids: Optional[List[int]] = None
+    ) -> Tuple[str, Dict[str, Any], List[Tuple[str, str]], bool]:
+        """
+        Armar una única consulta GROUP BY parametrizada con las dimensiones
+        pedidas y, opcionalmente, subtotales ROLLUP o CUBE. Con subtotales se
+        agrega la columna grouping: máscara de bits (la primera dimensión es
+        el bit más significativo) con las dimensiones sumarizadas en la fila.
+
+        Returns:
+            tuple: (SQL, parámetros, columnas (nombre, tipo), si usa hiring_aggregates)
+        """
+        source, params, aggregated = self.build_source(
+            start, end, "month" in dimensions, department_ids, job_ids
+        )
+        select, columns, groups = [], [], []
+        for name in dimensions:
+            outputs = self.CUBE_DIMENSIONS[name]
+            select += [f"{expression} as {column}" for column, expression, _ in outputs]
+            columns += [(column, kind) for column, _, kind in outputs]
+            groups.append([expression for _, expression, _ in outputs])
+        dimension_columns = len(columns)
+        select.append("SUM(h.hired) as hired")
+        columns.append(("hired", "int64"))
+        if subtotals:
+            select.append("GROUPING(" + ", ".join(group[0] for group in groups) + ") as grouping")
+            columns.append(("grouping", "int64"))
+            group_by = subtotals.upper() + "(" + ", ".join("(" + ", ".join(group) + ")" for group in groups) + ")"
+        else:
+            group_by = ", ".join(expression for group in groups for expression in group) or "()"
+
+        joins = ""
+        if "department" in dimensions:
+            joins += " LEFT JOIN departments d ON h.department_id = d.id"
+        if "job" in dimensions:
+            joins += " LEFT JOIN jobs j ON h.job_id = j.id"
+        # Los subtotales (dimensiones en NULL) quedan después de su grupo
+        order = ", ".join(f"{position} NULLS LAST" for position in range(1, dimension_columns + 1))
+        sql = f"""
+            SELECT {", ".join(select)}
+            FROM ({source}) h{joins}
+            GROUP BY {group_by}
+            HAVING SUM(h.hired) <> 0
+            {"ORDER BY " + order if dimensions else ""}
+        """
+        return sql, params, columns, aggregated
+
+    @staticmethod
+    def period(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Optional[str]]:
+        return {
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None
+        }
+
+    async def get_quarterly_hiring(
+        self,
+        db: AsyncSession,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Obtener métricas trimestrales de contratación del período [start, end)"""
         try:
-            result = db.execute(text(self.QUARTERLY_HIRING_QUERY)).all()
+            query, params = self.build_query(self.QUARTERLY_HIRING_QUERY, start, end)
+            result = (await db.execute(text(query), params)).all()
 
             return {
                 "headers": ["department", "job", "Q1", "Q2", "Q3", "Q4"],
+                "period": self.period(start, end),
                 "rows": [
                     {
                         "department": row[0],
@@ -67,21 +238,28 @@ class MetricsService:
                     for row in result
                 ]
             }
-            
+
         except Exception as e:
             logger.error(f"Error obteniendo métricas trimestrales: {e}")
             raise HTTPException(
                 status_code=500,
                 detail={"error": "Error retrieving quarterly hiring metrics", "details": str(e)}
             )
-    
-    async def get_departments_above_mean(self, db: Session) -> Dict[str, Any]:
-        """Obtener departamentos sobre la media de contratación"""
+
+    async def get_departments_above_mean(
+        self,
+        db: AsyncSession,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Obtener departamentos sobre la media de contratación del período [start, end)"""
         try:
-            result = db.execute(text(self.DEPARTMENTS_ABOVE_MEAN_QUERY)).all()
+            query, params = self.build_query(self.DEPARTMENTS_ABOVE_MEAN_QUERY, start, end)
+            result = (await db.execute(text(query), params)).all()
 
             return {
                 "headers": ["id", "department", "hired"],
+                "period": self.period(start, end),
                 "rows": [
                     {
                         "id": row[0],
@@ -91,10 +269,72 @@ class MetricsService:
                     for row in result
                 ]
             }
-            
+
         except Exception as e:
             logger.error(f"Error obteniendo departamentos sobre la media: {e}")
             raise HTTPException(
                 status_code=500,
                 detail={"error": "Error retrieving departments above mean", "details": str(e)}
-            )
\ No newline at end of file
+            )
+
+    async def get_hiring_cube(
+        self,
+        db: AsyncSession,
+        dimensions: List[str],
+        subtotals: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        department_ids: Optional[List[int]] = None,
+        job_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Obtener contrataciones agrupadas por las dimensiones pedidas"""
+        try:
+            query, params, columns, aggregated = self.build_cube_query(
+                dimensions, subtotals, start, end, department_ids, job_ids
+            )
+            result = (await db.execute(text(query), params)).all()
+            headers = [column for column, _ in columns]
+
+            return {
+                "headers": headers,
+                "period": self.period(start, end),
+                "dimensions": dimensions,
+                "subtotals": subtotals,
+                "source": "hiring_aggregates" if aggregated else "hired_employees",
+                "rows": [dict(zip(headers, row)) for row in result]
+            }
+
+        except Exception as e:
+            logger.error(f"Error obteniendo el cubo de contrataciones: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": "Error retrieving hiring cube", "details": str(e)}
+            )
+
+    async def open_stream(
+        self,
+        db: AsyncSession,
+        query: str,
+        params: Dict[str, Any],
+        batch_size: int
+    ) -> AsyncIterator[Sequence[Any]]:
+        """
+        Ejecutar query con un cursor del lado del servidor (yield_per) y
+        devolver sus filas por bloques de batch_size, sin materializar el
+        resultado. La consulta se abre antes de devolver el iterador para que
+        un error todavía pueda responderse como 500.
+        """
+        try:
+            result = await db.stream(text(query), params, execution_options={"yield_per": batch_size})
+        except Exception as e:
+            logger.error(f"Error abriendo el streaming de métricas: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": "Error retrieving metrics", "details": str(e)}
+            )
+
+        async def batches() -> AsyncIterator[Sequence[Any]]:
+            async for partition in result.partitions(batch_size):
+                yield partition
+
+        return batches()
@@ -0,0 +1,234 @@
+from sqlalchemy import Table, literal_column, text
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, Any, List, Optional, Callable
+import pandas as pd
+import numpy as np
+import logging
+import io
+from ..utils.diagnostics import count_round_trip
+
+logger = logging.getLogger(__name__)
+
+class PartitionLoadError(Exception):
+    """
+    Falló una partición. Si falló al escribir (o al preparar) ninguna quedó
+    confirmada; si falló al confirmar sin two-phase, committed lista las
+    particiones que ya se habían confirmado.
+    """
+
+    def __init__(self, partition: int, error: Exception, committed: Optional[List[int]] = None):
+        self.partition = partition
+        self.error = error
+        self.committed = committed or []
+        super().__init__(f"Partition {partition} failed: {error}")
+
+class PartitionCommitError(Exception):
+    """Transacciones preparadas que no se pudieron confirmar (quedan en pg_prepared_xacts)"""
+
+    def __init__(self, pending: Dict[int, str]):
+        self.pending = pending
+        super().__init__(
+            f"Prepared partitions {sorted(pending)} are pending COMMIT PREPARED: "
+            f"{', '.join(pending.values())}"
+        )
+
+class PartitionedWriter:
+    """
+    Escritura en paralelo de un DataFrame ya validado, particionado por rangos
+    de id. Cada partición se escribe en su propia conexión del pool y en su
+    propia transacción, que se confirma solo cuando todas las particiones
+    terminaron bien.
+
+    Con two_phase=True (por defecto en Config) cada partición hace PREPARE
+    TRANSACTION antes de la barrera: una vez preparadas todas, la decisión
+    es confirmar y un COMMIT PREPARED fallido se reintenta en otra conexión,
+    nunca se revierten las demás. Con two_phase=False solo la fase de
+    escritura es atómica: los COMMIT de la barrera son secuenciales y un
+    fallo en el N-ésimo deja confirmadas las particiones anteriores.
+    """
+
+    def __init__(self, table: Table, columns: List[str], batch_size: int = 1000):
+        self.table = table
+        self.columns = columns
+        self.batch_size = batch_size
+        self.copy_sql = (
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        )
+
+    @staticmethod
+    def partition(df: pd.DataFrame, partitions: int) -> List[pd.DataFrame]:
+        """Partir por rangos contiguos de id (sin solapamiento entre particiones)"""
+        ordered = df.sort_values("id", kind="stable")
+        bounds = np.linspace(0, len(ordered), min(partitions, len(ordered)) + 1, dtype=int)
+        return [ordered.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def _copy(self, part: pd.DataFrame, connection: Connection) -> int:
+        for start in range(0, len(part), self.batch_size):
+            buffer = io.StringIO()
+            part.iloc[start:start + self.batch_size][self.columns].to_csv(
+                buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S'
+            )
+            buffer.seek(0)
+            with connection.connection.cursor() as cursor:
+                cursor.copy_expert(self.copy_sql, buffer)
+            count_round_trip()
+        return len(part)
+
+    def _upsert(self, part: pd.DataFrame, connection: Connection) -> int:
+        """INSERT ... ON CONFLICT DO UPDATE por lotes; devuelve los insertados"""
+        inserted = 0
+        records = part[self.columns].astype(object).where(part[self.columns].notna(), None)
+        for start in range(0, len(records), self.batch_size):
+            rows = records.iloc[start:start + self.batch_size].to_dict("records")
+            stmt = pg_insert(self.table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={col: stmt.excluded[col] for col in self.columns if col != "id"}
+            ).returning(literal_column("xmax = 0").label("inserted"))
+            inserted += sum(1 for row in connection.execute(stmt) if row.inserted)
+        return inserted
+
+    @staticmethod
+    def two_phase_available(engine: Engine) -> bool:
+        """El servidor acepta PREPARE TRANSACTION (max_prepared_transactions > 0)"""
+        with engine.connect() as connection:
+            return int(connection.execute(text("SHOW max_prepared_transactions")).scalar()) > 0
+
+    @staticmethod
+    def _commit(index: int, outcome: Dict[str, Any]) -> None:
+        outcome["transaction"].commit()
+
+    @staticmethod
+    def _commit_prepared(engine: Engine, xid: str) -> None:
+        """COMMIT PREPARED desde una conexión nueva (fuera de transacción)"""
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"COMMIT PREPARED '{xid}'"))
+
+    def _commit_all(self, outcomes: List[Dict[str, Any]], engine: Engine, two_phase: bool) -> None:
+        """
+        Barrera de commit. Con two-phase cada COMMIT PREPARED fallido se
+        reintenta una vez en otra conexión; lo que no se pueda confirmar
+        queda preparado (no revertido) y se informa con PartitionCommitError.
+        """
+        pending = {}
+        for index, outcome in enumerate(outcomes):
+            try:
+                self._commit(index, outcome)
+            except Exception as e:
+                if not two_phase:
+                    raise PartitionLoadError(index, e, committed=list(range(index)))
+                xid = outcome["transaction"].xid
+                logger.warning(f"COMMIT PREPARED de la partición {index} falló ({e}); reintentando")
+                # La conexión original queda en estado incierto: se descarta sin ROLLBACK
+                outcome["connection"].invalidate()
+                try:
+                    self._commit_prepared(engine, xid)
+                except Exception as retry_error:
+                    logger.error(f"Partición {index} sigue preparada ({xid}): {retry_error}")
+                    pending[index] = xid
+        if pending:
+            raise PartitionCommitError(pending)
+
+    def _write_partition(
+        self,
+        index: int,
+        part: pd.DataFrame,
+        engine: Engine,
+        update_existing: bool,
+        two_phase: bool,
+        written: Callable[[int], None]
+    ) -> Dict[str, Any]:
+        """Escribir una partición y dejar su transacción abierta (o preparada)"""
+        connection = engine.connect()
+        transaction = connection.begin_twophase() if two_phase else connection.begin()
+        try:
+            if update_existing:
+                inserted = self._upsert(part, connection)
+            else:
+                inserted = self._copy(part, connection)
+            if two_phase:
+                transaction.prepare()
+        except Exception as e:
+            transaction.rollback()
+            connection.close()
+            raise PartitionLoadError(index, e)
+        written(len(part))
+        return {
+            "connection": connection,
+            "transaction": transaction,
+            "inserted": inserted,
+            "updated": len(part) - inserted
+        }
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        engine: Engine,
+        partitions: int,
+        update_existing: bool = False,
+        two_phase: bool = True,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Escribir todas las particiones en paralelo con semántica todo-o-nada.
+        Sin two-phase la garantía cubre solo la fase de escritura (ver la
+        docstring de la clase).
+
+        Returns:
+            dict: inserted, updated y partitions efectivamente usadas
+
+        Raises:
+            PartitionLoadError: si alguna partición falla al escribir (todas se
+                revierten) o, sin two-phase, al confirmar (committed indica
+                cuáles ya se habían confirmado)
+            PartitionCommitError: si con two-phase alguna transacción preparada
+                no se pudo confirmar ni al reintentar
+        """
+        parts = self.partition(df, partitions)
+        if not parts:
+            return {"inserted": 0, "updated": 0, "partitions": 0}
+        written = progress or (lambda rows: None)
+
+        with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="partition") as executor:
+            futures = [
+                # Cada partición corre en una copia del contexto (diagnóstico de la carga activa)
+                executor.submit(
+                    copy_context().run, self._write_partition,
+                    i, part, engine, update_existing, two_phase, written
+                )
+                for i, part in enumerate(parts)
+            ]
+            outcomes, failure = [], None
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except PartitionLoadError as e:
+                    failure = failure or e
+
+        try:
+            if failure is not None:
+                raise failure
+            # Barrera: todas las particiones escribieron (o prepararon) antes de confirmar
+            self._commit_all(outcomes, engine, two_phase)
+        except Exception:
+            for outcome in outcomes:
+                # Preparadas y ya decididas (falló su COMMIT PREPARED) no se revierten
+                if outcome["transaction"].is_active and not outcome["connection"].invalidated:
+                    outcome["transaction"].rollback()
+            raise
+        finally:
+            for outcome in outcomes:
+                outcome["connection"].close()
+
+        logger.info(
+            f"Carga particionada en {self.table.name}: {len(parts)} particiones, "
+            f"{len(df)} filas (two_phase={two_phase})"
+        )
+        return {
+            "inserted": sum(outcome["inserted"] for outcome in outcomes),
+            "updated": sum(outcome["updated"] for outcome in outcomes),
+            "partitions": len(parts)
+        }
@@ -0,0 +1,242 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+import logging
+import uuid
+from typing import Dict, Any, List, Optional, BinaryIO, Tuple
+from ..utils.diagnostics import count_round_trip
+from ..utils.rules import RuleSet
+
+logger = logging.getLogger(__name__)
+
+# Valores que el CSV usa para representar nulos
+NULL_TOKENS = ('', 'NULL', 'null', 'NaN', 'nan')
+
+class StagingLoader:
+    """
+    Carga set-based a través de una tabla temporal de staging:
+    COPY del archivo crudo -> validación en SQL -> un único INSERT ... SELECT.
+    Las filas rechazadas se guardan con su motivo en ingest_rejects.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        types: Dict[str, str],
+        required: List[str],
+        foreign_keys: Optional[Dict[str, str]] = None,
+        unique: Optional[List[str]] = None,
+        rules: Optional[RuleSet] = None
+    ):
+        self.table_name = table_name
+        self.types = types
+        self.columns = list(types)
+        self.required = required
+        self.foreign_keys = foreign_keys or {}
+        self.unique = unique or []
+        self.rules = rules or RuleSet({})
+        self.stage = f"stg_{table_name}"
+
+    def _cast(self, column: str) -> str:
+        """Expresión SQL que convierte la columna cruda a su tipo final"""
+        sql_type = self.types[column]
+        if sql_type == "text":
+            return column
+        if sql_type == "timestamp":
+            # Igual que pd.to_datetime(errors='coerce'): inválido -> NULL
+            return f"CASE WHEN pg_input_is_valid({column}, 'timestamp') THEN {column}::timestamp END"
+        return f"{column}::{sql_type}"
+
+    def _create_stage(self, db: Session) -> None:
+        columns = ", ".join(f"{col} text" for col in self.columns)
+        db.execute(text(f"DROP TABLE IF EXISTS {self.stage}"))
+        db.execute(text(
+            f"CREATE TEMP TABLE {self.stage} "
+            f"(row_number bigserial, {columns}, reason text) ON COMMIT DROP"
+        ))
+
+    def _copy_raw(self, source: BinaryIO, db: Session) -> None:
+        raw_connection = db.connection().connection
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {self.stage} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT csv)",
+                source
+            )
+        count_round_trip()
+
+    def _normalize(self, db: Session) -> None:
+        tokens = ", ".join(f"'{token}'" for token in NULL_TOKENS)
+        assignments = ", ".join(
+            f"{col} = CASE WHEN btrim({col}) IN ({tokens}) THEN NULL ELSE btrim({col}) END"
+            for col in self.columns
+        )
+        db.execute(text(f"UPDATE {self.stage} SET {assignments}"))
+
+    def _validate(self, db: Session, update_existing: bool, keep: str = "first") -> None:
+        """
+        Marcar filas inválidas con su motivo (primer motivo que aplique), en el
+        mismo orden que los demás modos: chequeos de la fila (nulos, tipos y
+        reglas), después duplicados dentro del archivo y por último los
+        chequeos contra la base (FKs e ids existentes). Así una primera copia
+        con FK desconocida descarta también a las repetidas, como en orm/copy.
+        """
+        checks = [f"WHEN {col} IS NULL THEN 'null_{col}'" for col in self.required]
+        for col, sql_type in self.types.items():
+            if sql_type not in ("text", "timestamp"):
+                checks.append(
+                    f"WHEN {col} IS NOT NULL AND NOT pg_input_is_valid({col}, '{sql_type}') "
+                    f"THEN 'invalid_{col}'"
+                )
+        # Mismas reglas que la carga por lotes y los esquemas (utils/rules.py)
+        for col, rules in self.rules.rules.items():
+            for rule in rules:
+                checks.append(
+                    f"WHEN {rule.sql.format(value=self._cast(col))} THEN '{rule.reason}_{col}'"
+                )
+        db.execute(text(f"UPDATE {self.stage} SET reason = CASE {' '.join(checks)} END"))
+
+        # Duplicados dentro del archivo: para el id según keep (primera o
+        # última aparición, o "reject" para todas); para las demás columnas
+        # únicas gana siempre la primera
+        for col in ["id"] + self.unique:
+            key = self._cast(col)
+            policy = keep if col == "id" else "first"
+            if policy == "reject":
+                duplicated = f"count(*) OVER (PARTITION BY {key}) > 1"
+            else:
+                order = "DESC" if policy == "last" else ""
+                duplicated = f"row_number() OVER (PARTITION BY {key} ORDER BY row_number {order}) > 1"
+            db.execute(text(f"""
+                UPDATE {self.stage} s SET reason = 'duplicate_{col}'
+                FROM (
+                    SELECT row_number, {duplicated} AS duplicated
+                    FROM {self.stage}
+                    WHERE reason IS NULL AND {col} IS NOT NULL
+                ) d
+                WHERE s.row_number = d.row_number AND d.duplicated
+            """))
+
+        checks = []
+        for col, ref_table in self.foreign_keys.items():
+            checks.append(
+                f"WHEN {col} IS NOT NULL AND NOT EXISTS "
+                f"(SELECT 1 FROM {ref_table} r WHERE r.id = {self.stage}.{col}::integer) "
+                f"THEN 'unknown_{col}'"
+            )
+        if not update_existing:
+            checks.append(
+                f"WHEN EXISTS (SELECT 1 FROM {self.table_name} t WHERE t.id = {self.stage}.id::integer) "
+                f"THEN 'existing_id'"
+            )
+        for col in self.unique:
+            checks.append(
+                f"WHEN EXISTS (SELECT 1 FROM {self.table_name} t "
+                f"WHERE t.{col} = {self.stage}.{col} AND t.id <> {self.stage}.id::integer) "
+                f"THEN 'existing_{col}'"
+            )
+        if checks:
+            db.execute(text(
+                f"UPDATE {self.stage} SET reason = CASE {' '.join(checks)} END WHERE reason IS NULL"
+            ))
+
+    def _write_rejects(self, db: Session, load_id: str) -> None:
+        raw_data = ", ".join(f"'{col}', {col}" for col in self.columns)
+        db.execute(text(f"""
+            INSERT INTO ingest_rejects
+                (load_id, table_name, row_number, record_id, reason, raw_data, created_at)
+            SELECT :load_id, :table_name, row_number, id, reason,
+                   jsonb_build_object({raw_data}), now() AT TIME ZONE 'UTC'
+            FROM {self.stage}
+            WHERE reason IS NOT NULL
+            ORDER BY row_number
+        """), {"load_id": load_id, "table_name": self.table_name})
+
+    def _insert_valid(self, db: Session, update_existing: bool) -> Tuple[int, int]:
+        """INSERT ... SELECT de las filas válidas; devuelve (insertados, actualizados)"""
+        columns = ", ".join(self.columns)
+        values = ", ".join(self._cast(col) for col in self.columns)
+        conflict = ""
+        if update_existing:
+            updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in self.columns if col != "id")
+            conflict = f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        row = db.execute(text(f"""
+            WITH written AS (
+                INSERT INTO {self.table_name} ({columns})
+                SELECT {values} FROM {self.stage}
+                WHERE reason IS NULL
+                ORDER BY row_number
+                {conflict}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted) AS inserted,
+                   count(*) FILTER (WHERE NOT inserted) AS updated
+            FROM written
+        """)).one()
+        return row.inserted, row.updated
+
+    def _collect_stats(self, db: Session) -> Dict[str, Any]:
+        nullable = [col for col in self.columns if col not in self.required]
+        null_counts = ", ".join(
+            f"count(*) FILTER (WHERE reason IS NULL AND {self._cast(col)} IS NULL) AS null_{col}"
+            for col in nullable
+        )
+        select = "count(*) AS total_rows"
+        if null_counts:
+            select += f", {null_counts}"
+        totals = db.execute(text(f"SELECT {select} FROM {self.stage}")).mappings().one()
+
+        rejected = dict(db.execute(text(f"""
+            SELECT reason, count(*) FROM {self.stage}
+            WHERE reason IS NOT NULL GROUP BY reason ORDER BY reason
+        """)).all())
+
+        samples = db.execute(text(f"""
+            SELECT row_number, id, reason FROM {self.stage}
+            WHERE reason IS NOT NULL ORDER BY row_number LIMIT 5
+        """)).all()
+
+        return {
+            "total_rows": totals["total_rows"],
+            "null_counts": {col: totals[f"null_{col}"] for col in nullable},
+            "rejected": rejected,
+            "error_samples": [
+                f"Row {row.row_number} (ID {row.id}): {row.reason}" for row in samples
+            ]
+        }
+
+    def load(
+        self,
+        source: BinaryIO,
+        db: Session,
+        update_existing: bool = False,
+        keep: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecutar el pipeline completo en una sola transacción.
+
+        Returns:
+            dict: load_id, total_rows, inserted, updated, rejected (por motivo),
+                  null_counts y error_samples
+        """
+        load_id = uuid.uuid4().hex
+        try:
+            self._create_stage(db)
+            self._copy_raw(source, db)
+            self._normalize(db)
+            self._validate(db, update_existing, keep or "first")
+            self._write_rejects(db, load_id)
+            inserted, updated = self._insert_valid(db, update_existing)
+            stats = self._collect_stats(db)
+            db.execute(text(f"DROP TABLE IF EXISTS {self.stage}"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        stats["load_id"] = load_id
+        stats["inserted"] = inserted
+        stats["updated"] = updated
+        logger.info(
+            f"Staging {self.table_name}: {inserted} insertados, {updated} actualizados, "
+            f"{sum(stats['rejected'].values())} rechazados (load_id={load_id})"
+        )
+        return stats
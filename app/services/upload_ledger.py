@@ -0,0 +1,187 @@
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional, BinaryIO, Tuple
+import hashlib
+import logging
+from ..config import get_config
+from ..models import UploadLedgerEntry
+from ..utils.diagnostics import stage
+
+logger = logging.getLogger(__name__)
+
+class LedgerEntry:
+    """Estado de una carga registrada en el ledger durante su ejecución"""
+
+    def __init__(self, entry_id: int, content_hash: str, resume_from: int = 0):
+        self.id = entry_id
+        self.content_hash = content_hash
+        self.resume_from = resume_from
+        # Filas del archivo cubiertas por lo ya confirmado; se persiste en cada commit
+        self.pending_offset = resume_from
+        self.replayed_summary: Optional[Dict[str, Any]] = None
+
+class UploadLedger:
+    """
+    Registro de archivos cargados por hash de contenido.
+
+    Un archivo idéntico ya cargado con las mismas políticas (keep, fk_policy,
+    load_mode) devuelve el resumen guardado sin volver a procesarse; con otras
+    políticas es una carga distinta. Una carga interrumpida guarda el offset de la última fila
+    confirmada (se actualiza en la misma transacción de cada lote), y el
+    reintento del mismo archivo continúa desde ahí.
+    """
+
+    def __init__(self, table_name: str, rows_key: str):
+        self.table_name = table_name
+        self.rows_key = rows_key
+
+    @staticmethod
+    def content_hash(source: BinaryIO, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+        """SHA-256 y tamaño del archivo, dejándolo posicionado al inicio"""
+        digest = hashlib.sha256()
+        size = 0
+        source.seek(0)
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        source.seek(0)
+        return digest.hexdigest(), size
+
+    @staticmethod
+    def options_key(options: Optional[Dict[str, Optional[str]]]) -> str:
+        """Clave canónica de las políticas efectivas de una carga"""
+        return ",".join(f"{name}={value or ''}" for name, value in sorted((options or {}).items()))
+
+    def claim(
+        self,
+        db: Session,
+        content_hash: str,
+        file_size: int,
+        file_format: str,
+        update_existing: bool,
+        force: bool = False,
+        load_options: str = ""
+    ) -> LedgerEntry:
+        """Registrar la carga o retomar la existente (409 si otra la está ejecutando)"""
+        now = datetime.utcnow()
+        table = UploadLedgerEntry.__table__
+        entry_id = db.execute(
+            pg_insert(table).values(
+                table_name=self.table_name,
+                content_hash=content_hash,
+                update_existing=update_existing,
+                load_options=load_options,
+                file_format=file_format,
+                file_size=file_size,
+                committed_offset=0,
+                status="in_progress",
+                created_at=now,
+                updated_at=now
+            ).on_conflict_do_nothing(constraint="uq_upload_ledger_content").returning(table.c.id)
+        ).scalar()
+        if entry_id is not None:
+            db.commit()
+            return LedgerEntry(entry_id, content_hash)
+
+        row = db.execute(
+            select(UploadLedgerEntry).where(
+                UploadLedgerEntry.table_name == self.table_name,
+                UploadLedgerEntry.content_hash == content_hash,
+                UploadLedgerEntry.update_existing == update_existing,
+                UploadLedgerEntry.load_options == load_options
+            ).with_for_update()
+        ).scalar_one()
+        entry = LedgerEntry(row.id, content_hash)
+
+        if row.status == "completed" and not force:
+            entry.replayed_summary = row.summary
+            db.commit()
+            return entry
+
+        lease = timedelta(seconds=get_config().UPLOAD_LEDGER_LEASE_SECONDS)
+        if row.status == "in_progress" and row.updated_at > now - lease:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="An identical upload is already in progress")
+
+        entry.resume_from = entry.pending_offset = 0 if force else row.committed_offset
+        row.status = "in_progress"
+        row.committed_offset = entry.resume_from
+        row.error = None
+        row.updated_at = now
+        db.commit()
+        return entry
+
+    def _persist_offset(self, db: Session, entry: LedgerEntry) -> None:
+        """Guardar el offset confirmado en la misma transacción del lote (before_commit)"""
+        db.execute(
+            update(UploadLedgerEntry)
+            .where(UploadLedgerEntry.id == entry.id)
+            .values(committed_offset=entry.pending_offset, updated_at=datetime.utcnow())
+        )
+
+    def _finish(self, db: Session, entry: LedgerEntry, status: str, **values: Any) -> None:
+        db.execute(
+            update(UploadLedgerEntry)
+            .where(UploadLedgerEntry.id == entry.id)
+            .values(status=status, updated_at=datetime.utcnow(), **values)
+        )
+        db.commit()
+
+    def run(
+        self,
+        db: Session,
+        file: UploadFile,
+        file_format: str,
+        update_existing: bool,
+        force: bool,
+        load: Callable[[LedgerEntry], Dict[str, Any]],
+        options: Optional[Dict[str, Optional[str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecutar load(entry) registrando la carga en el ledger. options son
+        las políticas efectivas de la carga y forman parte de su clave.
+
+        Returns:
+            dict: resumen de la carga (o el guardado si el archivo ya se cargó)
+                  con un bloque "ledger"
+        """
+        with stage("read"):
+            content_hash, file_size = self.content_hash(file.file)
+        entry = self.claim(
+            db, content_hash, file_size, file_format, update_existing, force, self.options_key(options)
+        )
+        if entry.replayed_summary is not None:
+            logger.info(f"Archivo ya cargado en {self.table_name} (hash {content_hash[:12]}), se devuelve el resumen guardado")
+            return {**entry.replayed_summary, "ledger": self.describe(entry, replayed=True)}
+
+        persist = lambda session: self._persist_offset(session, entry)
+        event.listen(db, "before_commit", persist)
+        try:
+            result = load(entry)
+        except Exception as e:
+            event.remove(db, "before_commit", persist)
+            db.rollback()
+            error = e.detail if isinstance(e, HTTPException) else e
+            self._finish(db, entry, "failed", error=str(error))
+            raise
+        event.remove(db, "before_commit", persist)
+
+        summary = result.get("summary", {})
+        self._finish(
+            db, entry, "completed",
+            summary=result,
+            row_count=summary.get(self.rows_key),
+            committed_offset=summary.get(self.rows_key) or entry.pending_offset
+        )
+        return {**result, "ledger": self.describe(entry, replayed=False)}
+
+    def describe(self, entry: LedgerEntry, replayed: bool) -> Dict[str, Any]:
+        return {
+            "upload_id": entry.id,
+            "content_hash": entry.content_hash,
+            "replayed": replayed,
+            "resumed_from_row": entry.resume_from
+        }
@@ -1 +1 @@
-from .validators import validate_file_size, validate_csv_format, validate_required_columns
\ No newline at end of file
+from .validators import validate_file_size, validate_csv_format, validate_required_columns, validate_load_mode, validate_upload_format, validate_fk_policy, validate_dedup_policy, validate_date_range, validate_cube
\ No newline at end of file
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+
+def duplicate_mask(ids: pd.Series, keep: str) -> np.ndarray:
+    """
+    Filas a descartar por id repetido, de forma vectorizada.
+
+    keep="first" o "last" conserva esa aparición; keep="reject" descarta
+    todas las apariciones de un id repetido. Los ids nulos nunca se marcan.
+    """
+    present = ids.notna().to_numpy()
+    duplicated = ids.duplicated(keep=False if keep == "reject" else keep).to_numpy()
+    return present & duplicated
+
+class DuplicateStats:
+    """Acumulador de duplicados descartados para el resumen de la carga"""
+
+    def __init__(self, keep: str, max_samples: int = 5):
+        self.keep = keep
+        self.max_samples = max_samples
+        self.count = 0
+        self.sample_ids: List[int] = []
+
+    def add(self, dropped_ids: pd.Series) -> None:
+        self.count += len(dropped_ids)
+        if len(self.sample_ids) < self.max_samples:
+            for row_id in dropped_ids.drop_duplicates().tolist():
+                if row_id not in self.sample_ids:
+                    self.sample_ids.append(int(row_id))
+                if len(self.sample_ids) >= self.max_samples:
+                    break
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"policy": self.keep, "count": self.count, "sample_ids": self.sample_ids}
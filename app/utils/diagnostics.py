@@ -0,0 +1,297 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, TypeVar
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Etapas del pipeline de carga, en orden
+STAGES = ("read", "parse", "transform", "validate", "write", "commit")
+
+_current: ContextVar[Optional["IngestDiagnostics"]] = ContextVar("ingest_diagnostics", default=None)
+
+def _rss_bytes() -> int:
+    """RSS actual del proceso (/proc en Linux; pico de getrusage como respaldo)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+# tracemalloc es global al proceso: una sola carga a la vez lo usa (reset_peak
+# y stop afectarían a las demás); las concurrentes muestrean RSS
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_owner: Optional["MemorySampler"] = None
+
+class MemorySampler:
+    """
+    Pico de memoria durante una carga: RSS muestreado en un thread cada
+    interval segundos, o pico de tracemalloc (más preciso, pero con costo en
+    cada asignación y global al proceso). Si otra carga ya está usando
+    tracemalloc, esta mide por RSS.
+    """
+
+    def __init__(self, source: str = "rss", interval: float = 0.05):
+        self.source = source
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracing = False
+
+    def _acquire_tracemalloc(self) -> bool:
+        global _tracemalloc_owner
+        with _tracemalloc_lock:
+            if _tracemalloc_owner is not None:
+                return False
+            _tracemalloc_owner = self
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+            return True
+
+    def _release_tracemalloc(self) -> None:
+        global _tracemalloc_owner
+        with _tracemalloc_lock:
+            if _tracemalloc_owner is not self:
+                return
+            self.peak = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+            _tracemalloc_owner = None
+
+    def start(self) -> None:
+        if self.source == "tracemalloc":
+            if self._acquire_tracemalloc():
+                return
+            logger.info("tracemalloc en uso por otra carga, se mide el pico por RSS")
+            self.source = "rss"
+        if self.source != "rss":
+            return
+        self.baseline = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self) -> None:
+        if self.source == "tracemalloc":
+            self._release_tracemalloc()
+            return
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, _rss_bytes())
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.source not in ("rss", "tracemalloc"):
+            return {"source": "off"}
+        return {
+            "source": self.source,
+            "peak_mb": round(self.peak / 1024 / 1024, 1),
+            "delta_mb": round((self.peak - self.baseline) / 1024 / 1024, 1)
+        }
+
+class TimedReader:
+    """Envoltorio de lectura que imputa el tiempo de read() a la etapa "read" """
+
+    def __init__(self, source: BinaryIO, diagnostics: "IngestDiagnostics"):
+        self.source = source
+        self.diagnostics = diagnostics
+
+    def read(self, size: int = -1) -> bytes:
+        with self.diagnostics.stage("read"):
+            return self.source.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        with self.diagnostics.stage("read"):
+            return self.source.readline(size)
+
+    @property
+    def closed(self) -> bool:
+        return getattr(self.source, "closed", False)
+
+    def readable(self) -> bool:
+        return True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+class IngestDiagnostics:
+    """
+    Contabilidad de recursos de una carga: tiempo por etapa, filas/s, pico de
+    memoria y round trips a la base.
+
+    Los tiempos son exclusivos: una etapa anidada en otra (p. ej. "read"
+    dentro de "parse", o "commit" dentro de "write") se descuenta de la
+    externa. Las etapas medidas desde otros threads (lectores de pyarrow,
+    particiones) se suman sin descontarse, por lo que pueden solaparse.
+    """
+
+    def __init__(self, table_name: str, memory: Optional[str] = None):
+        self.table_name = table_name
+        self.stages: Dict[str, float] = {name: 0.0 for name in STAGES}
+        self.round_trips = 0
+        self.memory = MemorySampler(memory or get_config().DIAGNOSTICS_MEMORY)
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._owner = threading.get_ident()
+        self._stack: List[List[Any]] = []
+        self._lock = threading.Lock()
+
+    def _push(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _pop(self, name: str) -> None:
+        if not self._stack or self._stack[-1][0] != name:
+            return
+        _, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if threading.get_ident() != self._owner:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            return
+        self._push(name)
+        try:
+            yield
+        finally:
+            self._pop(name)
+
+    def iterate(self, items: Iterable[T], name: str) -> Iterator[T]:
+        """Recorrer un iterador imputando cada next() a la etapa name"""
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count_round_trip(self, count: int = 1) -> None:
+        with self._lock:
+            self.round_trips += count
+
+    def _before_commit(self, session: Session) -> None:
+        if threading.get_ident() == self._owner:
+            self._push("commit")
+
+    def _after_commit(self, session: Session) -> None:
+        if threading.get_ident() == self._owner:
+            self._pop("commit")
+
+    @classmethod
+    @contextmanager
+    def track(cls, table_name: str, db: Session) -> Iterator["IngestDiagnostics"]:
+        """
+        Medir la carga ejecutada dentro del bloque. Deja la instancia activa
+        en el contexto para que stage() y count_round_trip() la encuentren.
+        """
+        diagnostics = cls(table_name)
+        token = _current.set(diagnostics)
+        event.listen(db, "before_commit", diagnostics._before_commit)
+        event.listen(db, "after_commit", diagnostics._after_commit)
+        event.listen(db, "after_rollback", diagnostics._after_commit)
+        diagnostics.memory.start()
+        diagnostics.started = time.perf_counter()
+        try:
+            yield diagnostics
+        except Exception as e:
+            diagnostics.finish()
+            diagnostics.log(status="failed", error=str(getattr(e, "detail", e)))
+            raise
+        finally:
+            event.remove(db, "before_commit", diagnostics._before_commit)
+            event.remove(db, "after_commit", diagnostics._after_commit)
+            event.remove(db, "after_rollback", diagnostics._after_commit)
+            _current.reset(token)
+
+    def finish(self) -> None:
+        if not self.elapsed:
+            self.elapsed = time.perf_counter() - self.started
+            self.memory.stop()
+
+    def to_dict(self, rows: Optional[int] = None) -> Dict[str, Any]:
+        self.finish()
+        rows = rows or 0
+        return {
+            "elapsed_seconds": round(self.elapsed, 4),
+            "stages_seconds": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "rows": rows,
+            "rows_per_second": round(rows / self.elapsed, 1) if self.elapsed > 0 else None,
+            "memory": self.memory.to_dict(),
+            "db_round_trips": self.round_trips
+        }
+
+    def log(self, rows: Optional[int] = None, status: str = "completed", **extra: Any) -> Dict[str, Any]:
+        """Emitir una línea de log JSON (event=ingest_diagnostics) para dashboards"""
+        report = self.to_dict(rows)
+        logger.info(json.dumps({
+            "event": "ingest_diagnostics",
+            "table": self.table_name,
+            "status": status,
+            **report,
+            **extra
+        }))
+        return report
+
+    def report(self, result: Dict[str, Any], rows_key: str, include: bool) -> Dict[str, Any]:
+        """Loguear las métricas y, si include, agregarlas al resumen como "diagnostics" """
+        summary = result.get("summary", {})
+        report = self.log(summary.get(rows_key), ledger_replayed=result.get("ledger", {}).get("replayed"))
+        if include:
+            result = {**result, "summary": {**summary, "diagnostics": report}}
+        return result
+
+def current_diagnostics() -> Optional[IngestDiagnostics]:
+    return _current.get()
+
+def stage(name: str):
+    """Etapa de la carga activa (no-op fuera de IngestDiagnostics.track)"""
+    diagnostics = _current.get()
+    return diagnostics.stage(name) if diagnostics else nullcontext()
+
+def count_round_trip(count: int = 1) -> None:
+    """Contar round trips que no pasan por SQLAlchemy (COPY sobre el cursor psycopg2)"""
+    diagnostics = _current.get()
+    if diagnostics:
+        diagnostics.count_round_trip(count)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    count_round_trip()
@@ -0,0 +1,83 @@
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from functools import partial
+from typing import Callable, Iterable, Iterator, Optional, TypeVar, Any
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Pool de threads para trabajo bloqueante (DB, lectura de archivos)"""
+    global _io_executor
+    with _lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=get_config().IO_WORKERS,
+                thread_name_prefix="io"
+            )
+        return _io_executor
+
+def cpu_workers() -> int:
+    """Cantidad de procesos del pool CPU (Config.CPU_WORKERS o núcleos disponibles)"""
+    return get_config().CPU_WORKERS or os.cpu_count() or 1
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """Pool de procesos para parseo/transformación CPU-bound"""
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is None:
+            workers = cpu_workers()
+            # spawn: los workers no heredan threads ni conexiones del proceso padre
+            _cpu_executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Pool de procesos iniciado con {workers} workers")
+        return _cpu_executor
+
+async def run_io(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Ejecutar una función bloqueante en el pool de I/O sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), partial(fn, *args, **kwargs))
+
+def map_ordered(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_inflight: int
+) -> Iterator[R]:
+    """
+    Como executor.map pero consumiendo items de forma perezosa: como máximo
+    max_inflight tareas en vuelo, y resultados en el orden de entrada.
+    Mantiene la memoria acotada al procesar archivos grandes.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_inflight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def shutdown_executors() -> None:
+    """Cerrar los pools (se recrean bajo demanda)"""
+    global _io_executor, _cpu_executor
+    with _lock:
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=False)
+            _io_executor = None
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
@@ -0,0 +1,281 @@
+from fastapi import HTTPException
+from typing import Any, BinaryIO, Iterator, List, Dict, Optional
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Valores que los CSV del challenge usan para representar nulos
+NA_VALUES = ['', 'NULL', 'null', 'NaN', 'nan']
+
+class UploadTooLargeError(Exception):
+    """El archivo superó el tamaño máximo permitido durante la lectura"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File size exceeds maximum allowed ({max_size/1024/1024}MB)")
+
+class LimitedReader:
+    """
+    Envoltorio de solo lectura que cuenta los bytes leídos y corta la lectura
+    en cuanto se supera max_size. Permite validar el tamaño mientras se
+    procesa el archivo, sin leerlo antes completo.
+    """
+
+    def __init__(self, source: BinaryIO, max_size: Optional[int] = None):
+        self.source = source
+        self.max_size = max_size
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.source.read(size)
+        self.bytes_read += len(chunk)
+        if self.max_size and self.bytes_read > self.max_size:
+            raise UploadTooLargeError(self.max_size)
+        return chunk
+
+    def readline(self, size: int = -1) -> bytes:
+        line = self.source.readline(size)
+        self.bytes_read += len(line)
+        if self.max_size and self.bytes_read > self.max_size:
+            raise UploadTooLargeError(self.max_size)
+        return line
+
+    @property
+    def closed(self) -> bool:
+        return getattr(self.source, "closed", False)
+
+    def readable(self) -> bool:
+        return True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+def file_size(source: BinaryIO) -> int:
+    """Tamaño de un archivo seekable sin leer su contenido"""
+    position = source.tell()
+    source.seek(0, 2)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+# Parsers de CSV disponibles (Config.CSV_PARSER)
+CSV_PARSERS = ("pandas", "pyarrow")
+
+def read_csv_chunks(
+    source: BinaryIO,
+    columns: List[str],
+    dtype: Dict[str, str],
+    chunksize: Optional[int] = None,
+    parser: str = "pandas",
+    timestamps: Optional[Dict[str, str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Leer un CSV sin headers como una secuencia de DataFrames.
+
+    Con chunksize el archivo se parsea por bloques de tamaño fijo, por lo que
+    la memoria no depende del tamaño del archivo; sin chunksize se devuelve
+    un único DataFrame con todo el archivo.
+
+    parser="pyarrow" usa el lector multihilo de pyarrow y convierte en la
+    misma pasada las columnas de timestamps (formato por columna, inválido ->
+    NaT) y los strings a categorías; si pyarrow no está instalado se usa pandas,
+    que deja los timestamps como texto.
+    """
+    if parser == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.warning("pyarrow no está instalado, se usa el parser de pandas")
+        else:
+            yield from _read_csv_pyarrow(source, columns, dtype, chunksize, timestamps or {})
+            return
+
+    options = dict(
+        header=None,
+        names=columns,
+        na_values=NA_VALUES,
+        keep_default_na=True,
+        dtype=dtype
+    )
+    if chunksize:
+        with pd.read_csv(source, chunksize=chunksize, **options) as reader:
+            yield from reader
+    else:
+        yield pd.read_csv(source, **options)
+
+def _read_csv_pyarrow(
+    source: BinaryIO,
+    columns: List[str],
+    dtype: Dict[str, str],
+    chunksize: Optional[int],
+    timestamps: Dict[str, str]
+) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pa_compute
+
+    column_types = {}
+    for column in columns:
+        if column in timestamps:
+            column_types[column] = pa.string()
+        elif str(dtype.get(column)).lower().startswith("int"):
+            column_types[column] = pa.int64()
+        else:
+            column_types[column] = pa.dictionary(pa.int32(), pa.string())
+    read_options = pa_csv.ReadOptions(column_names=columns, use_threads=True)
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        null_values=NA_VALUES,
+        strings_can_be_null=True
+    )
+
+    def to_frame(table) -> pd.DataFrame:
+        for column, fmt in timestamps.items():
+            parsed = pa_compute.strptime(table[column], format=fmt, unit="s", error_is_null=True)
+            table = table.set_column(table.schema.get_field_index(column), column, parsed)
+        return table.to_pandas(types_mapper=_arrow_types_mapper)
+
+    if not chunksize:
+        # Lectura completa: los bloques se parsean en paralelo en el pool de pyarrow
+        yield to_frame(pa_csv.read_csv(source, read_options=read_options, convert_options=convert_options))
+        return
+
+    # Streaming: los record batches (por bytes) se reagrupan en bloques de chunksize filas
+    reader = pa_csv.open_csv(source, read_options=read_options, convert_options=convert_options)
+    pending, rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield to_frame(table.slice(0, chunksize))
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield to_frame(pa.Table.from_batches(pending, schema=reader.schema))
+
+def iter_line_blocks(source: BinaryIO, block_size: int) -> Iterator[bytes]:
+    """
+    Partir un archivo en bloques de ~block_size bytes que terminan siempre
+    en fin de línea, para poder parsearlos de forma independiente.
+    Asume que no hay saltos de línea dentro de campos entrecomillados.
+    """
+    while True:
+        block = source.read(block_size)
+        if not block:
+            return
+        if not block.endswith(b"\n"):
+            block += source.readline()
+        yield block
+
+def _float_to_int64(values: pd.Series) -> pd.Series:
+    """float -> Int64 nullable; un valor no entero es un archivo inválido (como en el CSV)"""
+    present = values.dropna()
+    if not (present % 1 == 0).all():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Column {values.name} must contain integer values"
+        )
+    return values.astype("Int64")
+
+def _arrow_types_mapper(arrow_type):
+    """Enteros de Arrow -> Int64 nullable de pandas (sin pasar por float)"""
+    import pyarrow as pa
+    if pa.types.is_integer(arrow_type):
+        return pd.Int64Dtype()
+    return None
+
+def read_columnar_chunks(
+    source: BinaryIO,
+    file_format: str,
+    columns: List[str],
+    batch_size: Optional[int] = None,
+    dtype: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Leer un archivo Parquet o Arrow IPC con pyarrow como secuencia de
+    DataFrames, conservando los tipos (enteros y timestamps) sin pasar por texto.
+    Las columnas se seleccionan por nombre. Las columnas Int64 de dtype que
+    el archivo trae como float (p. ej. ids con nulos exportados desde pandas)
+    se convierten a Int64, igual que en el CSV.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet/Arrow uploads require pyarrow")
+
+    def check_columns(names: List[str]) -> None:
+        missing = [col for col in columns if col not in names]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing required columns: {', '.join(missing)}"
+            )
+
+    if file_format == "parquet":
+        parquet = pq.ParquetFile(source)
+        check_columns(parquet.schema_arrow.names)
+        if batch_size:
+            batches = parquet.iter_batches(batch_size=batch_size, columns=columns)
+        else:
+            batches = iter([parquet.read(columns=columns)])
+    else:
+        # Formato de archivo IPC (random access) o, si no, formato stream
+        try:
+            reader = pa.ipc.open_file(source)
+            check_columns(reader.schema.names)
+            if batch_size:
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            else:
+                batches = iter([reader.read_all()])
+        except pa.ArrowInvalid:
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            check_columns(reader.schema.names)
+            batches = iter(reader) if batch_size else iter([reader.read_all()])
+
+    integer_columns = [col for col, kind in (dtype or {}).items() if kind == "Int64" and col in columns]
+    for batch in batches:
+        df = batch.select(columns).to_pandas(types_mapper=_arrow_types_mapper)
+        for col in integer_columns:
+            if pd.api.types.is_float_dtype(df[col]):
+                df[col] = _float_to_int64(df[col])
+        yield df
+
+def read_key_columns(
+    source: BinaryIO,
+    file_format: str,
+    columns: List[str],
+    keys: List[str],
+    dtype: Dict[str, Any],
+    chunksize: int = 1_000_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Leer solo las columnas keys de todo el archivo, por bloques (por posición
+    en columns en el CSV sin headers, por nombre en Parquet/Arrow). Se usa
+    como pre-pasada para deduplicar cuando el archivo se procesa por bloques.
+    """
+    key_dtype = {col: kind for col, kind in dtype.items() if col in keys}
+    if file_format != "csv":
+        yield from read_columnar_chunks(source, file_format, keys, chunksize, key_dtype)
+        return
+    with pd.read_csv(
+        source,
+        header=None,
+        names=columns,
+        usecols=keys,
+        na_values=NA_VALUES,
+        keep_default_na=True,
+        dtype=key_dtype,
+        chunksize=chunksize
+    ) as reader:
+        yield from reader
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List
+
+class Rule:
+    """
+    Regla de validación definida una sola vez como chequeo vectorizado sobre
+    una Series. La carga masiva la aplica a bloques completos y los esquemas
+    de pydantic a un único valor (una Series de un elemento), así ambos
+    caminos comparten exactamente la misma definición.
+
+    sql es el mismo chequeo como predicado SQL sobre {value} (la columna ya
+    convertida), que el staging usa con el motivo "<reason>_<columna>".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        message: str,
+        violates: Callable[[pd.Series], Any],
+        reason: str,
+        sql: str
+    ):
+        self.name = name
+        self.message = message
+        self.violates = violates
+        self.reason = reason
+        self.sql = sql
+
+    def mask(self, values: pd.Series) -> np.ndarray:
+        """Filas que violan la regla; los nulos nunca la violan"""
+        present = values.notna().to_numpy()
+        if not present.any():
+            return present
+        violated = pd.Series(self.violates(values), index=values.index)
+        return present & violated.fillna(False).to_numpy(dtype=bool)
+
+    def check_value(self, value: Any) -> Any:
+        """Validar un valor suelto (validators de pydantic)"""
+        if value is not None and self.mask(pd.Series([value]))[0]:
+            raise ValueError(self.message)
+        return value
+
+def _utcnow_like(values: pd.Series) -> pd.Timestamp:
+    """Instante actual en UTC, con o sin zona según la columna"""
+    now = pd.Timestamp.now(tz="UTC")
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return now
+    return now.tz_localize(None)
+
+positive = Rule(
+    "positive",
+    "ID must be positive",
+    lambda values: values <= 0,
+    reason="nonpositive",
+    sql="{value} <= 0"
+)
+not_future = Rule(
+    "not_future",
+    "Datetime cannot be in the future",
+    lambda values: values > _utcnow_like(values),
+    reason="future",
+    sql="{value} > (now() AT TIME ZONE 'UTC')"
+)
+
+class RuleSet:
+    """Reglas por columna de una tabla"""
+
+    def __init__(self, rules: Dict[str, List[Rule]]):
+        self.rules = rules
+
+    def check_value(self, column: str, value: Any) -> Any:
+        for rule in self.rules.get(column, []):
+            value = rule.check_value(value)
+        return value
+
+    def evaluate(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Evaluar todas las reglas sobre un bloque.
+
+        Returns:
+            dict: máscara de violaciones por "columna:regla"
+        """
+        return {
+            f"{column}:{rule.name}": rule.mask(df[column])
+            for column, rules in self.rules.items()
+            if column in df
+            for rule in rules
+        }
+
+class RuleViolations:
+    """Acumulador de violaciones por regla (cantidad y filas del archivo)"""
+
+    def __init__(self, rule_set: RuleSet, max_rows: int = 20):
+        self.max_rows = max_rows
+        self.counts: Dict[str, int] = {
+            f"{column}:{rule.name}": 0
+            for column, rules in rule_set.rules.items()
+            for rule in rules
+        }
+        self.rows: Dict[str, List[int]] = {key: [] for key in self.counts}
+
+    def add(self, masks: Dict[str, np.ndarray], row_numbers: np.ndarray) -> np.ndarray:
+        """
+        Registrar las violaciones de un bloque.
+
+        Args:
+            masks: resultado de RuleSet.evaluate
+            row_numbers: posición en el archivo de cada fila del bloque
+
+        Returns:
+            np.ndarray: máscara de filas que violan alguna regla
+        """
+        invalid = np.zeros(len(row_numbers), dtype=bool)
+        for key, mask in masks.items():
+            count = int(mask.sum())
+            if not count:
+                continue
+            self.counts[key] += count
+            room = self.max_rows - len(self.rows[key])
+            if room > 0:
+                self.rows[key].extend(int(row) for row in row_numbers[mask][:room])
+            invalid |= mask
+        return invalid
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"count": count, "rows": self.rows[key]}
+            for key, count in self.counts.items()
+        }
+
+class ErrorLog(list):
+    """
+    Mensajes de error por fila con memoria acotada: guarda los primeros
+    max_messages y del resto solo lleva la cuenta en total, así una carga
+    por bloques de un archivo sucio no crece con el tamaño del archivo.
+    """
+
+    def __init__(self, max_messages: int = 5):
+        super().__init__()
+        self.max_messages = max_messages
+        self.total = 0
+
+    def append(self, message: str) -> None:
+        self.total += 1
+        if len(self) < self.max_messages:
+            super().append(message)
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+EMPLOYEE_RULES = RuleSet({
+    "department_id": [positive],
+    "job_id": [positive],
+    "datetime": [not_future]
+})
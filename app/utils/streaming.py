@@ -0,0 +1,123 @@
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Formatos de salida por streaming, por media type del header Accept
+STREAM_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow"
+}
+
+# Columnas de un resultado: (nombre, tipo) con tipo "string" o "int64"
+Columns = Sequence[Tuple[str, str]]
+RowBatches = AsyncIterator[Sequence[Sequence[Any]]]
+
+def _arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def negotiate_stream_format(accept: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Elegir el formato de streaming según Accept (respetando q).
+
+    Returns:
+        tuple: (formato, media type), o None si corresponde la respuesta JSON
+    """
+    if not accept:
+        return None
+    choices = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *options = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for option in options:
+            if option.startswith("q="):
+                try:
+                    quality = float(option[2:])
+                except ValueError:
+                    quality = 0.0
+        choices.append((-quality, position, media_type.lower()))
+    for negative_quality, _, media_type in sorted(choices):
+        if negative_quality == 0:
+            break
+        if media_type in ("application/json", "*/*", "application/*"):
+            return None
+        output = STREAM_MEDIA_TYPES.get(media_type)
+        if output == "arrow" and not _arrow_available():
+            continue
+        if output:
+            return output, media_type
+    return None
+
+async def ndjson_stream(columns: Columns, batches: RowBatches) -> AsyncIterator[bytes]:
+    """Un objeto JSON por línea"""
+    names = [name for name, _ in columns]
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+async def csv_stream(columns: Columns, batches: RowBatches) -> AsyncIterator[bytes]:
+    """CSV con fila de headers"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+async def arrow_stream(columns: Columns, batches: RowBatches) -> AsyncIterator[bytes]:
+    """Arrow IPC (formato stream): un record batch por bloque de filas"""
+    import pyarrow as pa
+
+    schema = pa.schema([(name, pa.int64() if kind == "int64" else pa.string()) for name, kind in columns])
+    sink = io.BytesIO()
+
+    def flush() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield flush()
+        async for rows in batches:
+            arrays = [
+                pa.array([row[index] for row in rows], type=field.type)
+                for index, field in enumerate(schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield flush()
+    yield flush()
+
+STREAM_ENCODERS = {
+    "ndjson": ndjson_stream,
+    "csv": csv_stream,
+    "arrow": arrow_stream
+}
+
+async def encode_stream(output: str, columns: Columns, batches: RowBatches) -> AsyncIterator[bytes]:
+    """
+    Serializar los bloques de filas a medida que llegan. Un error a mitad
+    de camino ya no puede cambiar el status: se loguea y se corta la respuesta.
+    """
+    try:
+        async for chunk in STREAM_ENCODERS[output](columns, batches):
+            if chunk:
+                yield chunk
+    except Exception as e:
+        logger.error(f"Error durante el streaming ({output}): {e}")
+        raise
@@ -1,19 +1,36 @@
 from fastapi import HTTPException, UploadFile
-from typing import Set
+from typing import List, Set, Optional, Tuple
+from datetime import datetime, timezone
 import pandas as pd
+from ..config import get_config
+
+LOAD_MODES = ("orm", "copy", "staging", "parallel")
+FK_POLICIES = ("reject", "null")
+DEDUP_POLICIES = ("first", "last", "reject")
+CUBE_DIMENSIONS = ("department", "job", "year", "quarter", "month")
+CUBE_SUBTOTALS = ("rollup", "cube")
+
+# Extensiones aceptadas por formato de archivo
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow"
+}
 
 async def validate_file_size(file: UploadFile, max_size: int = 10 * 1024 * 1024):
-    """Validar tamaño del archivo"""
-    size = 0
-    content = await file.read(max_size + 1)
-    size = len(content)
-    await file.seek(0)
+    """Validar tamaño del archivo sin leer su contenido"""
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(0)
     
     if size > max_size:
         raise HTTPException(
             status_code=400,
             detail=f"File size exceeds maximum allowed ({max_size/1024/1024}MB)"
-        )  # Este era el paréntesis que faltaba
+        )
 
 async def validate_csv_format(file: UploadFile):
     """Validar formato básico del CSV"""
@@ -23,6 +40,17 @@ async def validate_csv_format(file: UploadFile):
             detail="File must be a CSV"
         )
 
+async def validate_upload_format(file: UploadFile) -> str:
+    """Validar extensión del archivo y devolver su formato (csv, parquet o arrow)"""
+    filename = (file.filename or "").lower()
+    for extension, file_format in UPLOAD_FORMATS.items():
+        if filename.endswith(extension):
+            return file_format
+    raise HTTPException(
+        status_code=400,
+        detail=f"File must be one of: {', '.join(UPLOAD_FORMATS)}"
+    )
+
 async def validate_required_columns(df: pd.DataFrame, required_columns: Set[str]):
     """Validar columnas requeridas en DataFrame"""
     missing_columns = required_columns - set(df.columns)
@@ -30,4 +58,90 @@ async def validate_required_columns(df: pd.DataFrame, required_columns: Set[str]
         raise HTTPException(
             status_code=400,
             detail=f"Missing required columns: {', '.join(missing_columns)}"
-        )
\ No newline at end of file
+        )
+
+def validate_load_mode(load_mode: Optional[str], allowed: Tuple[str, ...] = LOAD_MODES) -> str:
+    """Resolver modo de carga (request > Config.LOAD_MODE) y validarlo"""
+    mode = (load_mode or get_config().LOAD_MODE).lower()
+    if mode not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid load_mode '{mode}'. Allowed: {', '.join(allowed)}"
+        )
+    return mode
+
+def validate_fk_policy(fk_policy: Optional[str]) -> str:
+    """Resolver política de FKs desconocidas (request > Config.FK_POLICY) y validarla"""
+    policy = (fk_policy or get_config().FK_POLICY).lower()
+    if policy not in FK_POLICIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fk_policy '{policy}'. Allowed: {', '.join(FK_POLICIES)}"
+        )
+    return policy
+
+def validate_dedup_policy(keep: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """Resolver qué aparición de un id repetido se conserva (request > default) y validarla"""
+    policy = (keep or default or "").lower() or None
+    if policy is not None and policy not in DEDUP_POLICIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid keep '{policy}'. Allowed: {', '.join(DEDUP_POLICIES)}"
+        )
+    return policy
+
+def _naive_utc(value: datetime) -> datetime:
+    """Los timestamps se guardan sin zona, en UTC"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def validate_date_range(
+    year: Optional[int],
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Resolver el período de las métricas como rango semiabierto [start, end):
+    un año completo, from/to (cualquiera puede faltar) o, sin parámetros,
+    Config.METRICS_DEFAULT_YEAR.
+    """
+    if year is not None and (start is not None or end is not None):
+        raise HTTPException(status_code=400, detail="Use either year or from/to, not both")
+    if start is None and end is None:
+        year = year if year is not None else get_config().METRICS_DEFAULT_YEAR
+        if not 1 <= year < 9999:
+            raise HTTPException(status_code=400, detail=f"Invalid year {year}")
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    start = _naive_utc(start) if start is not None else None
+    end = _naive_utc(end) if end is not None else None
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+    return start, end
+
+def validate_cube(group_by: Optional[str], subtotals: Optional[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    Validar las dimensiones del cubo (lista separada por comas, en el orden
+    pedido y sin repetir) y el tipo de subtotales (rollup, cube o ninguno).
+    """
+    dimensions: List[str] = []
+    for name in (group_by or "").split(","):
+        name = name.strip().lower()
+        if not name or name in dimensions:
+            continue
+        if name not in CUBE_DIMENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid dimension '{name}'. Allowed: {', '.join(CUBE_DIMENSIONS)}"
+            )
+        dimensions.append(name)
+    subtotals = (subtotals or "").lower() or None
+    if subtotals is not None:
+        if subtotals not in CUBE_SUBTOTALS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid subtotals '{subtotals}'. Allowed: {', '.join(CUBE_SUBTOTALS)}"
+            )
+        if not dimensions:
+            raise HTTPException(status_code=400, detail="Subtotals require at least one dimension")
+    return dimensions, subtotals
@@ -0,0 +1,95 @@
+"""
+Benchmark de ingesta CSV vs Parquet sobre el mismo dataset sintético.
+
+Genera N empleados, los escribe como CSV sin headers y como Parquet, y carga
+cada archivo en hired_employees midiendo tiempo total y memoria pico
+(tracemalloc). La tabla se vacía antes de cada corrida.
+
+Uso:
+    DB_HOST=localhost python -m benchmarks.bench_formats --rows 200000 --load-mode copy
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import text
+
+from app.config import get_config
+from app.database import SessionLocal, engine, Base
+from app.services.employee_service import EmployeeService
+
+def build_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Empleados sintéticos sin FKs (las dimensiones no intervienen aquí)"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2021-01-01", tz="UTC")
+    return pd.DataFrame({
+        "id": pd.array(np.arange(1, rows + 1), dtype="Int64"),
+        "name": [f"Employee {i}" for i in range(1, rows + 1)],
+        "datetime": start + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, rows), unit="s"),
+        "department_id": pd.array([None] * rows, dtype="Int64"),
+        "job_id": pd.array([None] * rows, dtype="Int64")
+    })
+
+def encode(df: pd.DataFrame, file_format: str) -> bytes:
+    buffer = io.BytesIO()
+    if file_format == "csv":
+        out = df.copy()
+        out["datetime"] = out["datetime"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        out.to_csv(buffer, header=False, index=False)
+    else:
+        df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+def run(payload: bytes, file_format: str, load_mode: str, stream: bool) -> dict:
+    config = get_config()
+    config.MAX_UPLOAD_SIZE = 0
+    config.UPLOAD_LEDGER = False
+    db = SessionLocal()
+    try:
+        db.execute(text("TRUNCATE hired_employees"))
+        db.commit()
+        upload = UploadFile(file=io.BytesIO(payload), filename=f"bench.{file_format}")
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = EmployeeService().ingest(
+            upload, False, db, load_mode, stream=stream, file_format=file_format
+        )
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+
+    rows = result["summary"]["processed_successfully"]
+    return {
+        "format": file_format,
+        "file_bytes": len(payload),
+        "rows": rows,
+        "wall_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--load-mode", choices=["orm", "copy"], default="copy")
+    parser.add_argument("--stream", action="store_true", help="Leer por bloques de BATCH_SIZE")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    df = build_dataset(args.rows)
+    results = [
+        run(encode(df, file_format), file_format, args.load_mode, args.stream)
+        for file_format in ("csv", "parquet")
+    ]
+    print(json.dumps({"rows": args.rows, "load_mode": args.load_mode, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
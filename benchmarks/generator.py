@@ -0,0 +1,112 @@
+"""
+Generador de datos sintéticos para benchmarks.
+
+Produce departments, jobs y hired_employees referencialmente consistentes
+(toda FK no nula apunta a una dimensión generada) en el mismo formato que
+csv_data/: CSV sin headers con fechas ISO en UTC. Los empleados se escriben
+por bloques, así que la memoria no depende de la escala (10k a 10M filas).
+"""
+import argparse
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+EMPLOYEE_NULLABLE = ["name", "datetime", "department_id", "job_id"]
+YEAR_START = pd.Timestamp("2021-01-01", tz="UTC")
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+def dimension_frame(rows: int, label: str) -> pd.DataFrame:
+    ids = np.arange(1, rows + 1)
+    return pd.DataFrame({"id": ids, "name": [f"{label} {i}" for i in ids]})
+
+def employee_chunk(
+    rng: np.random.Generator,
+    first_id: int,
+    rows: int,
+    departments: int,
+    jobs: int,
+    null_rate: float,
+    duplicate_rate: float
+) -> pd.DataFrame:
+    """
+    Bloque de empleados con ids consecutivos desde first_id.
+
+    null_rate: fracción de filas con un nulo en una columna opcional al azar.
+    duplicate_rate: fracción de filas que repiten un id anterior del bloque.
+    """
+    ids = np.arange(first_id, first_id + rows)
+    duplicates = rng.random(rows) < duplicate_rate
+    duplicates[0] = False
+    # Cada duplicado copia el id de una fila anterior del mismo bloque
+    positions = np.arange(rows)
+    ids[duplicates] = ids[(rng.random(rows) * positions).astype(np.int64)[duplicates]]
+
+    seconds = rng.integers(0, SECONDS_PER_YEAR, rows)
+    df = pd.DataFrame({
+        "id": ids,
+        "name": [f"Employee {i}" for i in range(first_id, first_id + rows)],
+        "datetime": (YEAR_START + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "department_id": pd.array(rng.integers(1, departments + 1, rows), dtype="Int64"),
+        "job_id": pd.array(rng.integers(1, jobs + 1, rows), dtype="Int64")
+    })
+
+    nulls = rng.random(rows) < null_rate
+    null_columns = rng.integers(0, len(EMPLOYEE_NULLABLE), rows)
+    for index, column in enumerate(EMPLOYEE_NULLABLE):
+        df.loc[nulls & (null_columns == index), column] = None
+    return df
+
+def generate(
+    output_dir: str,
+    employees: int,
+    departments: int = 12,
+    jobs: int = 183,
+    null_rate: float = 0.0,
+    duplicate_rate: float = 0.0,
+    chunk_size: int = 500_000,
+    seed: int = 42
+) -> Dict[str, str]:
+    """
+    Escribir los tres CSV en output_dir.
+
+    Returns:
+        dict: tabla -> ruta del archivo generado
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {
+        "departments": os.path.join(output_dir, "departments.csv"),
+        "jobs": os.path.join(output_dir, "jobs.csv"),
+        "hired_employees": os.path.join(output_dir, "hired_employees.csv")
+    }
+    dimension_frame(departments, "Department").to_csv(paths["departments"], header=False, index=False)
+    dimension_frame(jobs, "Job").to_csv(paths["jobs"], header=False, index=False)
+
+    with open(paths["hired_employees"], "w", newline="") as out:
+        for first_id in range(1, employees + 1, chunk_size):
+            rows = min(chunk_size, employees + 1 - first_id)
+            chunk = employee_chunk(rng, first_id, rows, departments, jobs, null_rate, duplicate_rate)
+            chunk.to_csv(out, header=False, index=False)
+    return paths
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Generar CSV sintéticos para benchmarks")
+    parser.add_argument("output_dir")
+    parser.add_argument("--rows", type=int, default=10_000, help="Cantidad de empleados")
+    parser.add_argument("--departments", type=int, default=12)
+    parser.add_argument("--jobs", type=int, default=183)
+    parser.add_argument("--null-rate", type=float, default=0.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    paths = generate(
+        args.output_dir, args.rows, args.departments, args.jobs,
+        args.null_rate, args.duplicate_rate, seed=args.seed
+    )
+    for table, path in paths.items():
+        print(f"{table}: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Suite de benchmarks de ingesta y métricas.
+
+Genera un dataset sintético (ver benchmarks/generator.py), carga departments y
+jobs con cada modo, hired_employees con cada caso de carga y ejecuta las dos
+consultas de métricas. Cada caso corre en un proceso nuevo para que el pico
+de RSS sea propio del caso. Los resultados se escriben en JSON para poder
+comparar corridas (--compare).
+
+Uso:
+    DB_HOST=localhost python -m benchmarks.run --rows 100000 --null-rate 0.01 --duplicate-rate 0.01
+    DB_HOST=localhost python -m benchmarks.run --rows 100000 --compare benchmarks/results/anterior.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+from .generator import generate
+
+DIMENSION_MODES = ["orm", "staging"]
+# Casos de hired_employees: modo de carga más opciones de lectura
+# (+stream, +parse = parallel_parse, +arrow = Config.CSV_PARSER="pyarrow")
+EMPLOYEE_CASES = ["orm", "copy", "staging", "parallel", "copy+stream", "copy+parse", "copy+arrow"]
+METRICS = ["quarterly_hiring", "departments_above_mean"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Pico de RSS del proceso (ru_maxrss está en KB en Linux)"""
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+def _open_upload(path: str):
+    from fastapi import UploadFile
+    return UploadFile(file=open(path, "rb"), filename=os.path.basename(path))
+
+def _benchmark_config() -> None:
+    """
+    Los benchmarks llaman a ingest directamente, sin límite de tamaño y sin
+    ledger (el mismo archivo se carga una vez por caso)
+    """
+    from app.config import get_config
+    config = get_config()
+    config.MAX_UPLOAD_SIZE = 0
+    config.MAX_STREAM_UPLOAD_SIZE = 0
+    config.UPLOAD_LEDGER = False
+
+def _run_ingest(case: Dict[str, Any]) -> Dict[str, Any]:
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.config import get_config
+    from app.services import DepartmentService, EmployeeService, JobService
+    from app.utils.executors import shutdown_executors
+
+    _benchmark_config()
+    db = SessionLocal()
+    upload = _open_upload(case["path"])
+    try:
+        if case["table"] == "hired_employees":
+            db.execute(text("TRUNCATE hired_employees"))
+            db.commit()
+            options = case["name"].split("+")
+            if "arrow" in options[1:]:
+                get_config().CSV_PARSER = "pyarrow"
+            service = EmployeeService()
+            run = lambda: service.ingest(
+                upload, False, db, options[0],
+                stream="stream" in options[1:],
+                parallel_parse="parse" in options[1:]
+            )
+        else:
+            if case["table"] == "departments":
+                db.execute(text("TRUNCATE departments, jobs, hired_employees"))
+                db.commit()
+            service = DepartmentService() if case["table"] == "departments" else JobService()
+            run = lambda: service.ingest(upload, db, case["name"])
+
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        shutdown_executors()
+    finally:
+        upload.file.close()
+        db.close()
+
+    summary = result["summary"]
+    rows = summary.get("total_rows", summary.get("total_procesados"))
+    written = summary.get("processed_successfully", summary.get("insertados"))
+    return {
+        "rows": rows,
+        "written": written,
+        "wall_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_children_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+
+async def _time_metric(name: str, repeats: int) -> List[float]:
+    from app.database import AsyncSessionLocal, async_engine
+    from app.services import MetricsService
+
+    service = MetricsService()
+    query = getattr(service, f"get_{name}")
+    timings = []
+    try:
+        async with AsyncSessionLocal() as db:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await query(db)
+                timings.append(time.perf_counter() - started)
+    finally:
+        await async_engine.dispose()
+    return timings
+
+def _run_metric(case: Dict[str, Any]) -> Dict[str, Any]:
+    baseline = peak_rss_mb()
+    timings = asyncio.run(_time_metric(case["name"], case["repeats"]))
+    return {
+        "repeats": len(timings),
+        "wall_seconds": round(sum(timings), 3),
+        "mean_seconds": round(sum(timings) / len(timings), 4),
+        "min_seconds": round(min(timings), 4),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Punto de entrada de cada proceso hijo"""
+    runner = _run_metric if case["table"] == "metrics" else _run_ingest
+    return {"table": case["table"], "case": case["name"], **runner(case)}
+
+def run_isolated(case: Dict[str, Any]) -> Dict[str, Any]:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(run_case, case).result()
+
+def environment() -> Dict[str, Any]:
+    import pandas as pd
+    import sqlalchemy
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "git_commit": commit
+    }
+
+def compare(results: List[Dict[str, Any]], previous_path: str) -> None:
+    """Imprimir el cambio de tiempo por caso respecto de una corrida anterior"""
+    with open(previous_path) as f:
+        previous = {(r["table"], r["case"]): r for r in json.load(f)["results"]}
+    print(f"\nComparación con {previous_path}")
+    for result in results:
+        before = previous.get((result["table"], result["case"]))
+        if before is None:
+            continue
+        ratio = result["wall_seconds"] / before["wall_seconds"] if before["wall_seconds"] else float("nan")
+        print(
+            f"  {result['table']:<16} {result['case']:<24} "
+            f"{before['wall_seconds']:>9.3f}s -> {result['wall_seconds']:>9.3f}s  ({ratio:.2f}x)"
+        )
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ingesta y métricas")
+    parser.add_argument("--rows", type=int, default=10_000, help="Empleados a generar (10k a 10M)")
+    parser.add_argument("--departments", type=int, default=12)
+    parser.add_argument("--jobs", type=int, default=183)
+    parser.add_argument("--null-rate", type=float, default=0.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dimension-modes", default=",".join(DIMENSION_MODES))
+    parser.add_argument("--employee-cases", default=",".join(EMPLOYEE_CASES))
+    parser.add_argument("--metric-repeats", type=int, default=5)
+    parser.add_argument("--data-dir", help="Reutilizar/guardar los CSV generados en este directorio")
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    params = {
+        "rows": args.rows,
+        "departments": args.departments,
+        "jobs": args.jobs,
+        "null_rate": args.null_rate,
+        "duplicate_rate": args.duplicate_rate,
+        "seed": args.seed
+    }
+
+    from app.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        started = time.perf_counter()
+        paths = generate(
+            data_dir, args.rows, args.departments, args.jobs,
+            args.null_rate, args.duplicate_rate, seed=args.seed
+        )
+        print(f"Dataset generado en {time.perf_counter() - started:.1f}s ({data_dir})")
+
+        # Las dimensiones se cargan último con el último modo, y quedan para los empleados
+        cases = []
+        for mode in args.dimension_modes.split(","):
+            cases.append({"table": "departments", "name": mode, "path": paths["departments"]})
+            cases.append({"table": "jobs", "name": mode, "path": paths["jobs"]})
+        for name in args.employee_cases.split(","):
+            cases.append({"table": "hired_employees", "name": name, "path": paths["hired_employees"]})
+        for name in METRICS:
+            cases.append({"table": "metrics", "name": name, "repeats": args.metric_repeats})
+
+        results = []
+        for case in cases:
+            result = run_isolated(case)
+            results.append(result)
+            print(
+                f"  {result['table']:<16} {result['case']:<24} {result['wall_seconds']:>9.3f}s  "
+                f"{result.get('rows_per_second') or '':>12}  rss {result['peak_rss_mb']}MB"
+            )
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "params": params,
+        "results": results
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{args.rows}_{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados en {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
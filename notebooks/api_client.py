@@ -49,16 +49,38 @@ class GlobantAPIClient:
             response = self.session.post(f"{self.BASE_URL}/upload/hired_employees", files=files, params=params)
         return response.json()
 
-    def get_quarterly_hiring(self):
-        """Obtener métricas trimestrales"""
-        response = self.session.get(f"{self.BASE_URL}/metrics/quarterly-hiring")
+    def upload_dataset(self, departments_path, jobs_path, employees_path, update_existing=True):
+        """Sube los tres archivos en un único request atómico"""
+        paths = {'departments': departments_path, 'jobs': jobs_path, 'hired_employees': employees_path}
+        for path in paths.values():
+            validate_csv(path)
+        files = {table: open(path, 'rb') for table, path in paths.items()}
+        try:
+            params = {'update_existing': str(update_existing).lower()}
+            response = self.session.post(f"{self.BASE_URL}/upload/dataset", files=files, params=params)
+        finally:
+            for file in files.values():
+                file.close()
+        return response.json()
+
+    def get_quarterly_hiring(self, **period):
+        """Obtener métricas trimestrales (period: year o from/to)"""
+        response = self.session.get(f"{self.BASE_URL}/metrics/quarterly-hiring", params=period)
         return self._handle_response(response)
 
-    def get_departments_above_mean(self):
-        """Obtener departamentos sobre la media"""
-        response = self.session.get(f"{self.BASE_URL}/metrics/departments-above-mean")
+    def get_departments_above_mean(self, **period):
+        """Obtener departamentos sobre la media (period: year o from/to)"""
+        response = self.session.get(f"{self.BASE_URL}/metrics/departments-above-mean", params=period)
         return self._handle_response(response)
     
+    def get_hiring_cube(self, group_by, subtotals=None, **filters):
+        """Obtener el cubo de contrataciones (group_by: lista de dimensiones)"""
+        params = {'group_by': ','.join(group_by), **filters}
+        if subtotals:
+            params['subtotals'] = subtotals
+        response = self.session.get(f"{self.BASE_URL}/metrics/hiring-cube", params=params)
+        return self._handle_response(response)
+
     def _handle_response(self, response):
         """Maneja la respuesta de la API"""
         if response.status_code == 200:
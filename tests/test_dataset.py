@@ -0,0 +1,118 @@
+import io
+import zipfile
+import pytest
+from sqlalchemy import text
+
+DEPARTMENTS = b"1,IT\n2,HR\n"
+JOBS = b"1,Engineer\n2,Recruiter\n"
+EMPLOYEES = (
+    b"1,John Doe,2021-01-01T00:00:00Z,1,1\n"
+    b"2,Jane Doe,2021-04-01T00:00:00Z,2,2\n"
+    b"3,Joe Doe,2021-07-01T00:00:00Z,1,2\n"
+)
+
+def dataset_files(employees=EMPLOYEES):
+    return {
+        "departments": ("departments.csv", DEPARTMENTS, "text/csv"),
+        "jobs": ("jobs.csv", JOBS, "text/csv"),
+        "hired_employees": ("hired_employees.csv", employees, "text/csv")
+    }
+
+def count(db_session, table):
+    return db_session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+@pytest.mark.parametrize("load_mode", ["orm", "copy", "staging"])
+def test_upload_dataset_multipart(client, db_session, load_mode):
+    """Test de carga del dataset completo en un request"""
+    response = client.post(
+        "/api/v1/upload/dataset",
+        params={"load_mode": load_mode},
+        files=dataset_files()
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["departments"]["insertados"] == 2
+    assert summary["jobs"]["insertados"] == 2
+    assert summary["hired_employees"]["processed_successfully"] == 3
+    assert (count(db_session, "departments"), count(db_session, "jobs"), count(db_session, "hired_employees")) == (2, 2, 3)
+
+def test_upload_dataset_zip_archive(client, db_session):
+    """Test de carga del dataset desde un zip"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for table, (name, content, _) in dataset_files().items():
+            bundle.writestr(f"dataset/{name}", content)
+    response = client.post(
+        "/api/v1/upload/dataset",
+        files={"archive": ("dataset.zip", buffer.getvalue(), "application/zip")}
+    )
+    assert response.status_code == 200
+    assert response.json()["summary"]["hired_employees"]["unknown_foreign_keys"] == {"department_id": 0, "job_id": 0}
+    assert count(db_session, "hired_employees") == 3
+
+def test_upload_dataset_is_atomic(client, db_session):
+    """Si la tabla de hechos falla, las dimensiones tampoco quedan cargadas"""
+    response = client.post(
+        "/api/v1/upload/dataset",
+        files=dataset_files(employees=b"id,name,datetime,department_id,job_id\n1,John,2021-01-01T00:00:00Z,1,1\n")
+    )
+    assert response.status_code >= 400
+    assert (count(db_session, "departments"), count(db_session, "jobs"), count(db_session, "hired_employees")) == (0, 0, 0)
+
+def test_upload_dataset_validation(client):
+    """Test de archivos faltantes y modo parallel (no comparte la transacción)"""
+    files = dataset_files()
+    del files["jobs"]
+    response = client.post("/api/v1/upload/dataset", files=files)
+    assert response.status_code == 400
+    assert "jobs" in response.json()["detail"]
+
+    response = client.post(
+        "/api/v1/upload/dataset",
+        params={"load_mode": "parallel"},
+        files=dataset_files()
+    )
+    assert response.status_code == 400
+
+def test_upload_dataset_archive_extracted_off_event_loop(client, monkeypatch):
+    """Test de que el zip se descomprime en el pool de I/O, ya admitido"""
+    import asyncio
+    from app.services.admission import ingest_scheduler
+    from app.services.dataset_service import DatasetService
+    calls = []
+    extract = DatasetService.extract_archive
+
+    def tracked_extract(archive, stream):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event_loop")
+        except RuntimeError:
+            calls.append("worker")
+        calls.append(ingest_scheduler.stats()["uploads_per_table"].get("dataset"))
+        return extract(archive, stream)
+
+    monkeypatch.setattr(DatasetService, "extract_archive", staticmethod(tracked_extract))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for table, (name, content, _) in dataset_files().items():
+            bundle.writestr(name, content)
+    response = client.post(
+        "/api/v1/upload/dataset",
+        files={"archive": ("dataset.zip", buffer.getvalue(), "application/zip")}
+    )
+    assert response.status_code == 200
+    assert calls == ["worker", 1]
+
+def test_upload_dataset_respects_per_table_admission(client, monkeypatch):
+    """Test de que el dataset ocupa un lugar en cada tabla que escribe"""
+    from app.services.admission import ingest_scheduler
+    monkeypatch.setattr(ingest_scheduler, "max_per_table", 1)
+    monkeypatch.setattr(ingest_scheduler, "max_queued", 0)
+    with ingest_scheduler.admit_blocking("hired_employees"):
+        response = client.post("/api/v1/upload/dataset", files=dataset_files())
+        assert response.status_code == 429
+        assert client.get("/api/v1/ingest-admission").json()["uploads_per_table"] == {"hired_employees": 1}
+
+    response = client.post("/api/v1/upload/dataset", files=dataset_files())
+    assert response.status_code == 200
+    assert client.get("/api/v1/ingest-admission").json()["uploads_per_table"] == {}
@@ -1,4 +1,5 @@
 import pytest
+import tempfile
 from fastapi.testclient import TestClient
 
 def test_upload_departments_success(client, sample_csv):
@@ -25,4 +26,57 @@ def test_upload_departments_duplicate_id(client):
             "/api/v1/upload/departments",
             files={"file": ("departments.csv", f, "text/csv")}
         )
-    assert response.status_code == 500
\ No newline at end of file
+    assert response.status_code == 500
+
+def test_upload_departments_staging_mode(client):
+    """Test de carga de departamentos vía staging"""
+    response = client.post(
+        "/api/v1/upload/departments",
+        params={"load_mode": "staging"},
+        files={"file": ("departments.csv", b"1,IT\n1,HR\n2,\n3,IT\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["insertados"] == 1
+    assert summary["duplicados"] == 1
+    assert summary["errores"] == 2
+
+@pytest.mark.parametrize("load_mode", ["orm", "staging"])
+def test_upload_departments_duplicate_id_keep_last(client, load_mode):
+    """Test de ids repetidos resueltos con keep=last"""
+    response = client.post(
+        "/api/v1/upload/departments",
+        params={"load_mode": load_mode, "keep": "last"},
+        files={"file": ("departments.csv", b"1,IT\n1,HR\n2,Sales\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json()["summary"]["insertados"] == 2
+
+def test_upload_departments_invalid_parquet_message(client):
+    """Test de que el error de lectura nombra el formato real del archivo"""
+    response = client.post(
+        "/api/v1/upload/departments",
+        files={"file": ("departments.parquet", b"not a parquet file", "application/octet-stream")}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Archivo Parquet inválido"
+
+@pytest.mark.parametrize("load_mode", ["copy", "parallel"])
+def test_upload_departments_rejects_unsupported_load_mode(client, monkeypatch, load_mode):
+    """Test de modos sin efecto en las dimensiones: 400 si se piden, orm si son el default global"""
+    from app.config import get_config
+    response = client.post(
+        "/api/v1/upload/departments",
+        params={"load_mode": load_mode},
+        files={"file": ("departments.csv", b"1,IT\n", "text/csv")}
+    )
+    assert response.status_code == 400
+    assert "Allowed: orm, staging" in response.json()["detail"]
+
+    monkeypatch.setattr(get_config(), "LOAD_MODE", load_mode)
+    response = client.post(
+        "/api/v1/upload/departments",
+        files={"file": ("departments.csv", b"1,IT\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json()["summary"]["insertados"] == 1
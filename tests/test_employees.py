@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 import pandas as pd
+import tempfile
 
 def test_upload_employees_success(client, sample_csv):
     """Test de carga exitosa de empleados"""
@@ -33,4 +34,633 @@ def test_upload_employees_missing_required_columns(client):
             "/api/v1/upload/hired_employees",
             files={"file": ("test.csv", f, "text/csv")}
         )
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+def test_upload_employees_copy_mode(client):
+    """Test de carga con COPY manteniendo el mismo resumen"""
+    content = (
+        "1,John Doe,2021-01-01T00:00:00Z,,\n"
+        "2,,2021-02-01T00:00:00Z,,\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "copy"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["load_mode"] == "copy"
+    assert summary["processed_successfully"] == 2
+    assert summary["rows_with_null_values"]["null_names"] == 1
+    assert summary["errors"] == []
+
+def test_upload_employees_copy_mode_reports_row_errors(client):
+    """Test de fallback a ORM cuando el COPY falla por FK"""
+    content = (
+        "1,John Doe,2021-01-01T00:00:00Z,,\n"
+        "2,Jane Doe,2021-02-01T00:00:00Z,999,\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "copy"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 1
+    assert len(summary["errors"]) == 1
+    assert "ID 2" in summary["errors"][0]
+
+def test_upload_employees_invalid_load_mode(client):
+    """Test de modo de carga inválido"""
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "bogus"},
+        files={"file": ("test.csv", b"1,John,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 400
+
+def test_upload_employees_staging_mode_rejects(client):
+    """Test de validación set-based con tabla de rechazos"""
+    content = (
+        "1,John Doe,2021-01-01T00:00:00Z,,\n"
+        "1,John Again,2021-01-02T00:00:00Z,,\n"
+        ",No Id,2021-01-03T00:00:00Z,,\n"
+        "3,Future,2999-01-01T00:00:00Z,,\n"
+        "4,Bad Dept,2021-01-04T00:00:00Z,77,\n"
+        "5,Zero Dept,2021-01-05T00:00:00Z,0,\n"
+        "6,Negative Job,2021-01-06T00:00:00Z,,-1\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "staging"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 1
+    assert summary["invalid_records"] == 1
+    assert summary["rejected"] == {
+        "duplicate_id": 1,
+        "future_datetime": 1,
+        "nonpositive_department_id": 1,
+        "nonpositive_job_id": 1,
+        "null_id": 1,
+        "unknown_department_id": 1
+    }
+
+    rejects = client.get("/api/v1/rejects", params={"load_id": summary["load_id"]}).json()
+    assert [row["row_number"] for row in rejects["rows"]] == [2, 3, 4, 5, 6, 7]
+    assert rejects["rows"][0]["raw_data"]["name"] == "John Again"
+
+@pytest.mark.parametrize("load_mode", ["orm", "staging"])
+def test_upload_employees_update_existing_counts(client, load_mode):
+    """Test de upsert por lotes con insertados/actualizados separados"""
+    client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", b"1,John,2021-01-01T00:00:00Z,,\n2,Jane,2021-01-02T00:00:00Z,,\n", "text/csv")}
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"update_existing": "true", "load_mode": load_mode},
+        files={"file": ("test.csv", b"2,Jane Doe,2021-01-02T00:00:00Z,,\n3,Joe,2021-01-03T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 2
+    assert summary["inserted"] == 1
+    assert summary["updated"] == 1
+
+def test_upload_employees_streaming_mode(client):
+    """Test de carga por bloques con el mismo resumen"""
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 2501)
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["streamed"] is True
+    assert summary["total_rows"] == 2500
+    assert summary["processed_successfully"] == 2500
+
+def test_upload_employees_size_limit_enforced_while_reading(client, monkeypatch):
+    """Test de límite de tamaño aplicado durante la lectura"""
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "MAX_STREAM_UPLOAD_SIZE", 1024)
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 200)
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 400
+
+def test_upload_employees_parallel_parse(client, monkeypatch):
+    """Test de parseo en paralelo por bloques en el pool de procesos"""
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "PARSE_BLOCK_SIZE", 4096)
+    content = "".join(
+        f"{i},  Employee {i}  ,2021-01-01T00:00:00Z,,\n" for i in range(1, 3001)
+    ) + ",No Id,2021-01-01T00:00:00Z,,\n"
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"parallel_parse": "true"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["parallel_parse"] is True
+    assert summary["total_rows"] == 3001
+    assert summary["invalid_records"] == 1
+    assert summary["processed_successfully"] == 3000
+
+def test_upload_employees_parquet(client):
+    """Test de carga Parquet con tipos nativos y el mismo resumen"""
+    import io
+    df = pd.DataFrame({
+        "id": pd.array([1, 2, None], dtype="Int64"),
+        "name": ["John Doe", None, "No Id"],
+        "datetime": pd.to_datetime(["2021-01-01", "2021-02-01", "2021-03-01"], utc=True),
+        "department_id": pd.array([None, None, None], dtype="Int64"),
+        "job_id": pd.array([None, None, None], dtype="Int64")
+    })
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.parquet", buffer.getvalue(), "application/octet-stream")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["file_format"] == "parquet"
+    assert summary["total_rows"] == 3
+    assert summary["invalid_records"] == 1
+    assert summary["processed_successfully"] == 2
+    assert summary["rows_with_null_values"]["null_names"] == 1
+
+def test_upload_employees_parallel_mode(committed_client, monkeypatch):
+    """Test de escritura particionada por rango de id en varias conexiones"""
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "PARALLEL_WRITE_WORKERS", 3)
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 3001)
+    ) + "5,Repeated,2021-01-01T00:00:00Z,,\n"
+    response = committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "parallel"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["partitions"] == 3
+    assert summary["processed_successfully"] == 3000
+    assert summary["inserted"] == 3000
+
+def test_upload_employees_parallel_mode_is_all_or_nothing(committed_client, db_engine, monkeypatch):
+    """Test de que una partición fallida no deja el archivo cargado a medias"""
+    from sqlalchemy import text
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "PARALLEL_WRITE_WORKERS", 3)
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("existing.csv", b"3001,Existing,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 3002)
+    )
+    response = committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "parallel"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["partition"] == 2
+    with db_engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM hired_employees")).scalar() == 1
+        assert connection.execute(text("SELECT count(*) FROM pg_prepared_xacts")).scalar() == 0
+
+def test_upload_employees_bisects_failed_batch(client, db_engine):
+    """Test de aislamiento por bisección: pocas sentencias para pocas filas inválidas"""
+    from sqlalchemy import event
+    client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("existing.csv", b"250,Existing,2021-01-01T00:00:00Z,,\n731,Existing,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 1001)
+    )
+    inserts = []
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO HIRED_EMPLOYEES"):
+            inserts.append(statement)
+    event.listen(db_engine, "before_cursor_execute", count_inserts)
+    try:
+        response = client.post(
+            "/api/v1/upload/hired_employees",
+            files={"file": ("test.csv", content.encode(), "text/csv")}
+        )
+    finally:
+        event.remove(db_engine, "before_cursor_execute", count_inserts)
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 998
+    assert [error.split(":")[0] for error in summary["errors"]] == ["Error with ID 250", "Error with ID 731"]
+    assert len(inserts) < 50
+
+def test_upload_employees_identical_reupload_returns_stored_summary(client):
+    """Test de idempotencia: el mismo archivo devuelve el resumen guardado"""
+    content = b"1,John,2021-01-01T00:00:00Z,,\n2,Jane,2021-01-02T00:00:00Z,,\n"
+    first = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", content, "text/csv")}
+    ).json()
+    second = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("again.csv", content, "text/csv")}
+    ).json()
+    assert first["ledger"]["replayed"] is False
+    assert second["ledger"]["replayed"] is True
+    assert second["ledger"]["content_hash"] == first["ledger"]["content_hash"]
+    assert second["summary"] == first["summary"]
+
+    forced = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"force": "true"},
+        files={"file": ("test.csv", content, "text/csv")}
+    ).json()
+    assert forced["ledger"]["replayed"] is False
+    assert forced["summary"]["processed_successfully"] == 0
+    assert len(forced["summary"]["errors"]) == 2
+
+def test_upload_employees_reupload_with_other_policy_is_not_replayed(client):
+    """Test de ledger: el mismo archivo con otra fk_policy es otra carga"""
+    content = b"1,John,2021-01-01T00:00:00Z,7,\n2,Jane,2021-01-02T00:00:00Z,,\n"
+    first = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"fk_policy": "reject"},
+        files={"file": ("test.csv", content, "text/csv")}
+    ).json()
+    assert first["summary"]["processed_successfully"] == 1
+
+    second = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"fk_policy": "null", "update_existing": "false"},
+        files={"file": ("test.csv", content, "text/csv")}
+    ).json()
+    assert second["ledger"]["replayed"] is False
+    assert second["ledger"]["upload_id"] != first["ledger"]["upload_id"]
+    assert second["summary"]["fk_policy"] == "null"
+    assert second["summary"]["unknown_foreign_keys"]["department_id"] == 1
+
+def test_upload_employees_resumes_interrupted_upload(client, monkeypatch):
+    """Test de reanudación desde el último lote confirmado"""
+    from app.services.employee_service import EmployeeService
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 3001)
+    ).encode()
+
+    process_batch = EmployeeService.process_batch
+    calls = []
+    def interrupted_batch(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("connection lost")
+        return process_batch(self, *args, **kwargs)
+    monkeypatch.setattr(EmployeeService, "process_batch", interrupted_batch)
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.csv", content, "text/csv")}
+    )
+    assert response.status_code == 500
+
+    monkeypatch.setattr(EmployeeService, "process_batch", process_batch)
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ledger"]["resumed_from_row"] == 2000
+    assert data["summary"]["total_rows"] == 3000
+    assert data["summary"]["inserted"] == 1000
+    assert data["summary"]["processed_successfully"] == 3000
+    assert data["summary"]["errors"] == []
+
+@pytest.mark.parametrize("fk_policy", ["reject", "null"])
+def test_upload_employees_unknown_foreign_keys(client, fk_policy):
+    """Test de validación de FKs en memoria antes de escribir"""
+    client.post(
+        "/api/v1/upload/departments",
+        files={"file": ("departments.csv", b"1,IT\n", "text/csv")}
+    )
+    content = (
+        "1,John Doe,2021-01-01T00:00:00Z,1,\n"
+        "2,Jane Doe,2021-02-01T00:00:00Z,7,\n"
+        "3,Joe Doe,2021-03-01T00:00:00Z,,42\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"fk_policy": fk_policy},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["fk_policy"] == fk_policy
+    assert summary["unknown_foreign_keys"] == {"department_id": 1, "job_id": 1}
+    if fk_policy == "reject":
+        assert summary["processed_successfully"] == 1
+        assert summary["errors"] == [
+            "Error with ID 2: unknown department_id 7",
+            "Error with ID 3: unknown job_id 42"
+        ]
+    else:
+        assert summary["processed_successfully"] == 3
+        assert summary["errors"] == []
+
+@pytest.mark.parametrize("keep,name,count", [
+    ("first", "First 5", 1),
+    ("last", "Last 5", 1),
+    ("reject", None, 2)
+])
+def test_upload_employees_duplicate_ids_across_chunks(client, db_session, keep, name, count):
+    """Test de deduplicación de ids repetidos en bloques distintos del archivo"""
+    from app.models import HiredEmployee
+    rows = [f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 2501)]
+    rows[4] = "5,First 5,2021-01-01T00:00:00Z,,\n"
+    rows.append("5,Last 5,2021-01-01T00:00:00Z,,\n")
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true", "keep": keep},
+        files={"file": ("test.csv", "".join(rows).encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["duplicates"] == {"policy": keep, "count": count, "sample_ids": [5]}
+    assert summary["processed_successfully"] == 2501 - count
+    employee = db_session.get(HiredEmployee, 5)
+    assert (employee.name if employee else None) == name
+
+def test_upload_employees_invalid_keep(client):
+    """Test de política de duplicados inválida"""
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"keep": "newest"},
+        files={"file": ("test.csv", b"1,John Doe,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 400
+
+def test_upload_employees_rule_violations(client):
+    """Test de reglas de los esquemas aplicadas en bloque durante la carga"""
+    content = (
+        "1,John Doe,2021-01-01T00:00:00Z,,\n"
+        "2,Jane Doe,2021-02-01T00:00:00Z,-3,\n"
+        "3,Joe Doe,2999-03-01T00:00:00Z,,\n"
+        "4,Jim Doe,2021-04-01T00:00:00Z,,0\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 1
+    assert summary["rule_violations"] == {
+        "department_id:positive": {"count": 1, "rows": [1]},
+        "job_id:positive": {"count": 1, "rows": [3]},
+        "datetime:not_future": {"count": 1, "rows": [2]}
+    }
+
+def test_employee_schema_shares_bulk_rules():
+    """Test de que el esquema rechaza lo mismo que la carga masiva"""
+    from datetime import datetime
+    from pydantic import ValidationError
+    from app.schemas import EmployeeCreate
+    assert EmployeeCreate(id=1, department_id=2, datetime=datetime(2021, 1, 1)).department_id == 2
+    with pytest.raises(ValidationError, match="ID must be positive"):
+        EmployeeCreate(id=1, job_id=-1)
+    with pytest.raises(ValidationError, match="Datetime cannot be in the future"):
+        EmployeeCreate(id=1, datetime=datetime(2999, 1, 1))
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_upload_employees_pyarrow_parser(client, monkeypatch, stream):
+    """Test del parser pyarrow: timestamps en la misma pasada e inválidos -> NULL"""
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "CSV_PARSER", "pyarrow")
+    content = "".join(
+        f"{i},  Employee {i}  ,2021-01-01T00:00:00Z,,\n" for i in range(1, 2501)
+    ) + "2501,Bad Date,not-a-date,,\n,No Id,2021-01-01T00:00:00Z,,\n"
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": str(stream).lower()},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["total_rows"] == 2502
+    assert summary["processed_successfully"] == 2501
+    assert summary["invalid_records"] == 1
+    assert summary["rows_with_null_values"]["null_datetimes"] == 1
+
+@pytest.mark.parametrize("load_mode", ["orm", "copy"])
+def test_upload_employees_diagnostics(client, caplog, load_mode):
+    """Test del bloque de diagnóstico (etapas, filas/s, memoria, round trips) y su log"""
+    import json
+    import logging
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 2501)
+    )
+    with caplog.at_level(logging.INFO, logger="app.utils.diagnostics"):
+        response = client.post(
+            "/api/v1/upload/hired_employees",
+            params={"load_mode": load_mode, "stream": "true", "diagnostics": "true"},
+            files={"file": ("test.csv", content.encode(), "text/csv")}
+        )
+    assert response.status_code == 200
+    diagnostics = response.json()["summary"]["diagnostics"]
+    assert set(diagnostics["stages_seconds"]) == {"read", "parse", "transform", "validate", "write", "commit"}
+    assert diagnostics["stages_seconds"]["write"] > 0
+    assert diagnostics["stages_seconds"]["commit"] > 0
+    assert diagnostics["rows"] == 2500
+    assert diagnostics["rows_per_second"] > 0
+    assert diagnostics["memory"]["peak_mb"] > 0
+    # Al menos un round trip por cada lote de 1000 filas
+    assert diagnostics["db_round_trips"] >= 3
+
+    logged = [json.loads(r.message) for r in caplog.records if r.name == "app.utils.diagnostics"]
+    assert logged[-1]["event"] == "ingest_diagnostics"
+    assert logged[-1]["table"] == "hired_employees"
+    assert logged[-1]["db_round_trips"] == diagnostics["db_round_trips"]
+
+def test_upload_employees_diagnostics_optional(client):
+    """Sin diagnostics el resumen no cambia"""
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", b"1,John Doe,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    assert "diagnostics" not in response.json()["summary"]
+
+def test_diagnostics_tracemalloc_is_exclusive_between_uploads():
+    """Test de que cargas concurrentes no comparten tracemalloc: la segunda mide por RSS"""
+    import tracemalloc
+    from app.utils.diagnostics import MemorySampler
+    first, second = MemorySampler("tracemalloc"), MemorySampler("tracemalloc")
+    first.start()
+    second.start()
+    assert second.source == "rss"
+    data = [bytearray(1024 * 1024) for _ in range(4)]
+    second.stop()
+    assert tracemalloc.is_tracing()
+    first.stop()
+    assert not tracemalloc.is_tracing()
+    assert first.to_dict()["delta_mb"] >= 4
+    assert second.to_dict()["source"] == "rss"
+    del data
+
+def test_upload_employees_parallel_mode_commit_failure(committed_client, db_engine, monkeypatch):
+    """Test de un COMMIT PREPARED fallido en la barrera: se reintenta sin revertir las demás"""
+    from sqlalchemy import text
+    from app.config import get_config
+    from app.services.partitioned_writer import PartitionedWriter
+    monkeypatch.setattr(get_config(), "PARALLEL_WRITE_WORKERS", 3)
+    commit = PartitionedWriter._commit
+    failed = []
+    def failing_commit(index, outcome):
+        if index == 1 and not failed:
+            failed.append(index)
+            raise RuntimeError("connection lost during COMMIT")
+        commit(index, outcome)
+    monkeypatch.setattr(PartitionedWriter, "_commit", staticmethod(failing_commit))
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 3001)
+    )
+    response = committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "parallel"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    assert failed == [1]
+    with db_engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM hired_employees")).scalar() == 3000
+        assert connection.execute(text("SELECT count(*) FROM pg_prepared_xacts")).scalar() == 0
+
+def test_upload_employees_parallel_mode_requires_two_phase(client, monkeypatch):
+    """Test de que sin two-phase commit load_mode=parallel se rechaza antes de cargar"""
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "PARALLEL_TWO_PHASE", False)
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": "parallel"},
+        files={"file": ("test.csv", b"1,John,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 400
+    assert "two-phase" in response.json()["detail"]
+
+@pytest.mark.parametrize("load_mode", ["copy", "parallel"])
+def test_upload_employees_parquet_float_ids(committed_client, load_mode):
+    """Test de Parquet con ids float64 (nulos exportados desde pandas): se cargan como enteros"""
+    import io
+    committed_client.post(
+        "/api/v1/upload/departments",
+        files={"file": ("departments.csv", b"1,Engineering\n", "text/csv")}
+    )
+    df = pd.DataFrame({
+        "id": [1.0, 2.0, 3.0],
+        "name": ["John Doe", "Jane Doe", "No Dept"],
+        "datetime": pd.to_datetime(["2021-01-01", "2021-02-01", "2021-03-01"], utc=True),
+        "department_id": [1.0, 1.0, None],
+        "job_id": pd.Series([None, None, None], dtype="float64")
+    })
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    response = committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": load_mode},
+        files={"file": ("test.parquet", buffer.getvalue(), "application/octet-stream")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["processed_successfully"] == 3
+    assert summary["inserted"] == 3
+
+    df["department_id"] = [1.5, 1.0, None]
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    response = committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": load_mode},
+        files={"file": ("test.parquet", buffer.getvalue(), "application/octet-stream")}
+    )
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"stream": "true"},
+    {"parallel_parse": "true"},
+    {"load_mode": "copy", "stream": "true"},
+    {"load_mode": "staging"}
+])
+def test_upload_employees_rules_before_dedup_in_every_mode(client, db_session, params):
+    """Test de que las reglas se aplican antes de deduplicar en todos los modos"""
+    from sqlalchemy import text
+    client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n", "text/csv")})
+    client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    content = (
+        "1,A,2021-01-01T00:00:00Z,-1,1\n"
+        "1,B,2021-01-01T00:00:00Z,1,1\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params=params,
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json()["summary"]["duplicates"]["count"] == 0
+    rows = db_session.execute(text("SELECT id, name FROM hired_employees")).all()
+    assert [tuple(row) for row in rows] == [(1, "B")]
+
+@pytest.mark.parametrize("load_mode", ["orm", "copy", "staging"])
+def test_upload_employees_dedup_before_foreign_keys_in_every_mode(client, db_session, load_mode):
+    """Test de que una primera copia con FK desconocida descarta también a la repetida"""
+    from sqlalchemy import text
+    client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n", "text/csv")})
+    content = (
+        "1,A,2021-01-01T00:00:00Z,77,\n"
+        "1,B,2021-01-01T00:00:00Z,1,\n"
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": load_mode},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["duplicates"]["count"] == 1
+    assert summary["processed_successfully"] == 0
+    assert db_session.execute(text("SELECT count(*) FROM hired_employees")).scalar() == 0
+
+def test_upload_employees_stream_caps_error_messages(client):
+    """Test de mensajes de error acotados: se guardan los primeros y se cuenta el resto"""
+    content = "".join(
+        f"{i},Employee {i},2021-01-01T00:00:00Z,77,\n" for i in range(1, 2501)
+    )
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"stream": "true"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["unknown_foreign_keys"]["department_id"] == 2500
+    assert summary["error_count"] == 2500
+    assert len(summary["errors"]) == 5
@@ -0,0 +1,118 @@
+import pytest
+import time
+from fastapi.testclient import TestClient
+from app.services.ingest_jobs import ingest_job_manager
+from .conftest import TestingSessionLocal
+
+def wait_for_job(client, job_id, timeout=10):
+    """Esperar a que un job en segundo plano termine"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/v1/ingest-jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+@pytest.fixture
+def background_client(committed_client, monkeypatch):
+    """Cliente cuyos jobs en segundo plano abren su propia sesión sobre la base de prueba"""
+    monkeypatch.setattr(ingest_job_manager, "session_factory", TestingSessionLocal)
+    return committed_client
+
+def test_background_upload_returns_job_and_summary(background_client):
+    """Test de carga en segundo plano con polling de estado"""
+    content = "".join(f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 101))
+    response = background_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"background": "true"},
+        files={"file": ("test.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = wait_for_job(background_client, job_id)
+    assert job["status"] == "completed"
+    assert job["progress"]["rows_parsed"] == 100
+    assert job["progress"]["rows_written"] == 100
+    assert job["result"]["summary"]["processed_successfully"] == 100
+
+def test_background_upload_spools_off_event_loop(background_client, monkeypatch):
+    """Test de que el spool del archivo no corre en el event loop"""
+    import asyncio
+    threads = []
+    spool = ingest_job_manager._spool
+
+    def tracked_spool(table_name, file):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event_loop")
+        except RuntimeError:
+            threads.append("worker")
+        return spool(table_name, file)
+
+    monkeypatch.setattr(ingest_job_manager, "_spool", tracked_spool)
+    response = background_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"background": "true"},
+        files={"file": ("test.csv", b"1,John,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    assert response.status_code == 202
+    assert threads == ["worker"]
+    assert wait_for_job(background_client, response.json()["job_id"])["status"] == "completed"
+
+def test_unknown_ingest_job(client):
+    """Test de job inexistente"""
+    response = client.get("/api/v1/ingest-jobs/does-not-exist")
+    assert response.status_code == 404
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """Control de admisión con una carga por tabla y sin cola"""
+    from app.services.admission import ingest_scheduler
+    monkeypatch.setattr(ingest_scheduler, "max_per_table", 1)
+    monkeypatch.setattr(ingest_scheduler, "max_queued", 0)
+    return ingest_scheduler
+
+def test_upload_rejected_with_retry_after_when_table_is_busy(client, scheduler):
+    """Test de 429 con Retry-After cuando la tabla ya tiene su máximo de cargas"""
+    content = b"1,John Doe,2021-01-01T00:00:00Z,,\n"
+    with scheduler.admit_blocking("hired_employees"):
+        response = client.post(
+            "/api/v1/upload/hired_employees",
+            files={"file": ("test.csv", content, "text/csv")}
+        )
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        # Otra tabla no se ve afectada
+        response = client.post(
+            "/api/v1/upload/departments",
+            files={"file": ("departments.csv", b"1,IT\n", "text/csv")}
+        )
+        assert response.status_code == 200
+        assert client.get("/api/v1/ingest-admission").json()["uploads_per_table"] == {"hired_employees": 1}
+
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+
+def test_upload_waits_in_queue_until_admitted(client, scheduler, monkeypatch):
+    """Test de espera en la cola acotada hasta que se libera un lugar"""
+    import threading
+    monkeypatch.setattr(scheduler, "max_queued", 1)
+    monkeypatch.setattr(scheduler, "queue_timeout", 10)
+    holding = scheduler.admit_blocking("hired_employees")
+    holding.__enter__()
+    timer = threading.Timer(0.3, holding.__exit__, (None, None, None))
+    timer.start()
+    started = time.time()
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", b"1,John Doe,2021-01-01T00:00:00Z,,\n", "text/csv")}
+    )
+    timer.join()
+    assert response.status_code == 200
+    assert time.time() - started >= 0.3
+    assert scheduler.stats()["queued"] == 0
@@ -21,4 +21,23 @@ def test_upload_jobs_invalid_format(client):
         "/api/v1/upload/jobs",
         files={"file": ("jobs.csv", b"invalid", "text/csv")}
     )
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+
+def test_upload_jobs_skips_existing_and_incomplete(client):
+    """Test de carga vectorizada: existentes como duplicados, incompletos como errores"""
+    client.post(
+        "/api/v1/upload/jobs",
+        files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")}
+    )
+    response = client.post(
+        "/api/v1/upload/jobs",
+        files={"file": ("jobs.csv", b"1,Developer\n2,  Manager  \n3,\n", "text/csv")}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["total_procesados"] == 3
+    assert summary["insertados"] == 1
+    assert summary["duplicados"] == 1
+    assert summary["errores"] == 1
+    assert len(summary["detalles_errores"]) == 1
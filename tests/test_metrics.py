@@ -1,43 +1,380 @@
 import pytest
+import asyncio
+import httpx
 from fastapi.testclient import TestClient
 
 @pytest.fixture
-def setup_test_data(client, db_session):
+def setup_test_data(committed_client):
     """Fixture para cargar datos de prueba"""
     # Cargar departamentos
-    with tempfile.NamedTemporaryFile(suffix='.csv', mode='w') as f:
-        f.write("1,IT\n2,HR\n")
-        f.seek(0)
-        client.post("/api/v1/upload/departments", 
-                   files={"file": ("departments.csv", f, "text/csv")})
-    
+    committed_client.post("/api/v1/upload/departments",
+               files={"file": ("departments.csv", b"1,IT\n2,HR\n", "text/csv")})
+
     # Cargar trabajos
-    with tempfile.NamedTemporaryFile(suffix='.csv', mode='w') as f:
-        f.write("1,Developer\n2,Manager\n")
-        f.seek(0)
-        client.post("/api/v1/upload/jobs", 
-                   files={"file": ("jobs.csv", f, "text/csv")})
-    
-    # Cargar empleados
-    with tempfile.NamedTemporaryFile(suffix='.csv', mode='w') as f:
-        f.write("id,name,datetime,department_id,job_id\n")
-        f.write("1,John,2021-01-01T00:00:00Z,1,1\n")
-        f.write("2,Jane,2021-02-01T00:00:00Z,1,2\n")
-        f.seek(0)
-        client.post("/api/v1/upload/hired_employees", 
-                   files={"file": ("employees.csv", f, "text/csv")})
-
-def test_quarterly_hiring(client, setup_test_data):
+    committed_client.post("/api/v1/upload/jobs",
+               files={"file": ("jobs.csv", b"1,Developer\n2,Manager\n", "text/csv")})
+
+    # Cargar empleados (CSV sin headers, como el resto de las cargas)
+    content = (
+        b"1,John,2021-01-01T00:00:00Z,1,1\n"
+        b"2,Jane,2021-02-01T00:00:00Z,1,2\n"
+    )
+    response = committed_client.post("/api/v1/upload/hired_employees",
+               files={"file": ("employees.csv", content, "text/csv")})
+    assert response.json()["summary"]["processed_successfully"] == 2
+
+def test_quarterly_hiring(committed_client, setup_test_data):
     """Test de métricas trimestrales"""
-    response = client.get("/api/v1/metrics/quarterly-hiring")
+    response = committed_client.get("/api/v1/metrics/quarterly-hiring")
     assert response.status_code == 200
     data = response.json()
     assert "rows" in data
     assert len(data["rows"]) > 0
 
-def test_departments_above_mean(client, setup_test_data):
+def test_departments_above_mean(committed_client, setup_test_data):
     """Test de departamentos sobre la media"""
-    response = client.get("/api/v1/metrics/departments-above-mean")
+    response = committed_client.get("/api/v1/metrics/departments-above-mean")
     assert response.status_code == 200
     data = response.json()
-    assert "rows" in data
\ No newline at end of file
+    assert "rows" in data
+
+@pytest.mark.asyncio
+async def test_metrics_respond_during_ingest(committed_app):
+    """Test de health y métricas respondiendo mientras corre una carga"""
+    content = "".join(f"{i},Employee {i},2021-01-01T00:00:00Z,,\n" for i in range(1, 20001))
+    finished = []
+
+    transport = httpx.ASGITransport(app=committed_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        async def upload():
+            response = await ac.post(
+                "/api/v1/upload/hired_employees",
+                files={"file": ("test.csv", content.encode(), "text/csv")}
+            )
+            finished.append("upload")
+            return response
+
+        upload_task = asyncio.create_task(upload())
+        await asyncio.sleep(0.1)
+        health = await ac.get("/api/health")
+        finished.append("health")
+        metrics = await ac.get("/api/v1/metrics/quarterly-hiring")
+        finished.append("metrics")
+        upload_response = await upload_task
+
+    assert health.status_code == 200
+    assert metrics.status_code == 200
+    assert upload_response.status_code == 200
+    assert finished.index("health") < finished.index("upload")
+
+AGGREGATES_FROM_HIRES = """
+    SELECT department_id, job_id, EXTRACT(YEAR FROM datetime)::int, EXTRACT(QUARTER FROM datetime)::int, COUNT(*)
+    FROM hired_employees WHERE datetime IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+AGGREGATES_STORED = """
+    SELECT department_id, job_id, year, quarter, SUM(hired)
+    FROM hiring_aggregates
+    GROUP BY 1, 2, 3, 4 HAVING SUM(hired) <> 0
+"""
+
+@pytest.mark.parametrize("load_mode", ["orm", "copy", "staging"])
+def test_hiring_aggregates_follow_ingest(client, db_session, load_mode):
+    """Test de hiring_aggregates actualizada en cada carga, incluido update_existing"""
+    from sqlalchemy import text
+    client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n2,HR\n", "text/csv")})
+    client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"load_mode": load_mode},
+        files={"file": ("test.csv", (
+            b"1,John,2021-01-01T00:00:00Z,1,1\n"
+            b"2,Jane,2021-02-01T00:00:00Z,1,1\n"
+            b"3,Joe,2021-05-01T00:00:00Z,2,1\n"
+        ), "text/csv")}
+    )
+    assert response.status_code == 200
+    # Cambio de departamento (1 -> 2) y de trimestre (Q2 -> Q4)
+    update_mode = "staging" if load_mode == "staging" else "orm"
+    response = client.post(
+        "/api/v1/upload/hired_employees",
+        params={"update_existing": "true", "load_mode": update_mode},
+        files={"file": ("test.csv", b"2,Jane,2021-02-01T00:00:00Z,2,1\n3,Joe,2021-11-01T00:00:00Z,2,1\n", "text/csv")}
+    )
+    assert response.status_code == 200
+
+    stored = sorted(tuple(row) for row in db_session.execute(text(AGGREGATES_STORED)))
+    assert stored == sorted(tuple(row) for row in db_session.execute(text(AGGREGATES_FROM_HIRES)))
+    assert stored == [(1, 1, 2021, 1, 1), (2, 1, 2021, 1, 1), (2, 1, 2021, 4, 1)]
+    # Compactada al terminar cada carga: una fila por clave
+    rows = db_session.execute(text("SELECT COUNT(*) FROM hiring_aggregates")).scalar()
+    assert rows == len(stored)
+
+def test_quarterly_hiring_reads_aggregates(committed_client):
+    """Test de métricas calculadas desde hiring_aggregates tras un update_existing"""
+    committed_client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n2,HR\n", "text/csv")})
+    committed_client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", (
+            b"1,John,2021-01-01T00:00:00Z,1,1\n"
+            b"2,Jane,2021-02-01T00:00:00Z,1,1\n"
+            b"3,Joe,2021-05-01T00:00:00Z,1,1\n"
+            b"4,Ann,2020-05-01T00:00:00Z,2,1\n"
+        ), "text/csv")}
+    )
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        params={"update_existing": "true"},
+        files={"file": ("test.csv", b"3,Joe,2021-08-01T00:00:00Z,2,1\n4,Ann,2021-05-01T00:00:00Z,2,1\n", "text/csv")}
+    )
+
+    rows = committed_client.get("/api/v1/metrics/quarterly-hiring").json()["rows"]
+    assert rows == [
+        {"department": "HR", "job": "Developer", "Q1": 0, "Q2": 1, "Q3": 1, "Q4": 0},
+        {"department": "IT", "job": "Developer", "Q1": 2, "Q2": 0, "Q3": 0, "Q4": 0}
+    ]
+    above = committed_client.get("/api/v1/metrics/departments-above-mean").json()["rows"]
+    assert above == []
+
+def test_metrics_period_params(committed_client):
+    """Test de métricas por año y por rango from/to (alineado o no a trimestres)"""
+    committed_client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n", "text/csv")})
+    committed_client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", (
+            b"1,John,2020-03-31T23:59:59Z,1,1\n"
+            b"2,Jane,2020-04-01T00:00:00Z,1,1\n"
+            b"3,Joe,2020-04-15T12:00:00Z,1,1\n"
+            b"4,Ann,2021-01-01T00:00:00Z,1,1\n"
+        ), "text/csv")}
+    )
+
+    def quarters(**params):
+        response = committed_client.get("/api/v1/metrics/quarterly-hiring", params=params)
+        assert response.status_code == 200
+        row = response.json()["rows"][0]
+        return [row["Q1"], row["Q2"], row["Q3"], row["Q4"]]
+
+    assert quarters() == [1, 0, 0, 0]
+    assert quarters(year=2020) == [1, 2, 0, 0]
+    # Rango alineado a trimestres (agregados) y rango arbitrario (hired_employees)
+    assert quarters(**{"from": "2020-04-01T00:00:00", "to": "2021-01-01T00:00:00"}) == [0, 2, 0, 0]
+    assert quarters(**{"from": "2020-03-31T23:59:59", "to": "2020-04-15T12:00:00"}) == [1, 1, 0, 0]
+    assert quarters(**{"from": "2020-04-01T00:00:00Z"}) == [1, 2, 0, 0]
+
+    above = committed_client.get("/api/v1/metrics/departments-above-mean", params={"year": 2020}).json()
+    assert above["period"] == {"from": "2020-01-01T00:00:00", "to": "2021-01-01T00:00:00"}
+
+    assert committed_client.get(
+        "/api/v1/metrics/quarterly-hiring", params={"year": 2020, "from": "2020-01-01"}
+    ).status_code == 400
+    assert committed_client.get(
+        "/api/v1/metrics/quarterly-hiring", params={"from": "2021-01-01", "to": "2020-01-01"}
+    ).status_code == 400
+
+def test_hires_range_query_uses_index(db_session):
+    """Test de que el rango semiabierto sobre datetime usa los índices de hired_employees"""
+    from sqlalchemy import text
+    from datetime import datetime
+    from app.services.metrics_service import MetricsService
+
+    db_session.execute(text("INSERT INTO departments (id, department) SELECT g, 'Dept ' || g FROM generate_series(1, 10) g"))
+    db_session.execute(text("INSERT INTO jobs (id, job) SELECT g, 'Job ' || g FROM generate_series(1, 10) g"))
+    db_session.execute(text("""
+        INSERT INTO hired_employees (id, name, datetime, department_id, job_id)
+        SELECT g, 'Employee ' || g, TIMESTAMP '2012-01-01' + (g % 3650) * INTERVAL '1 day', g % 10 + 1, g % 7 + 1
+        FROM generate_series(1, 50000) g
+    """))
+    db_session.execute(text("ANALYZE hired_employees"))
+
+    query, params = MetricsService().build_query(
+        MetricsService.DEPARTMENTS_ABOVE_MEAN_QUERY, datetime(2021, 2, 1), datetime(2021, 2, 15)
+    )
+    assert "FROM hired_employees" in query
+    plan = "\n".join(row[0] for row in db_session.execute(text("EXPLAIN " + query), params))
+    assert "Index" in plan or "Bitmap" in plan
+    assert "Seq Scan on hired_employees" not in plan
+
+def test_metrics_cache_etag(committed_client, db_engine):
+    """Test de caché de métricas: ETag, 304 y nueva versión tras una carga"""
+    from sqlalchemy import text
+    committed_client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n", "text/csv")})
+    committed_client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", b"1,John,2021-01-01T00:00:00Z,1,1\n", "text/csv")}
+    )
+
+    first = committed_client.get("/api/v1/metrics/quarterly-hiring")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json()["rows"][0]["Q1"] == 1
+
+    revalidated = committed_client.get("/api/v1/metrics/quarterly-hiring", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    # Un cambio hecho por fuera de las cargas no invalida: se sirve la respuesta cacheada
+    with db_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO hired_employees (id, name, datetime, department_id, job_id) "
+            "VALUES (2, 'Jane', '2021-02-01', 1, 1)"
+        ))
+    cached = committed_client.get("/api/v1/metrics/quarterly-hiring")
+    assert cached.headers["etag"] == etag
+    assert cached.json()["rows"][0]["Q1"] == 1
+
+    # Otros parámetros son otra entrada
+    assert committed_client.get("/api/v1/metrics/quarterly-hiring", params={"year": 2020}).headers["etag"] != etag
+
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", b"3,Joe,2021-08-01T00:00:00Z,1,1\n", "text/csv")}
+    )
+    refreshed = committed_client.get("/api/v1/metrics/quarterly-hiring", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert refreshed.json()["rows"][0]["Q1"] == 2
+    assert refreshed.json()["rows"][0]["Q3"] == 1
+
+def test_metrics_cache_lru_and_versions():
+    """Test de la caché de métricas: tamaño acotado con desalojo LRU y versiones"""
+    from app.services.metrics_cache import MetricsCache
+    cache = MetricsCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", cache.version, b"{}")
+    cache.put("b", cache.version, b"[]")
+    assert cache.get("a") is not None
+    cache.put("c", cache.version, b"1")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a").etag == cache.put("x", cache.version, b"{}").etag
+
+    # Un resultado calculado antes de una carga no se guarda como vigente
+    stale_version = cache.version
+    cache.invalidate()
+    cache.put("d", stale_version, b"2")
+    assert cache.get("d") is None
+    assert cache.get("a") is None
+
+@pytest.mark.parametrize("accept", ["application/x-ndjson", "text/csv", "application/vnd.apache.arrow.stream"])
+def test_metrics_streaming_formats(committed_client, monkeypatch, accept):
+    """Test de salidas por streaming según Accept, leídas por bloques del cursor"""
+    import io
+    import json
+    from app.config import get_config
+    monkeypatch.setattr(get_config(), "METRICS_STREAM_BATCH_SIZE", 2)
+    departments = "".join(f"{i},Dept {i}\n" for i in range(1, 6))
+    committed_client.post("/api/v1/upload/departments", files={"file": ("departments.csv", departments.encode(), "text/csv")})
+    committed_client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n", "text/csv")})
+    employees = "".join(f"{i},Employee {i},2021-0{i % 9 + 1}-01T00:00:00Z,{i % 5 + 1},1\n" for i in range(1, 21))
+    committed_client.post("/api/v1/upload/hired_employees", files={"file": ("test.csv", employees.encode(), "text/csv")})
+
+    expected = committed_client.get("/api/v1/metrics/quarterly-hiring").json()["rows"]
+    assert len(expected) == 5
+
+    response = committed_client.get("/api/v1/metrics/quarterly-hiring", headers={"Accept": accept})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(accept)
+    if accept == "application/x-ndjson":
+        rows = [json.loads(line) for line in response.text.splitlines()]
+    elif accept == "text/csv":
+        lines = response.text.splitlines()
+        assert lines[0] == "department,job,Q1,Q2,Q3,Q4"
+        rows = [
+            dict(zip(["department", "job"], line.split(",")[:2]), **{
+                f"Q{n}": int(value) for n, value in enumerate(line.split(",")[2:], start=1)
+            })
+            for line in lines[1:]
+        ]
+    else:
+        import pyarrow as pa
+        reader = pa.ipc.open_stream(io.BytesIO(response.content))
+        batches = list(reader)
+        assert [batch.num_rows for batch in batches] == [2, 2, 1]
+        rows = pa.Table.from_batches(batches).to_pylist()
+    assert rows == expected
+
+def test_metrics_stream_format_negotiation():
+    """Test de negociación del formato de salida por Accept"""
+    from app.utils.streaming import negotiate_stream_format
+    assert negotiate_stream_format(None) is None
+    assert negotiate_stream_format("application/json") is None
+    assert negotiate_stream_format("*/*") is None
+    assert negotiate_stream_format("text/csv") == ("csv", "text/csv")
+    assert negotiate_stream_format("text/csv;q=0.5, application/x-ndjson") == ("ndjson", "application/x-ndjson")
+    assert negotiate_stream_format("application/json, text/csv;q=0.9") is None
+    assert negotiate_stream_format("text/html, text/csv;q=0") is None
+
+@pytest.fixture
+def cube_data(committed_client):
+    """Datos de dos años para el cubo de contrataciones"""
+    committed_client.post("/api/v1/upload/departments", files={"file": ("departments.csv", b"1,IT\n2,HR\n", "text/csv")})
+    committed_client.post("/api/v1/upload/jobs", files={"file": ("jobs.csv", b"1,Developer\n2,Manager\n", "text/csv")})
+    committed_client.post(
+        "/api/v1/upload/hired_employees",
+        files={"file": ("test.csv", (
+            b"1,John,2020-01-15T00:00:00Z,1,1\n"
+            b"2,Jane,2021-01-20T00:00:00Z,1,1\n"
+            b"3,Joe,2021-02-10T00:00:00Z,1,2\n"
+            b"4,Ann,2021-05-01T00:00:00Z,2,1\n"
+            b"5,Bob,2021-11-30T00:00:00Z,,2\n"
+        ), "text/csv")}
+    )
+    return committed_client
+
+def test_hiring_cube_from_aggregates(cube_data):
+    """Test del cubo por departamento y año, servido desde hiring_aggregates"""
+    response = cube_data.get("/api/v1/metrics/hiring-cube", params={"group_by": "department,year"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "hiring_aggregates"
+    assert data["headers"] == ["department_id", "department", "year", "hired"]
+    assert data["rows"] == [
+        {"department_id": 1, "department": "IT", "year": 2020, "hired": 1},
+        {"department_id": 1, "department": "IT", "year": 2021, "hired": 2},
+        {"department_id": 2, "department": "HR", "year": 2021, "hired": 1},
+        {"department_id": None, "department": None, "year": 2021, "hired": 1}
+    ]
+
+def test_hiring_cube_rollup_by_month(cube_data):
+    """Test del cubo con grano mensual (hired_employees), filtros y subtotales ROLLUP"""
+    response = cube_data.get("/api/v1/metrics/hiring-cube", params={
+        "group_by": "job,month", "subtotals": "rollup", "year": 2021, "department_id": [1, 2]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "hired_employees"
+    rows = [(row["job"], row["month"], row["hired"], row["grouping"]) for row in data["rows"]]
+    assert rows == [
+        ("Developer", 1, 1, 0),
+        ("Developer", 5, 1, 0),
+        ("Developer", None, 2, 1),
+        ("Manager", 2, 1, 0),
+        ("Manager", None, 1, 1),
+        (None, None, 3, 3)
+    ]
+
+    cube = cube_data.get("/api/v1/metrics/hiring-cube", params={
+        "group_by": "quarter,job", "subtotals": "cube", "year": 2021
+    }).json()
+    by_quarter = {row["quarter"]: row["hired"] for row in cube["rows"] if row["grouping"] == 1}
+    assert by_quarter == {1: 2, 2: 1, 4: 1}
+    assert cube["source"] == "hiring_aggregates"
+
+def test_hiring_cube_streams_and_validates(cube_data):
+    """Test del cubo por streaming y de parámetros inválidos"""
+    response = cube_data.get(
+        "/api/v1/metrics/hiring-cube", params={"group_by": "year"}, headers={"Accept": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["year,hired", "2020,1", "2021,4"]
+
+    assert cube_data.get("/api/v1/metrics/hiring-cube", params={"group_by": "week"}).status_code == 400
+    assert cube_data.get("/api/v1/metrics/hiring-cube", params={"subtotals": "cube"}).status_code == 400
+    assert cube_data.get(
+        "/api/v1/metrics/hiring-cube", params={"group_by": "year", "subtotals": "grouping_sets"}
+    ).status_code == 400